@@ -0,0 +1,292 @@
+"""Benchmark the hot paths of large synthetic apps, without any external service.
+
+Each app has pages nesting components deeply, components bound to the state which
+are memoized as stateful components (half of them shared by all the pages), and a
+state with many vars and computed vars. Keep the results as local JSON to catch
+regressions between two runs, e.g.:
+
+    pytest integration/benchmarks/test_app_benchmark.py --benchmark-autosave
+    pytest integration/benchmarks/test_app_benchmark.py --benchmark-compare
+
+or `--benchmark-json=<path>`. The peak memory of the memory benchmarks is saved in
+their extra_info.
+"""
+
+import asyncio
+import itertools
+import tracemalloc
+import unittest.mock
+import uuid
+from typing import (
+    Dict,
+    List,  # noqa: F401 (used by the generated states)
+    NamedTuple,
+    Type,
+)
+
+import pytest
+
+import nextpy as xt
+from nextpy import constants
+from nextpy.app import App, process
+from nextpy.backend.event import Event
+from nextpy.backend.state import State, StateManagerRedis
+
+
+class AppSize(NamedTuple):
+    """The size of a synthetic app."""
+
+    # The number of pages.
+    pages: int
+    # The number of nested components in each page.
+    depth: int
+    # The number of components bound to the state in each page.
+    stateful: int
+    # The number of vars of the state, with a computed var for every ten vars.
+    vars: int
+
+
+SIZES = {
+    "small": AppSize(pages=10, depth=10, stateful=10, vars=50),
+    "large": AppSize(pages=50, depth=40, stateful=40, vars=500),
+}
+
+# Numbers the changes of the apps, to recompile a changed page.
+changes = itertools.count()
+
+
+def make_state(name: str, size: AppSize) -> Type[State]:
+    """Create a substate of the app state with many vars and computed vars.
+
+    Each computed var sums ten vars. The class is added to the module globals,
+    like the states of a real app.
+
+    Args:
+        name: The name of the size of the app.
+        size: The size of the app.
+
+    Returns:
+        The state class.
+    """
+    class_name = f"AppBenchState{name.title()}"
+    source = [f"class {class_name}(State):"]
+    source.extend(f"    var_{i}: int = {i}" for i in range(size.vars))
+    source.append(f"    rows: List[str] = [f'row {{i}}' for i in range({size.vars})]")
+    for i in range(0, size.vars, 10):
+        terms = " + ".join(f"self.var_{j}" for j in range(i, min(i + 10, size.vars)))
+        source.extend(
+            [
+                "    @xt.cached_var",
+                f"    def sum_{i}(self) -> int:",
+                f"        return {terms}",
+            ]
+        )
+    source.extend(
+        [
+            "    def increment(self):",
+            "        self.var_0 += 1",
+            "    def set_all(self):",
+            *(f"        self.var_{i} += 1" for i in range(size.vars)),
+        ]
+    )
+    exec("\n".join(source), globals())
+    return globals()[class_name]
+
+
+STATES = {name: make_state(name, size) for name, size in SIZES.items()}
+
+
+def make_page(state: Type[State], size: AppSize, page: int, change: int):
+    """Create the function of a page of a synthetic app.
+
+    Args:
+        state: The app state.
+        size: The size of the app.
+        page: The number of the page.
+        change: The number of the change of the app, shown by the first page.
+
+    Returns:
+        The page function.
+    """
+
+    def page_function() -> xt.Component:
+        component = xt.text(f"page {page}" + (f" change {change}" if page == 0 else ""))
+        for level in range(size.depth):
+            component = xt.box(component, xt.text(f"level {level}"))
+        stateful = []
+        for i in range(size.stateful):
+            # Share the first half of the stateful components between the pages.
+            var = i if i < size.stateful // 2 else page * size.stateful + i
+            stateful.append(
+                xt.button(
+                    getattr(state, f"var_{var % size.vars}"),
+                    on_click=state.increment,  # type: ignore
+                )
+            )
+        return xt.vstack(component, *stateful, xt.text(state.sum_0))  # type: ignore
+
+    return page_function
+
+
+def make_app(name: str) -> App:
+    """Create a synthetic app, with a new change on its first page.
+
+    Args:
+        name: The name of the size of the app.
+
+    Returns:
+        The app, ready to compile.
+    """
+    size = SIZES[name]
+    state = STATES[name]
+    app = App(state=State)
+    app.get_frontend_packages = unittest.mock.Mock()
+    change = next(changes)
+    for page in range(size.pages):
+        app.add_page(make_page(state, size, page, change), route=f"/page{page}")
+    return app
+
+
+@pytest.fixture
+def web_dir(tmp_path, monkeypatch):
+    """Run the benchmark in a temporary directory with a .web directory.
+
+    Args:
+        tmp_path: A temporary directory.
+        monkeypatch: Pytest monkeypatch object.
+
+    Returns:
+        The temporary directory.
+    """
+    (tmp_path / ".web").mkdir()
+    (tmp_path / ".web" / "package.json").touch()
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+@pytest.mark.parametrize("name", list(SIZES))
+def test_cold_compile(benchmark, web_dir, name: str):
+    """Measure compiling a synthetic app from scratch.
+
+    Args:
+        benchmark: The benchmark fixture.
+        web_dir: The temporary directory of the app.
+        name: The name of the size of the app.
+    """
+
+    def setup():
+        (web_dir / constants.COMPILE_CACHE_FILE).unlink(missing_ok=True)
+        return (make_app(name),), {}
+
+    benchmark.pedantic(App.compile_, setup=setup, rounds=3)
+
+
+@pytest.mark.parametrize("name", list(SIZES))
+def test_warm_recompile(benchmark, web_dir, name: str):
+    """Measure recompiling a synthetic app after a change of one page, like a hot reload.
+
+    Args:
+        benchmark: The benchmark fixture.
+        web_dir: The temporary directory of the app.
+        name: The name of the size of the app.
+    """
+    make_app(name).compile_()
+    benchmark.pedantic(App.compile_, setup=lambda: ((make_app(name),), {}), rounds=3)
+
+
+@pytest.mark.parametrize("name", list(SIZES))
+def test_compile_memory(benchmark, web_dir, name: str):
+    """Measure the peak memory allocated while compiling a synthetic app from scratch.
+
+    Args:
+        benchmark: The benchmark fixture.
+        web_dir: The temporary directory of the app.
+        name: The name of the size of the app.
+    """
+
+    def compile_app(app: App):
+        tracemalloc.start()
+        try:
+            app.compile_()
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        benchmark.extra_info["peak_memory_mb"] = peak / 2**20
+
+    benchmark.pedantic(compile_app, setup=lambda: ((make_app(name),), {}), rounds=1)
+
+
+@pytest.mark.parametrize("handler", ["increment", "set_all"])
+@pytest.mark.parametrize("name", list(SIZES))
+def test_get_delta(benchmark, name: str, handler: str):
+    """Measure changing the vars of a large state and computing its delta.
+
+    Args:
+        benchmark: The benchmark fixture.
+        name: The name of the size of the app.
+        handler: The event handler changing one var or all the vars.
+    """
+    state = State()
+    substate = state.get_substate([STATES[name].get_name()])
+
+    def update() -> Dict:
+        getattr(substate, handler)()
+        delta = state.get_delta()
+        state._clean()
+        return delta
+
+    assert update()
+    benchmark(update)
+
+
+@pytest.mark.parametrize("name", list(SIZES))
+def test_state_memory(benchmark, name: str):
+    """Measure the memory allocated by the state of a session, with all its vars.
+
+    Args:
+        benchmark: The benchmark fixture.
+        name: The name of the size of the app.
+    """
+    parent_state = State()
+
+    def create_state():
+        tracemalloc.start()
+        try:
+            state = STATES[name](parent_state=parent_state)
+            size, _ = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        benchmark.extra_info["memory_mb"] = size / 2**20
+        return state
+
+    benchmark.pedantic(create_state, rounds=1)
+
+
+@pytest.mark.parametrize("name", list(SIZES))
+def test_process_event(benchmark, name: str):
+    """Measure the round trip of an event through process(), with the state manager.
+
+    Args:
+        benchmark: The benchmark fixture.
+        name: The name of the size of the app.
+    """
+    app = App(state=State)
+    event = Event(
+        token=str(uuid.uuid4()),
+        name=f"{STATES[name].get_full_name()}.increment",
+        payload={},
+        router_data={"pathname": "/", "query": {}},
+    )
+    loop = asyncio.new_event_loop()
+
+    async def process_event() -> list:
+        return [update async for update in process(app, event, "sid", {}, "127.0.0.1")]
+
+    try:
+        # Create the session before measuring.
+        assert loop.run_until_complete(process_event())
+        benchmark(lambda: loop.run_until_complete(process_event()))
+    finally:
+        if isinstance(app.state_manager, StateManagerRedis):
+            loop.run_until_complete(app.state_manager.close())
+        loop.close()
@@ -0,0 +1,61 @@
+"""Benchmark the state codecs on representative state shapes."""
+
+from typing import Any, Dict
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from nextpy.backend.codec import CloudpickleCodec, PickleCodec, StateCodec
+from nextpy.base import Base
+
+
+class Row(Base):
+    """A row of a table."""
+
+    id: int
+    name: str
+    score: float
+
+
+N_ROWS = 10000
+
+STATE_SHAPES: Dict[str, Any] = {
+    "scalars": {f"var_{i}": i if i % 2 else f"value {i}" for i in range(100)},
+    "nested": {
+        "items": [
+            {"id": i, "tags": ["a", "b"], "meta": {"x": i}} for i in range(N_ROWS)
+        ]
+    },
+    "models": [Row(id=i, name=f"row {i}", score=i / 3) for i in range(N_ROWS)],
+    "array": np.random.default_rng(0).random((N_ROWS, 100)),
+    "dataframe": pd.DataFrame(
+        {
+            "id": np.arange(N_ROWS),
+            "score": np.random.default_rng(0).random(N_ROWS),
+            "name": [f"row {i}" for i in range(N_ROWS)],
+        }
+    ),
+}
+
+CODECS: Dict[str, StateCodec] = {
+    "cloudpickle": CloudpickleCodec(),
+    "pickle5": PickleCodec(),
+    "pickle5_zstd": PickleCodec(compression_threshold=64 * 1024),
+}
+
+
+@pytest.mark.parametrize("shape", list(STATE_SHAPES))
+@pytest.mark.parametrize("codec_name", list(CODECS))
+def test_codec_round_trip(benchmark, codec_name: str, shape: str):
+    """Measure encoding and decoding a state value.
+
+    Args:
+        benchmark: The benchmark fixture.
+        codec_name: The name of the codec.
+        shape: The name of the state shape.
+    """
+    codec = CODECS[codec_name]
+    payload = STATE_SHAPES[shape]
+    benchmark.extra_info["size"] = len(codec.dumps(payload))
+    benchmark(lambda: codec.loads(codec.dumps(payload)))
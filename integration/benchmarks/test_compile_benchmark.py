@@ -1,8 +1,14 @@
 """Benchmark the time it takes to compile a nextpy app."""
 
 import importlib
+import itertools
+import unittest.mock
+
+import pytest
 
 import nextpy
+from nextpy import constants
+from nextpy.frontend.components.component import CollectedTree
 
 xt = nextpy
 
@@ -119,3 +125,115 @@ def test_mean_add_large_page_time(benchmark):
     app = xt.App(state=State)
     results = benchmark(add_large_pages, app)
     print(results)
+
+
+# The number of pages of the large app to recompile.
+N_RECOMPILE_PAGES = 30
+
+# Numbers the changes of the large app.
+changes = itertools.count()
+
+
+def make_large_app() -> xt.App:
+    """Create an app with many large pages, one of them changing on every compile.
+
+    Returns:
+        The app, ready to compile.
+    """
+    app = xt.App(state=State)
+    app.get_frontend_packages = unittest.mock.Mock()
+    for i in range(1, N_RECOMPILE_PAGES):
+        app.add_page(sample_large_page, route=f"/{i}")
+    change = next(changes)
+    app.add_page(
+        lambda: xt.vstack(sample_large_page(), xt.text(f"change {change}")),
+        route="/changed",
+    )
+    return app
+
+
+@pytest.mark.parametrize("cache", ["cold", "warm"])
+def test_recompile_large_app(benchmark, tmp_path, monkeypatch, cache: str):
+    """Measure compiling a large app after changing one of its pages.
+
+    Args:
+        benchmark: The benchmark fixture.
+        tmp_path: A temporary directory for the .web directory.
+        monkeypatch: Pytest monkeypatch object.
+        cache: Whether to compile from scratch or with the cache of the last compile.
+    """
+    (tmp_path / ".web").mkdir()
+    (tmp_path / ".web" / "package.json").touch()
+    monkeypatch.chdir(tmp_path)
+    make_large_app().compile_()
+
+    def setup():
+        if cache == "cold":
+            (tmp_path / constants.COMPILE_CACHE_FILE).unlink()
+        return (make_large_app(),), {}
+
+    benchmark.pedantic(xt.App.compile_, setup=setup, rounds=3)
+
+
+@pytest.mark.parametrize("processes", [1, 2, 4], ids=lambda n: f"processes_{n}")
+def test_compile_large_app_processes(benchmark, tmp_path, monkeypatch, processes: int):
+    """Measure compiling a large app from scratch in threads or in processes.
+
+    Args:
+        benchmark: The benchmark fixture.
+        tmp_path: A temporary directory for the .web directory.
+        monkeypatch: Pytest monkeypatch object.
+        processes: The number of processes compiling the pages, 1 for threads.
+    """
+    (tmp_path / ".web").mkdir()
+    (tmp_path / ".web" / "package.json").touch()
+    monkeypatch.chdir(tmp_path)
+    if processes > 1:
+        monkeypatch.setenv("COMPILE_PROCESSES", str(processes))
+
+    def setup():
+        (tmp_path / constants.COMPILE_CACHE_FILE).unlink(missing_ok=True)
+        return (make_large_app(),), {}
+
+    benchmark.pedantic(xt.App.compile_, setup=setup, rounds=3)
+
+
+def sample_deep_page(depth: int) -> xt.Component:
+    """A page nesting boxes, each one with a text.
+
+    Args:
+        depth: The number of nested boxes.
+
+    Returns:
+        A nextpy component.
+    """
+    component = xt.text(State.count)
+    for i in range(depth):
+        component = xt.box(component, xt.text(f"level {i}"))
+    return component
+
+
+def walk_tree(component: xt.Component):
+    """Get the imports, hooks, custom code, dynamic imports and refs of a tree.
+
+    Args:
+        component: The root of the tree.
+    """
+    component.get_imports()
+    component.get_hooks()
+    component.get_custom_code()
+    component.get_dynamic_imports()
+    component.get_refs()
+
+
+@pytest.mark.parametrize("collect", [walk_tree, CollectedTree], ids=["walks", "single"])
+@pytest.mark.parametrize("depth", [50, 200])
+def test_collect_deep_page(benchmark, collect, depth: int):
+    """Measure collecting what a deep page is compiled with, in one or several walks.
+
+    Args:
+        benchmark: The benchmark fixture.
+        collect: Walks the tree of the page.
+        depth: The depth of the page.
+    """
+    benchmark(collect, sample_deep_page(depth))
@@ -0,0 +1,27 @@
+"""Benchmark the overhead of measuring the event processing."""
+
+import pytest
+
+from nextpy.backend.metrics import EventMetrics
+
+STAGES = ["state_lock", "state_load", "preprocess", "handler", "delta", "emit"]
+
+
+@pytest.mark.parametrize("enabled", [False, True], ids=["disabled", "enabled"])
+def test_event_spans(benchmark, enabled: bool):
+    """Measure the spans of the stages of an event.
+
+    Args:
+        benchmark: The benchmark fixture.
+        enabled: Whether the metrics are enabled.
+    """
+    metrics = EventMetrics()
+    metrics.enabled = enabled
+
+    def event():
+        with metrics.event("state.handler"):
+            for stage in STAGES:
+                with metrics.span(stage):
+                    pass
+
+    benchmark(event)
@@ -0,0 +1,182 @@
+"""Benchmark computing and encoding the delta of states."""
+
+from typing import Dict, List, Type
+
+import pytest
+
+import nextpy as xt  # noqa: F401 (used by the generated states)
+from nextpy.backend.state import BaseState, StateUpdate
+from nextpy.base import Base
+from nextpy.utils import format
+
+# The depth of the state tree and the number of computed vars per state.
+DEPTHS = [1, 5]
+N_COMPUTED_VARS = 40
+
+
+def make_state_tree(depth: int) -> Type[BaseState]:
+    """Create a chain of substates, each with computed vars depending on its parent.
+
+    The computed vars of the root depend on a base var, and the computed vars of
+    each substate depend on the computed vars of its parent.
+
+    Args:
+        depth: The number of states in the chain.
+
+    Returns:
+        The root state class.
+    """
+    source = []
+    for level in range(depth):
+        parent = f"DeepState{depth}_{level - 1}" if level else "BaseState"
+        source.append(f"class DeepState{depth}_{level}({parent}):")
+        if level == 0:
+            source.append("    value: int = 0")
+        for i in range(N_COMPUTED_VARS):
+            dep = f"c{level - 1}_{i}" if level else "value"
+            source.extend(
+                [
+                    "    @xt.cached_var",
+                    f"    def c{level}_{i}(self) -> int:",
+                    f"        return self.{dep} + {i}",
+                ]
+            )
+    exec("\n".join(source), globals())
+    return globals()[f"DeepState{depth}_0"]
+
+
+STATE_TREES = {depth: make_state_tree(depth) for depth in DEPTHS}
+
+
+@pytest.mark.parametrize("depth", DEPTHS, ids=lambda depth: f"depth_{depth}")
+def test_get_delta(benchmark, depth: int):
+    """Measure setting a root var and computing the delta of the whole tree.
+
+    Args:
+        benchmark: The benchmark fixture.
+        depth: The depth of the state tree.
+    """
+    state = STATE_TREES[depth]()
+
+    def update():
+        state.value += 1
+        delta = state.get_delta()
+        state._clean()
+        return delta
+
+    delta = update()
+    assert sum(len(subdelta) for subdelta in delta.values()) == (
+        1 + depth * N_COMPUTED_VARS
+    )
+    benchmark(update)
+
+
+def make_update() -> StateUpdate:
+    """Create a state update with a typical mix of table rows and scalars.
+
+    Returns:
+        The state update.
+    """
+    rows = [
+        {"id": i, "name": f"row {i}", "score": i / 3, "tags": ["a", "b"]}
+        for i in range(2000)
+    ]
+    return StateUpdate(
+        delta=format.format_state(
+            {"state.table": {"rows": rows, "count": len(rows), "title": "Table"}}
+        )
+    )
+
+
+@pytest.mark.parametrize("encoder", ["pydantic", "direct"])
+def test_state_update_encoding(benchmark, encoder: str):
+    """Measure encoding a state update to the json sent to the client.
+
+    Args:
+        benchmark: The benchmark fixture.
+        encoder: Whether to encode through pydantic dicts or directly.
+    """
+    update = make_update()
+    encode = (lambda: Base.json(update)) if encoder == "pydantic" else update.json
+    # Multiply by the number of rounds per second for the throughput.
+    benchmark.extra_info["bytes"] = len(encode().encode())
+    benchmark(encode)
+
+
+def make_attribute_tree(depth: int) -> BaseState:
+    """Create a chain of substates, each with a var of its own.
+
+    Args:
+        depth: The number of states in the chain.
+
+    Returns:
+        The deepest substate of a new state tree.
+    """
+    source = []
+    for level in range(depth):
+        parent = f"AttrState{depth}_{level - 1}" if level else "BaseState"
+        source.append(f"class AttrState{depth}_{level}({parent}):")
+        source.append(f"    v{level}: int = 0")
+    exec("\n".join(source), globals())
+    state = globals()[f"AttrState{depth}_0"]()
+    for level in range(1, depth):
+        state = state.substates[f"attr_state{depth}_{level}"]
+    return state
+
+
+ATTRIBUTE_DEPTH = 5
+ATTRIBUTE_LEAF = make_attribute_tree(ATTRIBUTE_DEPTH)
+
+
+@pytest.mark.parametrize("operation", ["read", "write"])
+def test_attribute_access(benchmark, operation: str):
+    """Measure reading and writing the vars of all levels from the deepest substate.
+
+    Args:
+        benchmark: The benchmark fixture.
+        operation: Whether to read or write the vars.
+    """
+    leaf = ATTRIBUTE_LEAF
+    names = [f"v{level}" for level in range(ATTRIBUTE_DEPTH)]
+
+    def read():
+        for name in names:
+            getattr(leaf, name)
+
+    def write():
+        for name in names:
+            setattr(leaf, name, 1)
+
+    benchmark(read if operation == "read" else write)
+
+
+class RowsState(BaseState):
+    """A state with a large table var."""
+
+    rows: List[Dict[str, int]] = []
+
+
+N_ROWS = 100_000
+
+
+@pytest.mark.parametrize("access", ["proxy", "get_value"])
+def test_iterate_rows(benchmark, access: str):
+    """Measure iterating a large list of dicts and reading a key of each row.
+
+    Rows read through the state are wrapped in proxies tracking mutations,
+    while get_value returns the plain list for read only access.
+
+    Args:
+        benchmark: The benchmark fixture.
+        access: Whether to read the rows through the state or with get_value.
+    """
+    state = RowsState()
+    state.rows = [{"id": i, "value": i} for i in range(N_ROWS)]
+    state._clean()
+
+    def iterate():
+        rows = state.rows if access == "proxy" else state.get_value(state.rows)
+        return sum(row["value"] for row in rows)
+
+    assert iterate() == N_ROWS * (N_ROWS - 1) // 2
+    benchmark(iterate)
@@ -0,0 +1,117 @@
+"""Benchmark the per-event latency of the redis state manager versus total state size."""
+
+import asyncio
+import uuid
+from typing import List, Type
+
+import pytest
+
+from nextpy.backend.state import BaseState, StateManager, StateManagerRedis
+
+# Number of large sibling substates, each holding a payload of PAYLOAD_SIZE items.
+N_SUBSTATES = [1, 10, 50]
+PAYLOAD_SIZE = 2000
+
+
+def increment(self):
+    """Increment the count.
+
+    Args:
+        self: The counter state.
+    """
+    self.count += 1
+
+
+def make_state_tree(n_substates: int) -> Type[BaseState]:
+    """Create a root state with one small and n large substates.
+
+    The classes are added to the module globals so they are pickled by reference,
+    like the states of a real app.
+
+    Args:
+        n_substates: The number of large substates.
+
+    Returns:
+        The root state class.
+    """
+    root = type(f"BenchState{n_substates}", (BaseState,), {"__module__": __name__})
+    globals()[root.__name__] = root
+
+    # The substate targeted by the benchmarked event.
+    counter = type(
+        f"CounterState{n_substates}",
+        (root,),
+        {
+            "__module__": __name__,
+            "__annotations__": {"count": int},
+            "count": 0,
+            "increment": increment,
+        },
+    )
+    globals()[counter.__name__] = counter
+    for i in range(n_substates):
+        payload = type(
+            f"PayloadState{n_substates}_{i}",
+            (root,),
+            {
+                "__module__": __name__,
+                "__annotations__": {"rows": List[str]},
+                "rows": [f"row {j}" for j in range(PAYLOAD_SIZE)],
+            },
+        )
+        globals()[payload.__name__] = payload
+    return root
+
+
+STATE_TREES = {n: make_state_tree(n) for n in N_SUBSTATES}
+
+
+@pytest.fixture(params=N_SUBSTATES, ids=lambda n: f"{n}_substates")
+def state_tree(request) -> Type[BaseState]:
+    """The root state of a tree with the given number of large substates.
+
+    Args:
+        request: The pytest request object.
+
+    Returns:
+        The root state class.
+    """
+    return STATE_TREES[request.param]
+
+
+@pytest.mark.parametrize("substate_keys", [False, True], ids=["full", "substates"])
+def test_event_latency(benchmark, state_tree: Type[BaseState], substate_keys: bool):
+    """Measure the state manager round trip for an event touching one small substate.
+
+    Args:
+        benchmark: The benchmark fixture.
+        state_tree: The root state class.
+        substate_keys: Whether to store each substate under its own key.
+    """
+    state_manager = StateManager.create(state=state_tree)
+    if not isinstance(state_manager, StateManagerRedis):
+        pytest.skip("Benchmark requires redis")
+    state_manager.substate_keys = substate_keys
+
+    token = str(uuid.uuid4())
+    counter_name = next(
+        substate.get_name()
+        for substate in state_tree.get_substates()
+        if substate.__name__.startswith("CounterState")
+    )
+    path = [state_tree.get_name(), counter_name]
+    loop = asyncio.new_event_loop()
+
+    async def process_event():
+        async with state_manager.modify_state(token, path) as state:
+            state.get_substate(path).increment()
+            state.get_delta()
+            state._clean()
+
+    try:
+        # Create the session before measuring.
+        loop.run_until_complete(process_event())
+        benchmark(lambda: loop.run_until_complete(process_event()))
+    finally:
+        loop.run_until_complete(state_manager.close())
+        loop.close()
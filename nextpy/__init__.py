@@ -254,6 +254,7 @@ _MAPPING = {
         "background",
         "call_script",
         "clear_local_storage",
+        "coalesce_updates",
         "console_log",
         "download",
         "event",
@@ -261,6 +262,7 @@ _MAPPING = {
         "redirect",
         "remove_cookie",
         "remove_local_storage",
+        "run_in_thread",
         "set_clipboard",
         "set_focus",
         "set_value",
@@ -279,7 +281,7 @@ _MAPPING = {
     "nextpy.build.testing": ["testing"],
     "nextpy.constants": ["Env", "constants"],
     "nextpy.data.jsondb": ["JsonDatabase"],
-    "nextpy.data.model": ["Model", "model", "session"],
+    "nextpy.data.model": ["Model", "model", "session", "async_session"],
     "nextpy.frontend.components": _ALL_COMPONENTS + ["chakra", "next"],
     "nextpy.frontend.components.framer.motion": ["motion"],
     "nextpy.frontend.components.component": ["memo"],
@@ -459,12 +459,14 @@ from nextpy.backend.event import EventChain as EventChain
 from nextpy.backend.event import background as background
 from nextpy.backend.event import call_script as call_script
 from nextpy.backend.event import clear_local_storage as clear_local_storage
+from nextpy.backend.event import coalesce_updates as coalesce_updates
 from nextpy.backend.event import console_log as console_log
 from nextpy.backend.event import download as download
 from nextpy.backend.event import prevent_default as prevent_default
 from nextpy.backend.event import redirect as redirect
 from nextpy.backend.event import remove_cookie as remove_cookie
 from nextpy.backend.event import remove_local_storage as remove_local_storage
+from nextpy.backend.event import run_in_thread as run_in_thread
 from nextpy.backend.event import set_clipboard as set_clipboard
 from nextpy.backend.event import set_focus as set_focus
 from nextpy.backend.event import set_value as set_value
@@ -475,6 +477,7 @@ from nextpy.backend import middleware as middleware
 from nextpy.backend.middleware import Middleware as Middleware
 from nextpy.data import model as model
 from nextpy.data.model import session as session
+from nextpy.data.model import async_session as async_session
 from nextpy.data.model import Model as Model
 from nextpy.frontend.page import page as page
 from nextpy.backend import route as route
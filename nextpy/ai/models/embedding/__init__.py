@@ -7,6 +7,7 @@ from nextpy.ai.models.embedding.aleph_alpha import (
     AlephAlphaSymmetricSemanticEmbedding,
 )
 from nextpy.ai.models.embedding.bedrock import BedrockEmbeddings
+from nextpy.ai.models.embedding.cache import CacheBackedEmbeddings
 from nextpy.ai.models.embedding.cohere import CohereEmbeddings
 from nextpy.ai.models.embedding.dashscope import DashScopeEmbeddings
 from nextpy.ai.models.embedding.deepinfra import DeepInfraEmbeddings
@@ -33,6 +34,7 @@ __all__ = [
     "AlephAlphaAsymmetricSemanticEmbedding",
     "AlephAlphaSymmetricSemanticEmbedding",
     "BedrockEmbeddings",
+    "CacheBackedEmbeddings",
     "CohereEmbeddings",
     "DashScopeEmbeddings",
     "DeepInfraEmbeddings",
@@ -0,0 +1,178 @@
+"""Cache the embeddings of any embedding model by the hash of their text."""
+from __future__ import annotations
+
+import collections
+import hashlib
+import sqlite3
+import threading
+from array import array
+from typing import Dict, List, Optional
+
+from nextpy.ai.models.embedding.base import Embeddings
+
+
+def _model_id(embeddings: Embeddings) -> str:
+    """Identify the model of an embedding wrapper, by its class and model name."""
+    for attribute in ("model", "model_name", "model_id", "repo_id"):
+        name = getattr(embeddings, attribute, None)
+        if isinstance(name, str):
+            return f"{type(embeddings).__name__}:{name}"
+    return type(embeddings).__name__
+
+
+class CacheBackedEmbeddings(Embeddings):
+    """Wrapper caching the embeddings of another embedding model.
+
+    The vectors are keyed by the model id, the kind of embedding (document or
+    query) and the hash of the exact text, so adding unchanged documents
+    again does not call the model. They are kept in memory, up to a number of
+    vectors, and optionally in a SQLite file shared between runs.
+
+    Example:
+        .. code-block:: python
+
+            from nextpy.ai.models.embedding import (
+                CacheBackedEmbeddings,
+                OpenAIEmbeddings,
+            )
+            embeddings = CacheBackedEmbeddings(
+                OpenAIEmbeddings(), path="embeddings.sqlite"
+            )
+    """
+
+    def __init__(
+        self,
+        embeddings: Embeddings,
+        path: Optional[str] = None,
+        max_size: int = 10000,
+        model_id: Optional[str] = None,
+    ):
+        """Wrap an embedding model.
+
+        Args:
+            embeddings: The embedding model.
+            path: The SQLite file of the on-disk cache, or None to only cache in memory.
+            max_size: The number of vectors kept in memory, the least recently used
+                ones are dropped first.
+            model_id: The id of the model in the cache keys, by default the class and
+                the model name of the wrapper.
+        """
+        self.embeddings = embeddings
+        self.max_size = max_size
+        self.model_id = model_id or _model_id(embeddings)
+        # The cached vectors by key, from the least to the most recently used.
+        self._memory: collections.OrderedDict[
+            str, List[float]
+        ] = collections.OrderedDict()
+        # The wrapper may be used by several threads, e.g. SimpleRAG.add_data.
+        self._lock = threading.Lock()
+        self._db = None
+        if path is not None:
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings"
+                " (key TEXT PRIMARY KEY, vector BLOB)"
+            )
+            self._db.commit()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def hit_rate(self) -> float:
+        """The share of the texts found in the cache, 0 before any call."""
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def _key(self, kind: str, text: str) -> str:
+        """Get the cache key of a text, any change of the text changing its vector."""
+        digest = hashlib.sha256(text.encode("utf-8")).hexdigest()
+        return f"{self.model_id}:{kind}:{digest}"
+
+    def _get(self, keys: List[str]) -> Dict[str, List[float]]:
+        """Get the cached vectors, from memory then from disk."""
+        found = {}
+        with self._lock:
+            for key in keys:
+                if key in self._memory:
+                    self._memory.move_to_end(key)
+                    found[key] = self._memory[key]
+            missing = [key for key in keys if key not in found]
+            if self._db is None:
+                return found
+            # Stay below the limit of SQLite on the number of query parameters.
+            for i in range(0, len(missing), 500):
+                chunk = missing[i : i + 500]
+                placeholders = ",".join("?" * len(chunk))
+                rows = self._db.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})",
+                    chunk,
+                )
+                for key, vector in rows:
+                    found[key] = array("d", vector).tolist()
+                    self._remember(key, found[key])
+        return found
+
+    def _set(self, vectors: Dict[str, List[float]]):
+        """Cache the new vectors, in memory and on disk."""
+        with self._lock:
+            for key, vector in vectors.items():
+                self._remember(key, vector)
+            if self._db is not None:
+                self._db.executemany(
+                    "INSERT OR REPLACE INTO embeddings VALUES (?, ?)",
+                    [
+                        (key, array("d", vector).tobytes())
+                        for key, vector in vectors.items()
+                    ],
+                )
+                self._db.commit()
+
+    def _remember(self, key: str, vector: List[float]):
+        """Keep a vector in memory, dropping the least recently used ones."""
+        self._memory[key] = vector
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_size:
+            self._memory.popitem(last=False)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """Embed search docs, only sending the texts missing from the cache to the model.
+
+        Args:
+            texts: The texts to embed.
+
+        Returns:
+            The embeddings of the texts.
+        """
+        keys = [self._key("document", text) for text in texts]
+        found = self._get(list(dict.fromkeys(keys)))
+        # Embed each missing text once, even when it is repeated.
+        missing = {key: text for key, text in zip(keys, texts) if key not in found}
+        with self._lock:
+            self.hits += len(keys) - len(missing)
+            self.misses += len(missing)
+        if missing:
+            vectors = self.embeddings.embed_documents(list(missing.values()))
+            new = dict(zip(missing, vectors))
+            self._set(new)
+            found.update(new)
+        return [found[key] for key in keys]
+
+    def embed_query(self, text: str) -> List[float]:
+        """Embed query text, from the cache when it was already embedded.
+
+        Args:
+            text: The text to embed.
+
+        Returns:
+            The embedding of the text.
+        """
+        key = self._key("query", text)
+        found = self._get([key])
+        with self._lock:
+            if key in found:
+                self.hits += 1
+                return found[key]
+            self.misses += 1
+        vector = self.embeddings.embed_query(text)
+        self._set({key: vector})
+        return vector
@@ -1,43 +1,204 @@
-from typing import List
+import hashlib
+import itertools
+import json
+import logging
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
 
 
 class SimpleRAG:
-    def __init__(self, raw_data=None, data_transformer=None, vector_store=None):
+    def __init__(
+        self,
+        raw_data=None,
+        data_transformer=None,
+        vector_store=None,
+        batch_size: int = 100,
+        max_workers: int = 1,
+        checkpoint_path: Optional[str] = None,
+    ):
         """Initialize the knowledge base.
 
         Args:
             raw_data: The raw data to add to the knowledge base. Default is None.
             data_transformer: An object with a `split_documents` method to apply to the raw data. Default is None.
             vector_store: An object with `add_documents` and `similarity_search` methods to use for storing vectors. Default is None.
+            batch_size: The number of chunks embedded and stored per call to the vector store. Default is 100.
+            max_workers: The number of batches embedded and stored concurrently. More than one requires the `add_documents` method of the vector store to be thread-safe. Default is 1.
+            checkpoint_path: A file recording the batches already stored, to resume an interrupted ingestion. Default is None.
         """
         self.data_transformer = data_transformer
         self.vector_store = vector_store
+        self.batch_size = batch_size
+        self.max_workers = max_workers
+        self.checkpoint_path = checkpoint_path
         self.references = []
         self.add_data(raw_data)
 
-    def add_data(self, raw_data):
+    def add_data(self, raw_data: Iterable) -> int:
         """Add raw data into the knowledge base.
 
+        The data is streamed: each document is split as soon as it is loaded, and
+        the chunks are sent to the vector store in batches, embedded and stored by
+        max_workers threads. At most twice as many batches as threads are pending,
+        so a large or lazy source is never held in memory at once.
+
+        A failed batch does not stop the other ones. With a checkpoint path, the
+        hashes of the stored batches are saved until all the batches are stored,
+        and the batches with the same content are skipped, so adding the same data
+        again resumes an interrupted ingestion.
+
         Args:
-            raw_data: The raw data to add.
+            raw_data: The raw data to add, a list or any iterable of documents.
+
+        Returns:
+            The number of chunks added to the vector store.
+
+        Raises:
+            ValueError: If the raw data is empty.
+            RuntimeError: If some batches could not be added to the vector store.
         """
         # Validate raw data
-        if not raw_data:
+        iterator = iter(raw_data or [])
+        first = next(iterator, None)
+        if first is None:
             raise ValueError("Raw data cannot be empty.")
 
-        # fetch and add references
+        done = self._load_checkpoint()
+        # The references already added, to not add them again for resumed batches.
+        seen = {self._reference_key(ref) for ref in self.references} if done else set()
+        pending: Dict[Future, Tuple[int, str, int]] = {}
+        failed: List[int] = []
+        added = 0
+        start = time.perf_counter()
+
+        def collect(futures: Iterable[Future]):
+            nonlocal added
+            for future in futures:
+                index, batch_hash, size = pending.pop(future)
+                try:
+                    future.result()
+                except Exception as e:
+                    logger.error(f"Failed to add batch {index}: {e}")
+                    failed.append(index)
+                    continue
+                added += size
+                self._save_checkpoint(batch_hash)
+            elapsed = time.perf_counter() - start
+            logger.info(
+                f"Added {added} chunks in {elapsed:.1f}s "
+                f"({added / elapsed if elapsed else 0:.1f} chunks/s)"
+            )
+
+        batches = self._split_batches(itertools.chain([first], iterator))
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            for index, (batch, references) in enumerate(batches):
+                batch_hash = self._hash_batch(batch)
+                for ref in references:
+                    if done:
+                        key = self._reference_key(ref)
+                        if key in seen:
+                            continue
+                        seen.add(key)
+                    self.references.append(ref)
+                if not batch or batch_hash in done:
+                    # The last documents have no chunks, or the batch was stored by
+                    # a previous ingestion.
+                    continue
+                # Bound the batches waiting for the vector store
+                if len(pending) >= 2 * self.max_workers:
+                    completed, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    collect(completed)
+                future = executor.submit(self.vector_store.add_documents, batch)
+                pending[future] = (index, batch_hash, len(batch))
+            collect(wait(pending).done)
+
+        if failed:
+            raise RuntimeError(
+                f"Failed to add the batches {sorted(failed)} of documents, "
+                "add the data again to retry them."
+            )
+        if self.checkpoint_path and os.path.exists(self.checkpoint_path):
+            os.remove(self.checkpoint_path)
+        return added
+
+    def _split_batches(self, raw_data: Iterable) -> Iterator[Tuple[List, List]]:
+        """Split the raw data document by document into batches of chunks.
+
+        Args:
+            raw_data: The raw data to split.
+
+        Yields:
+            The lists of at most batch_size chunks, with the references of the
+            documents starting in the batch.
+        """
+        batch = []
+        references = []
         for data in raw_data:
-            self.references.append(data.metadata)
+            # fetch references
+            references.append(data.metadata)
+            # Split raw data into chunks
+            batch.extend(self.data_transformer.split_documents([data]))
+            while len(batch) >= self.batch_size:
+                yield batch[: self.batch_size], references
+                batch = batch[self.batch_size :]
+                references = []
+        if batch or references:
+            yield batch, references
 
-        # Split raw data into chunks
-        split_data = self.data_transformer.split_documents(raw_data)
+    @staticmethod
+    def _hash_batch(batch: List) -> str:
+        """Hash the content of a batch of chunks, to recognize it in a checkpoint.
 
-        # Add split data to vector store
-        try:
-            self.vector_store.add_documents(split_data)
-        except Exception as e:
-            print(f"Failed to add documents: {e}")
-            raise
+        Args:
+            batch: The chunks.
+
+        Returns:
+            The hex digest of the batch.
+        """
+        content = json.dumps(
+            [[chunk.page_content, chunk.metadata] for chunk in batch],
+            sort_keys=True,
+            default=str,
+        )
+        return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def _reference_key(reference) -> str:
+        """Get a hashable key of the metadata of a document.
+
+        Args:
+            reference: The metadata.
+
+        Returns:
+            The metadata as a JSON string.
+        """
+        return json.dumps(reference, sort_keys=True, default=str)
+
+    def _load_checkpoint(self) -> Set[str]:
+        """Load the batches stored by an interrupted ingestion.
+
+        Returns:
+            The hashes of the stored batches, empty without a checkpoint.
+        """
+        if not self.checkpoint_path or not os.path.exists(self.checkpoint_path):
+            return set()
+        with open(self.checkpoint_path) as f:
+            return {line.strip() for line in f if line.strip()}
+
+    def _save_checkpoint(self, batch_hash: str):
+        """Append a stored batch to the checkpoint, one hash per line.
+
+        Args:
+            batch_hash: The hash of the stored batch.
+        """
+        if not self.checkpoint_path:
+            return
+        with open(self.checkpoint_path, "a") as f:
+            f.write(f"{batch_hash}\n")
 
     def retrieve_data(self, query, top_k=1) -> List[str]:
         """Retrieve documents from the knowledge base.
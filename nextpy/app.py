@@ -4,17 +4,21 @@ from __future__ import annotations
 import asyncio
 import concurrent.futures
 import contextlib
+import contextvars
 import copy
 import functools
 import os
+import time
 from typing import (
     Any,
     AsyncIterator,
+    Awaitable,
     Callable,
     Coroutine,
     Dict,
     List,
     Optional,
+    Sequence,
     Set,
     Type,
     Union,
@@ -24,7 +28,7 @@ from typing import (
 
 from fastapi import FastAPI, HTTPException, Request, UploadFile
 from fastapi.middleware import cors
-from fastapi.responses import StreamingResponse
+from fastapi.responses import PlainTextResponse, StreamingResponse
 from rich.progress import MofNCompleteColumn, Progress, TimeElapsedColumn
 from socketio import ASGIApp, AsyncNamespace, AsyncServer
 from starlette_admin.contrib.sqla.admin import Admin
@@ -32,8 +36,10 @@ from starlette_admin.contrib.sqla.view import ModelView
 
 from nextpy import constants
 from nextpy.backend.admin import AdminDash
-from nextpy.backend.event import Event, EventHandler, EventSpec
+from nextpy.backend.event import Event, EventHandler, EventSpec, get_hydrate_event
+from nextpy.backend.metrics import UNKNOWN_EVENT, event_metrics, render_timings
 from nextpy.backend.middleware import HydrateMiddleware, Middleware
+from nextpy.backend.monitor import EventLoopMonitor
 from nextpy.backend.route import (
     catchall_in_route,
     catchall_prefix,
@@ -49,14 +55,19 @@ from nextpy.backend.state import (
 )
 from nextpy.base import Base
 from nextpy.build import prerequisites
-from nextpy.build.compiler import compiler
+from nextpy.build.compiler import compiler, processes
 from nextpy.build.compiler import utils as compiler_utils
+from nextpy.build.compiler.cache import CompileCache, fingerprint_page
 from nextpy.build.config import get_config
 from nextpy.data.model import Model
 from nextpy.frontend.components import connection_modal
 from nextpy.frontend.components.base.app_wrap import AppWrap
 from nextpy.frontend.components.base.fragment import Fragment
-from nextpy.frontend.components.component import Component, ComponentStyle
+from nextpy.frontend.components.component import (
+    CollectedTree,
+    Component,
+    ComponentStyle,
+)
 from nextpy.frontend.components.core.client_side_routing import (
     Default404Page,
     wait_for_client_redirect,
@@ -132,6 +143,12 @@ class App(Base):
     # Background tasks that are currently running
     background_tasks: Set[asyncio.Task] = set()
 
+    # The thread pool synchronous event handlers run in by default (None to run them on the event loop).
+    sync_handler_executor: Optional[concurrent.futures.Executor] = None
+
+    # The monitor of the event loop lag.
+    loop_monitor: EventLoopMonitor = EventLoopMonitor()
+
     # The radix theme for the entire app
     theme: Optional[Component] = themes.theme(accent_color="blue")
 
@@ -175,10 +192,33 @@ class App(Base):
         self.add_cors()
         self.add_default_endpoints()
 
+        # Measure the stages of the event processing.
+        if config.metrics_enabled:
+            event_metrics.enabled = True
+            self.api.get(str(constants.Endpoint.METRICS))(metrics(self))
+
+        # Measure the event loop lag while the app is served.
+        self.loop_monitor = EventLoopMonitor(
+            warn_threshold=config.event_loop_lag_warning
+        )
+        self.api.add_event_handler("startup", self.loop_monitor.start)
+        self.api.add_event_handler("shutdown", self.loop_monitor.stop)
+
+        # Run slow synchronous event handlers without blocking the event loop.
+        if config.sync_handler_threads is not None:
+            self.sync_handler_executor = concurrent.futures.ThreadPoolExecutor(
+                max_workers=config.sync_handler_threads,
+                thread_name_prefix="nextpy_event_handler",
+            )
+            self.api.add_event_handler("shutdown", self.sync_handler_executor.shutdown)
+
         if self.state:
             # Set up the state manager.
             self._state_manager = StateManager.create(state=self.state)
 
+            # Send the changes of large list and dict vars as patches.
+            self.state._delta_patch_min_length = config.delta_patch_min_length
+
             # Set up the Socket.IO AsyncServer.
             self.sio = AsyncServer(
                 async_mode="asgi",
@@ -638,7 +678,6 @@ class App(Base):
 
         # Compile the pages in parallel.
         custom_components = set()
-        # TODO Anecdotally, processes=2 works 10% faster (cpu_count=12)
         all_imports = {}
         app_wrappers: Dict[tuple[int, str], Component] = {
             # Default app wrap component renders {children}
@@ -648,35 +687,43 @@ class App(Base):
             # If a theme component was provided, wrap the app with it
             app_wrappers[(20, "Theme")] = self.theme
 
-        with progress, concurrent.futures.ThreadPoolExecutor() as thread_pool:
-            fixed_pages = 7
-            task = progress.add_task("Compiling:", total=len(self.pages) + fixed_pages)
+        # The fingerprints of the pages and outputs of the last compile.
+        state_name = self.state.get_full_name() if self.state is not None else ""
+        compile_cache = CompileCache.load(
+            key=f"{constants.Nextpy.VERSION}:{state_name}"
+        )
 
-            def mark_complete(_=None):
-                progress.advance(task)
+        for component in self.pages.values():
+            # Merge the component style with the app style.
+            component.add_style(self.style)
 
-            for _route, component in self.pages.items():
-                # Merge the component style with the app style.
-                component.add_style(self.style)
+            component.apply_theme(self.theme)
 
-                component.apply_theme(self.theme)
+            # Add the app wrappers from this component.
+            app_wrappers.update(component.get_app_wrap_components())
 
-                # Add component.get_imports() to all_imports.
-                all_imports.update(component.get_imports())
+            # Add the custom components from the page to the set.
+            custom_components |= component.get_custom_components()
 
-                # Add the app wrappers from this component.
-                app_wrappers.update(component.get_app_wrap_components())
+        # Render the pages in processes, forked before the progress bar starts a thread.
+        page_workers = None
+        if config.compile_processes is not None and config.compile_processes > 1:
+            if processes.can_fork():
+                page_workers = processes.PageWorkers(
+                    self.pages, self.state, compile_cache, config.compile_processes
+                )
+            else:
+                console.warn(
+                    "Compiling the pages in processes needs to fork them, which is "
+                    "not supported on this platform: compiling them in threads."
+                )
 
-                # Add the custom components from the page to the set.
-                custom_components |= component.get_custom_components()
+        with progress, concurrent.futures.ThreadPoolExecutor() as thread_pool:
+            fixed_pages = 7
+            task = progress.add_task("Compiling:", total=len(self.pages) + fixed_pages)
 
-            # Perform auto-memoization of stateful components.
-            (
-                stateful_components_path,
-                stateful_components_code,
-                page_components,
-            ) = compiler.compile_stateful_components(self.pages.values())
-            compile_results.append((stateful_components_path, stateful_components_code))
+            def mark_complete(_=None):
+                progress.advance(task)
 
             result_futures = []
 
@@ -694,13 +741,55 @@ class App(Base):
                 f.add_done_callback(mark_complete)
                 result_futures.append(f)
 
-            # Compile all page components.
-            for route, component in zip(self.pages, page_components):
-                submit_work(
-                    compiler.compile_page,
-                    route,
-                    component,
-                    self.state,
+            stateful_components_path = compiler_utils.get_stateful_components_path()
+            if page_workers is not None:
+                try:
+                    # Add the imports of the pages to all_imports.
+                    for page_imports in page_workers.memoize().values():
+                        all_imports.update(page_imports)
+
+                    # Compile the pages that changed in the workers.
+                    (
+                        stateful_components_code,
+                        page_results,
+                        shared_components,
+                    ) = page_workers.compile(stateful_components_path)
+                finally:
+                    page_workers.close()
+                compile_results.extend(page_results)
+                progress.advance(task, len(self.pages))
+            else:
+                for route, component in self.pages.items():
+                    # Add the imports of the page to all_imports.
+                    tree = CollectedTree(component)
+                    all_imports.update(tree.imports)
+
+                    # Check whether the page changed since the last compile.
+                    compile_cache.check_page(route, fingerprint_page(component, tree))
+
+                # Perform auto-memoization of stateful components.
+                (
+                    stateful_components_path,
+                    stateful_components_code,
+                    page_components,
+                    shared_components,
+                ) = compiler.compile_stateful_components(
+                    self.pages, cache=compile_cache
+                )
+
+                # Compile the page components that changed.
+                progress.advance(task, len(self.pages) - len(page_components))
+                for route, component in page_components.items():
+                    submit_work(
+                        compiler.compile_page,
+                        route,
+                        component,
+                        self.state,
+                    )
+
+            if stateful_components_code is not None:
+                compile_results.append(
+                    (stateful_components_path, stateful_components_code)
                 )
 
             # Compile the app wrapper.
@@ -740,8 +829,19 @@ class App(Base):
             for future in concurrent.futures.as_completed(result_futures):
                 compile_results.append(future.result())
 
-            # Empty the .web pages directory.
-            compiler.purge_web_pages_dir()
+            # Keep the unchanged pages and remove the stale files of the .web pages
+            # directory. The changed files are replaced rather than removed.
+            kept_files = [
+                compiler_utils.get_page_path(route)
+                for route in compile_cache.unchanged
+                if compile_cache.keep_file(compiler_utils.get_page_path(route))
+            ]
+            changed_results = []
+            for output_path, code in compile_results:
+                kept_files.append(output_path)
+                if compile_cache.update_file(output_path, code):
+                    changed_results.append((output_path, code))
+            compiler.purge_web_pages_dir(keep_files=kept_files)
 
             # Avoid flickering when installing frontend packages
             progress.stop()
@@ -749,21 +849,27 @@ class App(Base):
             # Install frontend packages.
             self.get_frontend_packages(all_imports)
 
-            # Write the pages at the end to trigger the NextJS hot reload only once.
+            # Write the changed files at the end to trigger the NextJS hot reload only once.
+            # The files with the same code on disk are not written, e.g. without a cache.
             write_page_futures = []
-            for output_path, code in compile_results:
+            for output_path, code in changed_results:
                 write_page_futures.append(
                     thread_pool.submit(compiler_utils.write_page, output_path, code)
                 )
             for future in concurrent.futures.as_completed(write_page_futures):
                 future.result()
 
+        compile_cache.save(shared_components)
+
     @contextlib.asynccontextmanager
-    async def modify_state(self, token: str) -> AsyncIterator[BaseState]:
+    async def modify_state(
+        self, token: str, path: Sequence[str] | None = None
+    ) -> AsyncIterator[BaseState]:
         """Modify the state out of band.
 
         Args:
             token: The token to modify the state for.
+            path: The path of the substate to modify (all substates if None).
 
         Yields:
             The state to modify.
@@ -775,17 +881,42 @@ class App(Base):
             raise RuntimeError("App has not been initialized yet.")
 
         # Get exclusive access to the state.
-        async with self.state_manager.modify_state(token) as state:
+        async with self.state_manager.modify_state(token, path) as state:
             # No other event handler can modify the state while in this context.
             yield state
+            await state._resolve_computed_vars(self.sync_handler_executor)
             delta = state.get_delta()
             if delta:
                 # When the state is modified reset dirty status and emit the delta to the frontend.
                 state._clean()
-                await self.event_namespace.emit_update(
-                    update=StateUpdate(delta=delta),
-                    sid=state.router.session.session_id,
-                )
+                sid = state.router.session.session_id
+                # Background tasks merging their updates send them through their coalescer.
+                coalescer = _update_coalescer.get()
+                if coalescer is not None and coalescer.sid == sid:
+                    await coalescer.push(StateUpdate(delta=delta))
+                else:
+                    await self.event_namespace.emit_update(
+                        update=StateUpdate(delta=delta),
+                        sid=sid,
+                    )
+
+    def _get_event_handler(self, event: Event) -> EventHandler | None:
+        """Get the handler registered for an event, without loading any state.
+
+        Args:
+            event: The event to get the handler for.
+
+        Returns:
+            The event handler, or None if the event name does not match one.
+        """
+        if self.state is None:
+            return None
+        path = event.name.split(".")
+        try:
+            substate = self.state.get_class_substate(tuple(path[:-1]))
+        except ValueError:
+            return None
+        return substate.event_handlers.get(path[-1])
 
     def _process_background(
         self, state: BaseState, event: Event
@@ -812,18 +943,29 @@ class App(Base):
             if self.event_namespace is None:
                 raise RuntimeError("App has not been initialized yet.")
 
-            # Process the event.
-            async for update in state._process_event(
-                handler=handler, state=substate, payload=event.payload
-            ):
-                # Postprocess the event.
-                update = await self.postprocess(state, event, update)
+            sid = state.router.session.session_id
+            emit = functools.partial(self.event_namespace.emit_update, sid=sid)
+            coalescer = None
+            if handler.update_window is not None:
+                # Updates sent from `async with self` blocks go through the coalescer too.
+                coalescer = StateUpdateCoalescer(emit, sid, handler.update_window)
+                _update_coalescer.set(coalescer)
+                emit = coalescer.push
+
+            try:
+                # Process the event.
+                async for update in state._process_event(
+                    handler=handler, state=substate, payload=event.payload
+                ):
+                    # Postprocess the event.
+                    update = await self.postprocess(state, event, update)
 
-                # Send the update to the client.
-                await self.event_namespace.emit_update(
-                    update=update,
-                    sid=state.router.session.session_id,
-                )
+                    # Send the update to the client.
+                    await emit(update=update)
+            finally:
+                # Send the last merged update.
+                if coalescer is not None:
+                    await coalescer.flush()
 
         task = asyncio.create_task(_coro())
         self.background_tasks.add(task)
@@ -858,8 +1000,16 @@ async def process(
             constants.RouteVar.CLIENT_IP: client_ip,
         }
     )
+    # Only the substate targeted by the event is needed, except for hydration
+    # which sends the full state to the client.
+    path = (
+        None
+        if app.state is None or event.name == get_hydrate_event(app.state)
+        else event.name.split(".")[:-1]
+    )
+
     # Get the state for the session exclusively.
-    async with app.state_manager.modify_state(event.token) as state:
+    async with app.state_manager.modify_state(event.token, path) as state:
         # re-assign only when the value is different
         if state.router_data != router_data:
             # assignment will recurse into substates and force recalculation of
@@ -868,7 +1018,8 @@ async def process(
             state.router = RouterData(router_data)
 
         # Preprocess the event.
-        update = await app.preprocess(state, event)
+        with event_metrics.span("preprocess"):
+            update = await app.preprocess(state, event)
 
         # If there was an update, yield it.
         if update is not None:
@@ -882,9 +1033,10 @@ async def process(
                 return
 
             # Process the event synchronously.
-            async for update in state._process(event):
+            async for update in state._process(event, app.sync_handler_executor):
                 # Postprocess the event.
-                update = await app.postprocess(state, event, update)
+                with event_metrics.span("postprocess"):
+                    update = await app.postprocess(state, event, update)
 
                 # Yield the update.
                 yield update
@@ -899,6 +1051,47 @@ async def ping() -> str:
     return "pong"
 
 
+def metrics(app: App):
+    """Serve the metrics of the event processing.
+
+    Args:
+        app: The app to serve the metrics for.
+
+    Returns:
+        The metrics function.
+    """
+
+    async def get_metrics() -> PlainTextResponse:
+        """Get the metrics in the Prometheus text format.
+
+        Returns:
+            The metrics of the event processing, the event loop and the computed vars.
+        """
+        lines = event_metrics.render()
+        lines.extend(
+            render_timings(
+                "nextpy_event_loop_lag_seconds",
+                "Delay of the event loop in running ready tasks.",
+                "loop",
+                {"main": app.loop_monitor.stats},
+            )
+        )
+        if app.state is not None:
+            lines.extend(
+                render_timings(
+                    "nextpy_computed_var_seconds",
+                    "Time spent evaluating the computed vars.",
+                    "var",
+                    app.state.get_computed_var_timings(),
+                )
+            )
+        return PlainTextResponse(
+            "\n".join(lines) + "\n", media_type="text/plain; version=0.0.4"
+        )
+
+    return get_metrics
+
+
 def upload(app: App):
     """Upload a file.
 
@@ -982,8 +1175,8 @@ def upload(app: App):
                 Each state update as JSON followed by a new line.
             """
             # Process the event.
-            async with app.state_manager.modify_state(token) as state:
-                async for update in state._process(event):
+            async with app.state_manager.modify_state(token, path) as state:
+                async for update in state._process(event, app.sync_handler_executor):
                     # Postprocess the event.
                     update = await app.postprocess(state, event, update)
                     yield update.json() + "\n"
@@ -997,6 +1190,78 @@ def upload(app: App):
     return upload_file
 
 
+class StateUpdateCoalescer:
+    """Merge the state updates sent to a client within a time window.
+
+    The first update is sent right away, the following updates are merged
+    and sent at most once per window. Updates queueing events are sent right
+    away, after the pending updates they are merged with, so the client runs
+    the events on the same state as without merging.
+    """
+
+    def __init__(
+        self,
+        emit: Callable[..., Awaitable[None]],
+        sid: str,
+        window: float,
+    ):
+        """Initialize the coalescer.
+
+        Args:
+            emit: The function sending an update to the client.
+            sid: The Socket.IO session id of the client.
+            window: The minimum time between two updates sent to the client (seconds).
+        """
+        self.emit = emit
+        self.sid = sid
+        self.window = window
+        self._pending: StateUpdate | None = None
+        self._last_emit = float("-inf")
+        self._timer: asyncio.Task | None = None
+        # Keep the updates in order when a timer and a push send at the same time.
+        self._lock = asyncio.Lock()
+
+    async def push(self, update: StateUpdate) -> None:
+        """Queue an update to send to the client.
+
+        Args:
+            update: The update to send.
+        """
+        self._pending = update if self._pending is None else self._pending.merge(update)
+        delay = self._last_emit + self.window - time.monotonic()
+        if update.events or delay <= 0:
+            await self.flush()
+        elif self._timer is None:
+            self._timer = asyncio.create_task(self._flush_later(delay))
+
+    async def flush(self) -> None:
+        """Send the pending update to the client, if any."""
+        if self._timer is not None and self._timer is not asyncio.current_task():
+            self._timer.cancel()
+        self._timer = None
+        async with self._lock:
+            update, self._pending = self._pending, None
+            if update is None:
+                return
+            self._last_emit = time.monotonic()
+            await self.emit(update=update)
+
+    async def _flush_later(self, delay: float) -> None:
+        """Send the pending update to the client at the end of the window.
+
+        Args:
+            delay: The time to wait before sending (seconds).
+        """
+        await asyncio.sleep(delay)
+        await self.flush()
+
+
+# The coalescer of the background task running in the current context.
+_update_coalescer: contextvars.ContextVar[
+    StateUpdateCoalescer | None
+] = contextvars.ContextVar("_update_coalescer", default=None)
+
+
 class EventNamespace(AsyncNamespace):
     """The event namespace."""
 
@@ -1037,10 +1302,18 @@ class EventNamespace(AsyncNamespace):
             update: The state update to send.
             sid: The Socket.IO session id.
         """
+        with event_metrics.span("serialize"):
+            data = update.json()
+        if event_metrics.enabled:
+            event_metrics.increment("state_updates")
+            # Avoid encoding the update again when it is ASCII, as in most cases.
+            size = len(data) if data.isascii() else len(data.encode())
+            event_metrics.increment("state_update_bytes", size)
         # Creating a task prevents the update from being blocked behind other coroutines.
-        await asyncio.create_task(
-            self.emit(str(constants.SocketEvent.EVENT), update.json(), to=sid)
-        )
+        with event_metrics.span("emit"):
+            await asyncio.create_task(
+                self.emit(str(constants.SocketEvent.EVENT), data, to=sid)
+            )
 
     async def on_event(self, sid, data):
         """Event for receiving front-end websocket events.
@@ -1066,10 +1339,28 @@ class EventNamespace(AsyncNamespace):
         # Get the client IP
         client_ip = environ["REMOTE_ADDR"]
 
-        # Process the events.
-        async for update in process(self.app, event, sid, headers, client_ip):
-            # Emit the update from processing the event.
-            await self.emit_update(update=update, sid=sid)
+        # Merge the updates of handlers marked with `coalesce_updates`.
+        emit = functools.partial(self.emit_update, sid=sid)
+        handler = self.app._get_event_handler(event)
+        coalescer = None
+        if handler is not None and handler.update_window is not None:
+            coalescer = StateUpdateCoalescer(emit, sid, handler.update_window)
+            emit = coalescer.push
+
+        # Process the events, measured by name only for the registered handlers and
+        # the hydrate event, as any name can be sent by the client.
+        metrics_name = event.name
+        if handler is None and event.name != get_hydrate_event(self.app.state):
+            metrics_name = UNKNOWN_EVENT
+        with event_metrics.event(metrics_name):
+            try:
+                async for update in process(self.app, event, sid, headers, client_ip):
+                    # Emit the update from processing the event.
+                    await emit(update=update)
+            finally:
+                # Send the last merged update.
+                if coalescer is not None:
+                    await coalescer.flush()
 
     async def on_ping(self, sid):
         """Event for testing the API endpoint.
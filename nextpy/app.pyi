@@ -53,6 +53,7 @@ from typing import (
     Dict,
     List,
     Optional,
+    Sequence,
     Set,
     Type,
     Union,
@@ -121,7 +122,9 @@ class App(Base):
     def get_frontend_packages(self, imports: Dict[str, str]): ...
     def compile(self) -> None: ...
     def compile_(self) -> None: ...
-    def modify_state(self, token: str) -> AsyncContextManager[State]: ...
+    def modify_state(
+        self, token: str, path: Sequence[str] | None = ...
+    ) -> AsyncContextManager[State]: ...
     def _process_background(
         self, state: State, event: Event
     ) -> asyncio.Task | None: ...
@@ -0,0 +1,191 @@
+"""Codecs used by the state managers to persist states outside of the process."""
+
+from __future__ import annotations
+
+import pickle
+import struct
+from abc import ABC, abstractmethod
+from typing import Any, List, Optional, Set, Type
+
+import cloudpickle
+import pydantic
+
+from nextpy.base import Base
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None  # type: ignore
+
+
+class StateCodec(Base, ABC):
+    """A codec converting states to bytes and back."""
+
+    @abstractmethod
+    def dumps(self, obj: Any) -> bytes:
+        """Encode an object.
+
+        Args:
+            obj: The object to encode.
+
+        Returns:
+            The encoded object.
+        """
+        pass
+
+    @abstractmethod
+    def loads(self, data: bytes) -> Any:
+        """Decode an object.
+
+        Args:
+            data: The encoded object.
+
+        Returns:
+            The decoded object.
+        """
+        pass
+
+
+class CloudpickleCodec(StateCodec):
+    """A codec pickling everything with cloudpickle, including functions and classes by value."""
+
+    def dumps(self, obj: Any) -> bytes:
+        """Encode an object.
+
+        Args:
+            obj: The object to encode.
+
+        Returns:
+            The encoded object.
+        """
+        return cloudpickle.dumps(obj)
+
+    def loads(self, data: bytes) -> Any:
+        """Decode an object.
+
+        Args:
+            data: The encoded object.
+
+        Returns:
+            The decoded object.
+        """
+        return pickle.loads(data)
+
+
+class PickleCodec(StateCodec):
+    """A codec using pickle protocol 5 with out-of-band buffers and optional zstd compression.
+
+    Large buffers such as numpy arrays and the blocks of pandas dataframes are
+    written next to the pickle instead of being copied into it. Objects that
+    the standard pickler cannot handle, like lambdas or locally defined
+    classes, are pickled with cloudpickle instead.
+
+    The encoded data is a header (magic, flags), followed by the number of
+    buffers, the length of the pickle and of each buffer, the pickle and the
+    buffers. Data that does not start with the magic is a plain pickle, so
+    states stored by the cloudpickle codec can still be read.
+    """
+
+    # The size above which the encoded data is compressed with zstd, if installed (bytes).
+    # Compression is disabled by default, as it trades CPU time for redis memory and bandwidth.
+    compression_threshold: Optional[int] = None
+
+    # The zstd compression level.
+    compression_level: int = 3
+
+    # The header of the encoded data.
+    _magic: bytes = b"NXS"
+
+    # The flag set in the header when the data is compressed.
+    _flag_zstd: int = 1
+
+    # The types of the objects that could not be pickled without cloudpickle.
+    _cloudpickle_types: Set[Type] = pydantic.PrivateAttr(set())
+
+    class Config:
+        """The Pydantic config."""
+
+        fields = {
+            "_cloudpickle_types": {"exclude": True},
+        }
+
+    def dumps(self, obj: Any) -> bytes:
+        """Encode an object.
+
+        Args:
+            obj: The object to encode.
+
+        Returns:
+            The encoded object.
+        """
+        buffers: List[pickle.PickleBuffer] = []
+        if type(obj) not in self._cloudpickle_types:
+            try:
+                data = pickle.dumps(obj, protocol=5, buffer_callback=buffers.append)
+            except (pickle.PicklingError, TypeError, AttributeError):
+                # Do not try the standard pickler again for objects of this type.
+                self._cloudpickle_types.add(type(obj))
+                buffers.clear()
+        if type(obj) in self._cloudpickle_types:
+            data = cloudpickle.dumps(obj, protocol=5, buffer_callback=buffers.append)
+
+        raw_buffers = [buffer.raw() for buffer in buffers]
+        lengths = [len(data), *(raw.nbytes for raw in raw_buffers)]
+        frame = [
+            struct.pack(f"<I{len(lengths)}Q", len(raw_buffers), *lengths),
+            data,
+            *raw_buffers,
+        ]
+
+        if (
+            zstandard is not None
+            and self.compression_threshold is not None
+            and sum(lengths) > self.compression_threshold
+        ):
+            compressed = zstandard.ZstdCompressor(
+                level=self.compression_level
+            ).compress(b"".join(frame))
+            # Incompressible data, like already compressed media, is kept as is.
+            if len(compressed) < sum(lengths):
+                return b"".join([self._magic, bytes([self._flag_zstd]), compressed])
+        return b"".join([self._magic, bytes([0]), *frame])
+
+    def loads(self, data: bytes) -> Any:
+        """Decode an object.
+
+        Args:
+            data: The encoded object.
+
+        Returns:
+            The decoded object.
+
+        Raises:
+            ValueError: If the data is compressed and zstandard is not installed.
+        """
+        if not data.startswith(self._magic):
+            return pickle.loads(data)
+
+        header_size = len(self._magic) + 1
+        flags = data[header_size - 1]
+        if flags & self._flag_zstd:
+            if zstandard is None:
+                raise ValueError(
+                    "The state is compressed with zstd, install zstandard to load it."
+                )
+            body = bytearray(
+                zstandard.ZstdDecompressor().decompress(data[header_size:])
+            )
+        else:
+            body = bytearray(memoryview(data)[header_size:])
+
+        # Buffers are views of a writable copy, so arrays loaded from them are writable.
+        (n_buffers,) = struct.unpack_from("<I", body)
+        offset = struct.calcsize("<I")
+        lengths = struct.unpack_from(f"<{n_buffers + 1}Q", body, offset)
+        offset += struct.calcsize(f"<{n_buffers + 1}Q")
+        view = memoryview(body)
+        chunks = []
+        for length in lengths:
+            chunks.append(view[offset : offset + length])
+            offset += length
+        return pickle.loads(chunks[0], buffers=chunks[1:])
@@ -63,6 +63,68 @@ def background(fn):
     return fn
 
 
+COALESCE_UPDATES_MARKER = "_nextpy_coalesce_updates"
+
+
+def coalesce_updates(fn=None, *, window: float = 0.03):
+    """Decorator to merge the state updates of an event handler sent within a time window.
+
+    Updates yielded by a generator handler, or sent from `async with self`
+    blocks in a background task, are merged and sent to the client at most
+    once per window. Updates queueing events, and the last update of the
+    handler, are always sent right away.
+
+    Args:
+        fn: The function to decorate.
+        window: The minimum time between two updates sent to the client (seconds).
+
+    Returns:
+        The same function, but with a marker set, or a decorator if no function is given.
+
+    Raises:
+        ValueError: If the window is negative.
+    """
+    if window < 0:
+        raise ValueError("The update window cannot be negative.")
+
+    def decorator(fn):
+        setattr(fn, COALESCE_UPDATES_MARKER, window)
+        return fn
+
+    return decorator if fn is None else decorator(fn)
+
+
+RUN_IN_THREAD_MARKER = "_nextpy_run_in_thread"
+
+
+def run_in_thread(fn=None, *, enabled: bool = True):
+    """Decorator to choose whether a synchronous event handler runs in a thread pool.
+
+    Handlers running in a thread pool do not block the event loop, so the events
+    of other clients are processed in the meantime. The state of the client is
+    still locked until the handler is done. This overrides the app-wide default
+    set by `sync_handler_threads` in the config.
+
+    Args:
+        fn: The function to decorate.
+        enabled: Whether to run the handler in a thread pool, or on the event loop.
+
+    Returns:
+        The same function, but with a marker set, or a decorator if no function is given.
+
+    Raises:
+        TypeError: If the handler is not synchronous.
+    """
+
+    def decorator(fn):
+        if inspect.iscoroutinefunction(fn) or inspect.isasyncgenfunction(fn):
+            raise TypeError("Only synchronous event handlers can run in a thread pool.")
+        setattr(fn, RUN_IN_THREAD_MARKER, enabled)
+        return fn
+
+    return decorator if fn is None else decorator(fn)
+
+
 def _no_chain_background_task(
     state_cls: Type["BaseState"], name: str, fn: Callable
 ) -> Callable:
@@ -151,6 +213,24 @@ class EventHandler(EventActionsMixin):
         """
         return getattr(self.fn, BACKGROUND_TASK_MARKER, False)
 
+    @property
+    def update_window(self) -> float | None:
+        """The time window in which the updates of the handler are merged.
+
+        Returns:
+            The window in seconds if the handler is marked with `coalesce_updates`, else None.
+        """
+        return getattr(self.fn, COALESCE_UPDATES_MARKER, None)
+
+    @property
+    def run_in_thread(self) -> bool | None:
+        """Whether the synchronous event handler runs in a thread pool.
+
+        Returns:
+            True or False if set with `run_in_thread`, else None to use the app default.
+        """
+        return getattr(self.fn, RUN_IN_THREAD_MARKER, None)
+
     def __call__(self, *args: Var) -> EventSpec:
         """Pass arguments to the handler to get an event spec.
 
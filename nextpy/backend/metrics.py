@@ -0,0 +1,335 @@
+"""Measure where the time goes while processing events."""
+
+from __future__ import annotations
+
+import bisect
+import contextlib
+import contextvars
+import time
+from abc import ABC
+from typing import ContextManager, Dict, Iterator, List, Optional, Sequence
+
+from nextpy.backend.monitor import TimingStats
+from nextpy.base import Base
+
+# The upper bounds of the histogram buckets (seconds).
+DEFAULT_BUCKETS = (
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+
+# The counters, with their description.
+COUNTERS = {
+    "state_updates": "State updates sent to the clients.",
+    "state_update_bytes": "Bytes of the state updates sent to the clients.",
+    "handler_errors": "Event handlers that raised an exception.",
+}
+
+# The name under which the events not matching a registered handler are measured.
+UNKNOWN_EVENT = "unknown"
+
+# The name of the event being processed, passed to the hooks.
+_event_name: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar(
+    "_event_name", default=None
+)
+
+# Returned by spans when the metrics are disabled.
+_NULL_SPAN = contextlib.nullcontext()
+
+
+class MetricsHook(Base, ABC):
+    """A hook receiving the duration of each stage of the event processing.
+
+    Stages are "event" (the whole event), "state_lock", "state_load", "preprocess",
+    "handler", "delta", "postprocess", "serialize", "emit" and "state_save".
+    """
+
+    def on_span(self, stage: str, duration: float, event_name: str | None):
+        """Receive the duration of a stage.
+
+        Args:
+            stage: The stage.
+            duration: The duration in seconds.
+            event_name: The name of the event being processed, None outside of events.
+        """
+        pass
+
+
+class Histogram:
+    """A histogram of durations, in the Prometheus format."""
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        """Initialize the histogram.
+
+        Args:
+            buckets: The upper bounds of the buckets, sorted.
+        """
+        self.buckets = tuple(buckets)
+        # The number of observations per bucket, the last one being unbounded.
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        """Add an observation.
+
+        Args:
+            value: The observed value.
+        """
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def render(self, name: str, labels: Dict[str, str]) -> Iterator[str]:
+        """Render the samples of the histogram.
+
+        Args:
+            name: The name of the metric.
+            labels: The labels of the histogram.
+
+        Yields:
+            The lines of the samples.
+        """
+        cumulative = 0
+        for bound, count in zip((*self.buckets, float("inf")), self.counts):
+            cumulative += count
+            le = "+Inf" if bound == float("inf") else repr(bound)
+            yield f"{name}_bucket{format_labels({**labels, 'le': le})} {cumulative}"
+        yield f"{name}_sum{format_labels(labels)} {self.sum!r}"
+        yield f"{name}_count{format_labels(labels)} {self.count}"
+
+
+class _Span:
+    """Measure the duration of a stage."""
+
+    __slots__ = ("metrics", "stage", "event_name", "start", "reset_token")
+
+    def __init__(
+        self, metrics: EventMetrics, stage: str, event_name: str | None = None
+    ):
+        """Initialize the span.
+
+        Args:
+            metrics: The metrics recording the duration.
+            stage: The stage.
+            event_name: For the "event" stage, the name of the event.
+        """
+        self.metrics = metrics
+        self.stage = stage
+        self.event_name = event_name
+
+    def __enter__(self):
+        """Start measuring."""
+        if self.event_name is not None:
+            self.reset_token = _event_name.set(self.event_name)
+        self.start = time.perf_counter()
+
+    def __exit__(self, *exc_info):
+        """Record the duration.
+
+        Args:
+            *exc_info: The exception raised in the span, if any.
+        """
+        duration = time.perf_counter() - self.start
+        self.metrics.record(self.stage, duration)
+        if self.event_name is not None:
+            self.metrics.record_event(self.event_name, duration)
+            _event_name.reset(self.reset_token)
+
+
+class EventMetrics:
+    """Histograms of the duration of each stage of the event processing, and counters.
+
+    Nothing is measured until enabled, so the disabled spans only cost a flag check.
+    """
+
+    def __init__(self):
+        """Initialize the metrics."""
+        # Whether to measure the stages.
+        self.enabled = False
+        # The hooks receiving the measured durations.
+        self.hooks: List[MetricsHook] = []
+        self.clear()
+
+    def clear(self):
+        """Reset the collected metrics."""
+        # The duration of the stages, by stage.
+        self.stages: Dict[str, Histogram] = {}
+        # The duration of the whole events, by event name.
+        self.events: Dict[str, Histogram] = {}
+        # The counters, by name.
+        self.counters: Dict[str, float] = dict.fromkeys(COUNTERS, 0)
+
+    def add_hook(self, hook: MetricsHook):
+        """Register a hook, which enables the metrics.
+
+        Args:
+            hook: The hook.
+        """
+        self.hooks.append(hook)
+        self.enabled = True
+
+    def span(self, stage: str) -> ContextManager:
+        """Measure the duration of a stage of the event processing.
+
+        Args:
+            stage: The stage.
+
+        Returns:
+            A context manager measuring the code it wraps.
+        """
+        if not self.enabled:
+            return _NULL_SPAN
+        return _Span(self, stage)
+
+    def event(self, event_name: str) -> ContextManager:
+        """Measure the whole processing of an event.
+
+        Args:
+            event_name: The name of the event, passed to the hooks for the nested stages.
+
+        Returns:
+            A context manager measuring the code it wraps.
+        """
+        if not self.enabled:
+            return _NULL_SPAN
+        return _Span(self, "event", event_name)
+
+    def record_event(self, event_name: str, duration: float):
+        """Record the duration of a whole event.
+
+        Args:
+            event_name: The name of the event.
+            duration: The duration in seconds.
+        """
+        histogram = self.events.get(event_name)
+        if histogram is None:
+            histogram = self.events[event_name] = Histogram()
+        histogram.observe(duration)
+
+    def record(self, stage: str, duration: float):
+        """Record the duration of a stage.
+
+        Args:
+            stage: The stage.
+            duration: The duration in seconds.
+        """
+        histogram = self.stages.get(stage)
+        if histogram is None:
+            histogram = self.stages[stage] = Histogram()
+        histogram.observe(duration)
+        if self.hooks:
+            event_name = _event_name.get()
+            for hook in self.hooks:
+                hook.on_span(stage, duration, event_name)
+
+    def increment(self, counter: str, value: float = 1):
+        """Increment a counter, if the metrics are enabled.
+
+        Args:
+            counter: The name of the counter, one of COUNTERS.
+            value: The value to add.
+        """
+        if self.enabled:
+            self.counters[counter] += value
+
+    def render(self) -> List[str]:
+        """Render the metrics in the Prometheus text format.
+
+        Returns:
+            The lines of the metrics.
+        """
+        lines = [
+            "# HELP nextpy_event_stage_seconds Time spent in each stage of the event processing.",
+            "# TYPE nextpy_event_stage_seconds histogram",
+        ]
+        for stage, histogram in sorted(self.stages.items()):
+            lines.extend(
+                histogram.render("nextpy_event_stage_seconds", {"stage": stage})
+            )
+        lines.extend(
+            [
+                "# HELP nextpy_event_seconds Time spent processing the events, by event.",
+                "# TYPE nextpy_event_seconds histogram",
+            ]
+        )
+        for event_name, histogram in sorted(self.events.items()):
+            lines.extend(
+                histogram.render("nextpy_event_seconds", {"event": event_name})
+            )
+        for counter, description in COUNTERS.items():
+            name = f"nextpy_{counter}_total"
+            lines.extend(
+                [
+                    f"# HELP {name} {description}",
+                    f"# TYPE {name} counter",
+                    f"{name} {self.counters[counter]!r}",
+                ]
+            )
+        return lines
+
+
+def format_labels(labels: Dict[str, str]) -> str:
+    """Format the labels of a sample.
+
+    Args:
+        labels: The labels.
+
+    Returns:
+        The labels in braces, or an empty string without labels.
+    """
+    if not labels:
+        return ""
+    pairs = ",".join(
+        '{}="{}"'.format(
+            name,
+            value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"),
+        )
+        for name, value in labels.items()
+    )
+    return f"{{{pairs}}}"
+
+
+def render_timings(
+    name: str, description: str, label: str, timings: Dict[str, TimingStats]
+) -> List[str]:
+    """Render timing statistics as a Prometheus summary, with the longest duration.
+
+    Args:
+        name: The name of the metric.
+        description: The description of the metric.
+        label: The label of the keys of the timings.
+        timings: The timings, by label value.
+
+    Returns:
+        The lines of the metrics.
+    """
+    lines = [f"# HELP {name} {description}", f"# TYPE {name} summary"]
+    for key, stats in sorted(timings.items()):
+        labels = format_labels({label: key})
+        lines.append(f"{name}_sum{labels} {stats.total_time!r}")
+        lines.append(f"{name}_count{labels} {stats.count}")
+    lines.extend(
+        [
+            f"# HELP {name}_max {description} (longest)",
+            f"# TYPE {name}_max gauge",
+        ]
+    )
+    for key, stats in sorted(timings.items()):
+        lines.append(f"{name}_max{format_labels({label: key})} {stats.max_time!r}")
+    return lines
+
+
+# The metrics of the backend, shared by the app and the state managers.
+event_metrics = EventMetrics()
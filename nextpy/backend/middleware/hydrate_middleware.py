@@ -48,6 +48,7 @@ class HydrateMiddleware(Middleware):
                     setattr(var_state, var_name, value)
 
         # Get the initial state.
+        await state._resolve_computed_vars(app.sync_handler_executor)
         delta = format.format_state(state.dict())
         # since a full dict was captured, clean any dirtiness
         state._clean()
@@ -0,0 +1,118 @@
+"""Monitor the responsiveness of the event loop serving the app."""
+
+from __future__ import annotations
+
+import asyncio
+import dataclasses
+import threading
+from typing import Optional
+
+import pydantic
+
+from nextpy.base import Base
+from nextpy.utils import console
+
+# Serializes the measurements of several threads, e.g. offloaded computed vars. It
+# is shared by all the statistics, which remain copyable and picklable.
+_record_lock = threading.Lock()
+
+
+@dataclasses.dataclass
+class TimingStats:
+    """Statistics of measured durations.
+
+    A plain dataclass rather than a model, as recording must stay cheap in hot paths.
+    """
+
+    # The number of measurements.
+    count: int = 0
+
+    # The sum of the measured durations (seconds).
+    total_time: float = 0.0
+
+    # The longest measured duration (seconds).
+    max_time: float = 0.0
+
+    # The last measured duration (seconds).
+    last_time: float = 0.0
+
+    @property
+    def mean_time(self) -> float:
+        """The mean measured duration.
+
+        Returns:
+            The mean duration in seconds.
+        """
+        return self.total_time / self.count if self.count else 0.0
+
+    def record(self, duration: float):
+        """Record a measured duration.
+
+        Args:
+            duration: The duration in seconds.
+        """
+        with _record_lock:
+            self.count += 1
+            self.total_time += duration
+            self.max_time = max(self.max_time, duration)
+            self.last_time = duration
+
+
+class EventLoopMonitor(Base):
+    """Measure how late the event loop wakes up a task sleeping at a fixed interval.
+
+    The lag is the time the event loop spent running other code, such as an
+    event handler blocking the loop, before it could wake up the monitor. While
+    the lag stays low, the events of all clients are processed promptly.
+    """
+
+    # The time between two measurements (seconds).
+    interval: float = 0.5
+
+    # The lag above which a warning is logged (seconds), None to never warn.
+    warn_threshold: Optional[float] = None
+
+    # The statistics of the measured lags.
+    stats: TimingStats = pydantic.Field(default_factory=TimingStats)
+
+    # The task measuring the lag.
+    _task: Optional[asyncio.Task] = pydantic.PrivateAttr(None)
+
+    class Config:
+        """The Pydantic config."""
+
+        fields = {
+            "_task": {"exclude": True},
+        }
+
+    def start(self):
+        """Start measuring the lag of the running event loop."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    def stop(self):
+        """Stop measuring the lag."""
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    def record(self, lag: float):
+        """Record a measured lag.
+
+        Args:
+            lag: The lag in seconds.
+        """
+        self.stats.record(lag)
+        if self.warn_threshold is not None and lag > self.warn_threshold:
+            console.warn(
+                f"The event loop was blocked for {lag:.3f}s, consider running "
+                "slow synchronous event handlers in threads."
+            )
+
+    async def _run(self):
+        """Measure the lag at each interval, until cancelled."""
+        loop = asyncio.get_running_loop()
+        while True:
+            start = loop.time()
+            await asyncio.sleep(self.interval)
+            self.record(max(0.0, loop.time() - start - self.interval))
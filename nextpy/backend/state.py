@@ -3,23 +3,30 @@ from __future__ import annotations
 
 import asyncio
 import contextlib
+import contextvars
 import copy
 import functools
+import hashlib
 import inspect
 import json
 import os
+import time
 import traceback
 import urllib.parse
 import uuid
 from abc import ABC, abstractmethod
 from collections import defaultdict
+from concurrent.futures import Executor
 from types import FunctionType, MethodType
 from typing import (
     Any,
+    AsyncGenerator,
     AsyncIterator,
     Callable,
     ClassVar,
     Dict,
+    FrozenSet,
+    Generator,
     List,
     Optional,
     Sequence,
@@ -27,12 +34,12 @@ from typing import (
     Type,
 )
 
-import cloudpickle
 import pydantic
 import wrapt
 from redis.asyncio import Redis
 
 from nextpy import constants
+from nextpy.backend.codec import PickleCodec, StateCodec
 from nextpy.backend.event import (
     Event,
     EventHandler,
@@ -41,9 +48,12 @@ from nextpy.backend.event import (
     fix_events,
     window_alert,
 )
+from nextpy.backend.metrics import event_metrics
+from nextpy.backend.monitor import TimingStats
 from nextpy.backend.vars import BaseVar, ComputedVar, Var
 from nextpy.base import Base
 from nextpy.build import prerequisites
+from nextpy.build.config import get_config
 from nextpy.utils import format, types
 from nextpy.utils.exceptions import ImmutableStateError, LockExpiredError
 from nextpy.utils.serializers import SerializedType, serialize, serializer
@@ -149,8 +159,17 @@ RESERVED_BACKEND_VAR_NAMES = {
     "_backend_vars",
     "_computed_var_dependencies",
     "_substate_var_dependencies",
+    "_computed_var_closure",
     "_always_dirty_computed_vars",
     "_always_dirty_substates",
+    "_offloaded_computed_vars",
+    "_offloaded_substates",
+    "_was_touched",
+    "_computed_values",
+    "_delta_patches",
+    "_delta_patch_min_length",
+    "_inherited_var_names",
+    "_var_names",
 }
 
 
@@ -187,12 +206,30 @@ class BaseState(Base, ABC, extra=pydantic.Extra.allow):
     # Mapping of var name to set of substates that depend on it
     _substate_var_dependencies: ClassVar[Dict[str, Set[str]]] = {}
 
+    # Mapping of var name to all computed variables that depend on it, directly or through other computed vars
+    _computed_var_closure: ClassVar[Dict[str, FrozenSet[str]]] = {}
+
     # Set of vars which always need to be recomputed
     _always_dirty_computed_vars: ClassVar[Set[str]] = set()
 
     # Set of substates which always need to be recomputed
     _always_dirty_substates: ClassVar[Set[str]] = set()
 
+    # Set of async and offloaded computed vars, evaluated concurrently before the delta
+    _offloaded_computed_vars: ClassVar[Set[str]] = set()
+
+    # Set of substates containing async and offloaded computed vars
+    _offloaded_substates: ClassVar[Set[str]] = set()
+
+    # The names of the vars and backend vars inherited from the parent states.
+    _inherited_var_names: ClassVar[FrozenSet[str]] = frozenset()
+
+    # The names of the inherited vars and of the base vars, which need special handling on access.
+    _var_names: ClassVar[FrozenSet[str]] = frozenset()
+
+    # The minimum length of a list or dict var to send its changes as patches (set by the app).
+    _delta_patch_min_length: ClassVar[Optional[int]] = None
+
     # The parent state.
     parent_state: Optional[BaseState] = None
 
@@ -211,6 +248,15 @@ class BaseState(Base, ABC, extra=pydantic.Extra.allow):
     # Per-instance copy of backend variable values
     _backend_vars: Dict[str, Any] = {}
 
+    # Whether the state was modified since it was last persisted.
+    _was_touched: bool = False
+
+    # The operations applied to list and dict vars since the last delta, None if replaced.
+    _delta_patches: Dict[str, Optional[List[List[Any]]]]
+
+    # The values of the async and offloaded computed vars evaluated for the next delta.
+    _computed_values: Dict[str, Any]
+
     # The router data for the current page
     router: RouterData = RouterData()
 
@@ -234,32 +280,63 @@ class BaseState(Base, ABC, extra=pydantic.Extra.allow):
 
         # Create a fresh copy of the backend variables for this instance
         self._backend_vars = copy.deepcopy(self.backend_vars)
+        self._delta_patches = {}
+        self._computed_values = {}
 
-    def _init_event_handlers(self, state: BaseState | None = None):
+    def _init_event_handlers(self):
         """Initialize event handlers.
 
-        Allow event handlers to be called directly on the instance. This is
-        called recursively for all parent states.
+        Allow event handlers to be called directly on the instance, including
+        the event handlers of all parent states.
+        """
+        # Walk the classes rather than the parent instances, which are not set up yet while unpickling.
+        state_cls = type(self)
+        while state_cls is not None:
+            # Convert the event handlers to functions.
+            for name, event_handler in state_cls.event_handlers.items():
+                if event_handler.is_background:
+                    fn = _no_chain_background_task(state_cls, name, event_handler.fn)
+                else:
+                    fn = functools.partial(event_handler.fn, self)
+                fn.__module__ = event_handler.fn.__module__  # type: ignore
+                fn.__qualname__ = event_handler.fn.__qualname__  # type: ignore
+                setattr(self, name, fn)
+            state_cls = state_cls.get_parent_state()
+
+    def __getstate__(self) -> dict[str, Any]:
+        """Get the state to pickle.
 
-        Args:
-            state: The state to initialize the event handlers on.
+        The event handlers bound to the instance are left out, so states can be
+        pickled by reference with the standard pickler. They are bound again
+        when the state is unpickled.
+
+        Returns:
+            The state to pickle.
         """
-        if state is None:
-            state = self
+        handler_names = set()
+        state_cls = type(self)
+        while state_cls is not None:
+            handler_names.update(state_cls.event_handlers)
+            state_cls = state_cls.get_parent_state()
 
-        # Convert the event handlers to functions.
-        for name, event_handler in state.event_handlers.items():
-            if event_handler.is_background:
-                fn = _no_chain_background_task(type(state), name, event_handler.fn)
-            else:
-                fn = functools.partial(event_handler.fn, self)
-            fn.__module__ = event_handler.fn.__module__  # type: ignore
-            fn.__qualname__ = event_handler.fn.__qualname__  # type: ignore
-            setattr(self, name, fn)
+        pickle_state = super().__getstate__()
+        pickle_state["__dict__"] = {
+            name: value
+            for name, value in pickle_state["__dict__"].items()
+            if name not in handler_names
+        }
+        return pickle_state
 
-        # Also allow direct calling of parent state event handlers
-        if state.parent_state is not None:
-            self._init_event_handlers(state.parent_state)
+    def __setstate__(self, state: dict[str, Any]):
+        """Restore a pickled state.
+
+        Args:
+            state: The pickled state.
+        """
+        super().__setstate__(state)
+        self.__dict__.setdefault("_delta_patches", {})
+        self.__dict__.setdefault("_computed_values", {})
+        self._init_event_handlers()
 
     def __repr__(self) -> str:
         """Get the string representation of the state.
@@ -342,6 +419,7 @@ class BaseState(Base, ABC, extra=pydantic.Extra.allow):
             **cls.computed_vars,
         }
         cls.event_handlers = {}
+        cls._init_var_names()
 
         # Setup the base vars at the class level.
         for prop in cls.base_vars.values():
@@ -362,6 +440,16 @@ class BaseState(Base, ABC, extra=pydantic.Extra.allow):
 
         cls._init_var_dependency_dicts()
 
+    @classmethod
+    def _init_var_names(cls):
+        """Initialize the lookup tables of var names of the class and its substates."""
+        cls._inherited_var_names = frozenset(
+            {**cls.inherited_vars, **cls.inherited_backend_vars}
+        )
+        cls._var_names = cls._inherited_var_names.union(cls.base_vars)
+        for substate_class in cls.__subclasses__():
+            substate_class._init_var_names()
+
     @classmethod
     def _init_var_dependency_dicts(cls):
         """Initialize the var dependency tracking dicts.
@@ -394,6 +482,17 @@ class BaseState(Base, ABC, extra=pydantic.Extra.allow):
                             parent_state.get_parent_state(),
                         )
 
+        # Precompute the transitive dependencies, so marking vars dirty is a lookup.
+        cls._computed_var_closure = {}
+        for var in cls._computed_var_dependencies:
+            dependents, queue = set(), [var]
+            while queue:
+                for cvar in cls._computed_var_dependencies.get(queue.pop(), ()):
+                    if cvar not in dependents:
+                        dependents.add(cvar)
+                        queue.append(cvar)
+            cls._computed_var_closure[var] = frozenset(dependents)
+
         # ComputedVar with cache=False always need to be recomputed
         cls._always_dirty_computed_vars = set(
             cvar_name
@@ -414,6 +513,25 @@ class BaseState(Base, ABC, extra=pydantic.Extra.allow):
                     parent_state.get_parent_state(),
                 )
 
+        # Async and offloaded ComputedVar are evaluated concurrently before the delta
+        cls._offloaded_computed_vars = set(
+            cvar_name
+            for cvar_name, cvar in cls.computed_vars.items()
+            if cvar._is_deferred
+        )
+
+        # Tell parent classes that this substate has async or offloaded computed vars
+        cls._offloaded_substates = set()
+        if cls._offloaded_computed_vars:
+            state_name = cls.get_name()
+            parent_state = cls.get_parent_state()
+            while parent_state is not None:
+                parent_state._offloaded_substates.add(state_name)
+                state_name, parent_state = (
+                    parent_state.get_name(),
+                    parent_state.get_parent_state(),
+                )
+
     @classmethod
     def _check_overridden_methods(cls):
         """Check for shadow methods and raise error if any.
@@ -530,6 +648,24 @@ class BaseState(Base, ABC, extra=pydantic.Extra.allow):
                 return substate.get_class_substate(path[1:])
         raise ValueError(f"Invalid path: {path}")
 
+    @classmethod
+    def get_computed_var_timings(cls) -> dict[str, TimingStats]:
+        """Get the time spent evaluating the computed vars of the state and its substates.
+
+        The timings are shared by all the instances of a state, to profile which
+        computed vars slow down the state updates.
+
+        Returns:
+            The timings of the computed vars, by full var name.
+        """
+        timings = {
+            f"{cls.get_full_name()}.{name}": cvar._timing
+            for name, cvar in cls.computed_vars.items()
+        }
+        for substate in cls.get_substates():
+            timings.update(substate.get_computed_var_timings())
+        return timings
+
     @classmethod
     def get_class_var(cls, path: Sequence[str]) -> Any:
         """Get the class var.
@@ -606,6 +742,7 @@ class BaseState(Base, ABC, extra=pydantic.Extra.allow):
         # let substates know about the new variable
         for substate_class in cls.__subclasses__():
             substate_class.vars.setdefault(name, var)
+        cls._init_var_names()
 
         # Reinitialize dependency tracking dicts.
         cls._init_var_dependency_dicts()
@@ -790,28 +927,35 @@ class BaseState(Base, ABC, extra=pydantic.Extra.allow):
         Returns:
             The value of the var.
         """
+        # No base class overrides __getattribute__, so skip creating super objects.
+        getattribute = object.__getattribute__
+
+        # Methods, internal fields and dunder attributes are not vars.
+        state_cls = type(self)
+        if name not in state_cls._var_names and (name[:1] != "_" or name[:2] == "__"):
+            return getattribute(self, name)
+
         # If the state hasn't been initialized yet, return the default value.
-        if not super().__getattribute__("__dict__"):
-            return super().__getattribute__(name)
+        if not getattribute(self, "__dict__"):
+            return getattribute(self, name)
 
-        inherited_vars = {
-            **super().__getattribute__("inherited_vars"),
-            **super().__getattribute__("inherited_backend_vars"),
-        }
-        if name in inherited_vars:
-            return getattr(super().__getattribute__("parent_state"), name)
+        if name in state_cls._inherited_var_names:
+            # Get the var from the state defining it, skipping the states in between.
+            state = getattribute(self, "parent_state")
+            while name in type(state)._inherited_var_names:
+                state = getattribute(state, "parent_state")
+            return getattr(state, name)
 
-        backend_vars = super().__getattribute__("_backend_vars")
-        if name in backend_vars:
-            value = backend_vars[name]
-        else:
-            value = super().__getattribute__(name)
+        backend_vars = getattribute(self, "_backend_vars")
+        value = backend_vars[name] if name in backend_vars else getattribute(self, name)
 
         if isinstance(value, MutableProxy.__mutable_types__) and (
-            name in super().__getattribute__("base_vars") or name in backend_vars
+            name in state_cls.base_vars or name in backend_vars
         ):
             # track changes in mutable containers (list, dict, set, etc)
-            return MutableProxy(wrapped=value, state=self, field_name=name)
+            return MutableProxy(
+                wrapped=value, state=self, field_name=name, top_level=True
+            )
 
         return value
 
@@ -829,8 +973,8 @@ class BaseState(Base, ABC, extra=pydantic.Extra.allow):
             value = value.__wrapped__
 
         # Set the var on the parent state.
-        inherited_vars = {**self.inherited_vars, **self.inherited_backend_vars}
-        if name in inherited_vars:
+        state_cls = type(self)
+        if name in state_cls._inherited_var_names:
             setattr(self.parent_state, name, value)
             return
 
@@ -844,7 +988,9 @@ class BaseState(Base, ABC, extra=pydantic.Extra.allow):
         super().__setattr__(name, value)
 
         # Add the var to the dirty list.
-        if name in self.vars or name in self._computed_var_dependencies:
+        if name in state_cls.vars or name in state_cls._computed_var_dependencies:
+            # The var is replaced, so its full value is sent with the next delta.
+            self._delta_patches.pop(name, None)
             self.dirty_vars.add(name)
             self._mark_dirty()
 
@@ -939,11 +1085,14 @@ class BaseState(Base, ABC, extra=pydantic.Extra.allow):
 
         return substate, handler
 
-    async def _process(self, event: Event) -> AsyncIterator[StateUpdate]:
+    async def _process(
+        self, event: Event, executor: Executor | None = None
+    ) -> AsyncIterator[StateUpdate]:
         """Obtain event info and process event.
 
         Args:
             event: The event to process.
+            executor: The executor to run synchronous handlers in by default, None to run them on the event loop.
 
         Yields:
             The state update after processing the event.
@@ -956,6 +1105,7 @@ class BaseState(Base, ABC, extra=pydantic.Extra.allow):
             handler=handler,
             state=substate,
             payload=event.payload,
+            executor=executor,
         ):
             yield update
 
@@ -988,11 +1138,12 @@ class BaseState(Base, ABC, extra=pydantic.Extra.allow):
             f"Your handler {handler.fn.__qualname__} must only return/yield: None, Events or other EventHandlers referenced by their class (not using `self`)"
         )
 
-    def _as_state_update(
+    async def _as_state_update(
         self,
         handler: EventHandler,
         events: EventSpec | list[EventSpec] | None,
         final: bool,
+        executor: Executor | None = None,
     ) -> StateUpdate:
         """Convert the events to a StateUpdate.
 
@@ -1002,6 +1153,7 @@ class BaseState(Base, ABC, extra=pydantic.Extra.allow):
             handler: The handler where the events originated from.
             events: The events to queue with the update.
             final: Whether the handler is done processing.
+            executor: The executor evaluating the offloaded computed vars.
 
         Returns:
             The valid StateUpdate containing the events and final flag.
@@ -1017,8 +1169,10 @@ class BaseState(Base, ABC, extra=pydantic.Extra.allow):
         fixed_events = fix_events(self._check_valid(handler, events), token)
 
         # Get the delta after processing the event.
-        delta = state.get_delta()
-        state._clean()
+        with event_metrics.span("delta"):
+            await state._resolve_computed_vars(executor)
+            delta = state.get_delta()
+            state._clean()
 
         return StateUpdate(
             delta=delta,
@@ -1027,7 +1181,11 @@ class BaseState(Base, ABC, extra=pydantic.Extra.allow):
         )
 
     async def _process_event(
-        self, handler: EventHandler, state: BaseState | StateProxy, payload: Dict
+        self,
+        handler: EventHandler,
+        state: BaseState | StateProxy,
+        payload: Dict,
+        executor: Executor | None = None,
     ) -> AsyncIterator[StateUpdate]:
         """Process event.
 
@@ -1035,6 +1193,7 @@ class BaseState(Base, ABC, extra=pydantic.Extra.allow):
             handler: EventHandler to process.
             state: State to process the handler.
             payload: The event payload.
+            executor: The executor to run synchronous handlers in by default, None to run them on the event loop.
 
         Yields:
             StateUpdate object
@@ -1042,58 +1201,90 @@ class BaseState(Base, ABC, extra=pydantic.Extra.allow):
         # Get the function to process the event.
         fn = functools.partial(handler.fn, state)
 
+        # Run synchronous handlers, and each step of synchronous generators, in a thread.
+        in_thread = (
+            handler.run_in_thread
+            if handler.run_in_thread is not None
+            else executor is not None
+        )
+
         # Wrap the function in a try/except block.
         try:
-            # Handle async functions.
-            if asyncio.iscoroutinefunction(fn.func):
-                events = await fn(**payload)
-
-            # Handle regular functions.
-            else:
-                events = fn(**payload)
+            with event_metrics.span("handler"):
+                # Handle async functions.
+                if asyncio.iscoroutinefunction(fn.func):
+                    events = await fn(**payload)
+
+                # Handle regular functions.
+                elif in_thread and not inspect.isasyncgenfunction(fn.func):
+                    events = await _run_in_executor(executor, fn, **payload)
+                else:
+                    events = fn(**payload)
             # Handle async generators.
             if inspect.isasyncgen(events):
-                async for event in events:
-                    yield state._as_state_update(handler, event, final=False)
-                yield state._as_state_update(handler, events=None, final=True)
+                while True:
+                    with event_metrics.span("handler"):
+                        done, event = await _anext_event(events)
+                    if done:
+                        break
+                    yield await state._as_state_update(
+                        handler, event, final=False, executor=executor
+                    )
+                yield await state._as_state_update(
+                    handler, events=None, final=True, executor=executor
+                )
 
             # Handle regular generators.
             elif inspect.isgenerator(events):
-                try:
-                    while True:
-                        yield state._as_state_update(handler, next(events), final=False)
-                except StopIteration as si:
-                    # the "return" value of the generator is not available
-                    # in the loop, we must catch StopIteration to access it
-                    if si.value is not None:
-                        yield state._as_state_update(handler, si.value, final=False)
-                yield state._as_state_update(handler, events=None, final=True)
+                while True:
+                    with event_metrics.span("handler"):
+                        if in_thread:
+                            done, event = await _run_in_executor(
+                                executor, _next_event, events
+                            )
+                        else:
+                            done, event = _next_event(events)
+                    if done:
+                        # the "return" value of the generator is the last event
+                        if event is not None:
+                            yield await state._as_state_update(
+                                handler, event, final=False, executor=executor
+                            )
+                        break
+                    yield await state._as_state_update(
+                        handler, event, final=False, executor=executor
+                    )
+                yield await state._as_state_update(
+                    handler, events=None, final=True, executor=executor
+                )
 
             # Handle regular event chains.
             else:
-                yield state._as_state_update(handler, events, final=True)
+                yield await state._as_state_update(
+                    handler, events, final=True, executor=executor
+                )
 
         # If an error occurs, throw a window alert.
         except Exception:
             error = traceback.format_exc()
             print(error)
-            yield state._as_state_update(
+            event_metrics.increment("handler_errors")
+            yield await state._as_state_update(
                 handler,
                 window_alert("An error occurred. See logs for details."),
                 final=True,
+                executor=executor,
             )
 
     def _mark_dirty_computed_vars(self) -> None:
         """Mark ComputedVars that need to be recalculated based on dirty_vars."""
-        dirty_vars = self.dirty_vars
-        while dirty_vars:
-            calc_vars, dirty_vars = dirty_vars, set()
-            for cvar in self._dirty_computed_vars(from_vars=calc_vars):
-                self.dirty_vars.add(cvar)
-                dirty_vars.add(cvar)
-                actual_var = self.computed_vars.get(cvar)
-                if actual_var is not None:
-                    actual_var.mark_dirty(instance=self)
+        dirty_cvars = self._dirty_computed_vars()
+        self.dirty_vars.update(dirty_cvars)
+        computed_vars = self.computed_vars
+        for cvar in dirty_cvars:
+            actual_var = computed_vars.get(cvar)
+            if actual_var is not None:
+                actual_var.mark_dirty(instance=self)
 
     def _dirty_computed_vars(self, from_vars: set[str] | None = None) -> set[str]:
         """Determine ComputedVars that need to be recalculated based on the given vars.
@@ -1104,10 +1295,67 @@ class BaseState(Base, ABC, extra=pydantic.Extra.allow):
         Returns:
             Set of computed vars to include in the delta.
         """
-        return set(
-            cvar
-            for dirty_var in from_vars or self.dirty_vars
-            for cvar in self._computed_var_dependencies[dirty_var]
+        closure = self._computed_var_closure
+        dirty_cvars = set()
+        for dirty_var in from_vars or self.dirty_vars:
+            cvars = closure.get(dirty_var)
+            if cvars:
+                dirty_cvars.update(cvars)
+        return dirty_cvars
+
+    async def _resolve_computed_vars(self, executor: Executor | None = None):
+        """Evaluate the async and offloaded ComputedVar needed by the next delta.
+
+        The vars of a state are evaluated concurrently, async vars on the event loop
+        and offloaded vars in the executor, so the event loop keeps serving other
+        clients meanwhile. A var depending on other pending vars is evaluated after
+        them, and the substates after their parent state. The values are used by
+        the next delta, until the state is cleaned.
+
+        Args:
+            executor: The executor of offloaded vars, None for the default executor of the event loop.
+        """
+        if self._offloaded_computed_vars:
+            # Apply dirty variables down into substates, like the delta does.
+            self.dirty_vars.update(self._always_dirty_computed_vars)
+            self._mark_dirty()
+
+            computed_vars = self.computed_vars
+            pending = {
+                name
+                for name in self._offloaded_computed_vars
+                if name in self.dirty_vars
+                or not hasattr(self, computed_vars[name]._cache_attr)
+            }
+            # Changing their value recomputes the vars depending on them.
+            self.dirty_vars.update(pending)
+            closure = self._computed_var_closure
+            while pending:
+                # Evaluate the vars not depending on any other pending var.
+                ready = [
+                    name
+                    for name in pending
+                    if not any(name in closure.get(other, ()) for other in pending)
+                ] or list(pending)
+                values = await asyncio.gather(
+                    *(
+                        computed_vars[name]._compute_async(self)
+                        if computed_vars[name]._is_async
+                        else _run_in_executor(
+                            executor, computed_vars[name]._compute, self
+                        )
+                        for name in ready
+                    )
+                )
+                self._computed_values.update(zip(ready, values))
+                pending.difference_update(ready)
+
+        substates = self.substates
+        await asyncio.gather(
+            *(
+                substates[substate]._resolve_computed_vars(executor)
+                for substate in self._offloaded_substates
+            )
         )
 
     def get_delta(self) -> Delta:
@@ -1116,6 +1364,15 @@ class BaseState(Base, ABC, extra=pydantic.Extra.allow):
         Returns:
             The delta for the state.
         """
+        # Format the whole delta once, rather than once per level of the state tree.
+        return format.format_state(self._get_delta())
+
+    def _get_delta(self) -> Delta:
+        """Get the delta for the state and its substates, without formatting the values.
+
+        Returns:
+            The unformatted delta for the state.
+        """
         delta = {}
 
         # Apply dirty variables down into substates
@@ -1128,6 +1385,7 @@ class BaseState(Base, ABC, extra=pydantic.Extra.allow):
             self.dirty_vars.intersection(self.base_vars)
             .union(self._dirty_computed_vars())
             .union(self._always_dirty_computed_vars)
+            .union(self._computed_values)
         )
 
         subdelta = {
@@ -1135,20 +1393,40 @@ class BaseState(Base, ABC, extra=pydantic.Extra.allow):
             for prop in delta_vars
             if not types.is_backend_variable(prop)
         }
+        if self._delta_patches:
+            self._apply_delta_patches(subdelta)
         if len(subdelta) > 0:
             delta[self.get_full_name()] = subdelta
 
         # Recursively find the substate deltas.
         substates = self.substates
         for substate in self.dirty_substates.union(self._always_dirty_substates):
-            delta.update(substates[substate].get_delta())
-
-        # Format the delta.
-        delta = format.format_state(delta)
+            delta.update(substates[substate]._get_delta())
 
-        # Return the delta.
         return delta
 
+    def _apply_delta_patches(self, subdelta: dict[str, Any]):
+        """Replace the values of large list and dict vars with the patches applied to them.
+
+        A patch is only sent when the client holds the previous value, i.e. the var was
+        only appended to or had keys set and deleted since the last delta, and when it
+        is smaller than the value.
+
+        Args:
+            subdelta: The delta of this state, modified in place.
+        """
+        min_length = self._delta_patch_min_length
+        if min_length is None:
+            return
+        for prop, ops in self._delta_patches.items():
+            if ops is None or prop not in subdelta or prop not in self.base_vars:
+                continue
+            value = subdelta[prop]
+            if len(value) >= min_length and sum(len(arg) for _, arg in ops) < len(
+                value
+            ):
+                subdelta[prop] = {constants.DeltaPatch.KEY: ops}
+
     def _mark_dirty(self):
         """Mark the substate and all parent states as dirty."""
         state_name = self.get_name()
@@ -1164,13 +1442,17 @@ class BaseState(Base, ABC, extra=pydantic.Extra.allow):
         self._mark_dirty_computed_vars()
 
         # Propagate dirty var / computed var status into substates
-        substates = self.substates
+        substate_dirty_vars = {}
+        substate_var_dependencies = self._substate_var_dependencies
         for var in self.dirty_vars:
-            for substate_name in self._substate_var_dependencies[var]:
-                self.dirty_substates.add(substate_name)
-                substate = substates[substate_name]
-                substate.dirty_vars.add(var)
-                substate._mark_dirty()
+            for substate_name in substate_var_dependencies.get(var, ()):
+                substate_dirty_vars.setdefault(substate_name, set()).add(var)
+        substates = self.substates
+        for substate_name, dirty_vars in substate_dirty_vars.items():
+            self.dirty_substates.add(substate_name)
+            substate = substates[substate_name]
+            substate.dirty_vars.update(dirty_vars)
+            substate._mark_dirty()
 
     def _clean(self):
         """Reset the dirty vars."""
@@ -1178,9 +1460,36 @@ class BaseState(Base, ABC, extra=pydantic.Extra.allow):
         for substate in self.dirty_substates:
             self.substates[substate]._clean()
 
+        # Remember the modification so the state manager knows to persist this state.
+        if self._is_touched():
+            self._was_touched = True
+
+        # Keep the evaluated values of the async and cached vars until their dependencies change.
+        if self._computed_values:
+            computed_vars = self.computed_vars
+            for name, value in self._computed_values.items():
+                cvar = computed_vars[name]
+                if cvar._cache or cvar._is_async:
+                    setattr(self, cvar._cache_attr, value)
+            self._computed_values.clear()
+
         # Clean this state.
         self.dirty_vars = set()
         self.dirty_substates = set()
+        self._delta_patches.clear()
+
+    def _is_touched(self) -> bool:
+        """Check whether this state (excluding substates) was modified since it was loaded.
+
+        ComputedVar with cache=False are always dirty, but they do not store any
+        value on the instance, so they do not count as a modification.
+
+        Returns:
+            Whether the state needs to be persisted.
+        """
+        return self._was_touched or bool(
+            self.dirty_vars - self._always_dirty_computed_vars
+        )
 
     def get_value(self, key: str) -> Any:
         """Get the value of a field (without proxying).
@@ -1342,7 +1651,7 @@ class StateProxy(wrapt.ObjectProxy):
             This StateProxy instance in mutable mode.
         """
         self._self_actx = self._self_app.modify_state(
-            self.__wrapped__.router.session.client_token
+            self.__wrapped__.router.session.client_token, self._self_substate_path
         )
         mutable_state = await self._self_actx.__aenter__()
         super().__setattr__(
@@ -1400,6 +1709,7 @@ class StateProxy(wrapt.ObjectProxy):
                 wrapped=value.__wrapped__,
                 state=self,  # type: ignore
                 field_name=value._self_field_name,
+                top_level=value._self_top_level,
             )
         if isinstance(value, functools.partial) and value.args[0] is self.__wrapped__:
             # Rebind event handler to the proxy instance
@@ -1441,6 +1751,58 @@ class StateProxy(wrapt.ObjectProxy):
         )
 
 
+def _next_event(events: Generator) -> tuple[bool, Any]:
+    """Get the next events yielded by a synchronous generator handler.
+
+    Args:
+        events: The generator.
+
+    Returns:
+        Whether the generator is done, and the events yielded or returned.
+    """
+    try:
+        return False, next(events)
+    except StopIteration as si:
+        # the "return" value of the generator is not available
+        # in the loop, we must catch StopIteration to access it
+        return True, si.value
+
+
+async def _anext_event(events: AsyncGenerator) -> tuple[bool, Any]:
+    """Get the next events yielded by an asynchronous generator handler.
+
+    Args:
+        events: The generator.
+
+    Returns:
+        Whether the generator is done, and the events yielded.
+    """
+    try:
+        return False, await events.__anext__()
+    except StopAsyncIteration:
+        return True, None
+
+
+async def _run_in_executor(
+    executor: Executor | None, fn: Callable, *args: Any, **kwargs: Any
+) -> Any:
+    """Run a function in an executor with the current context.
+
+    Args:
+        executor: The executor, None for the default executor of the event loop.
+        fn: The function to run.
+        *args: The args to pass to the function.
+        **kwargs: The kwargs to pass to the function.
+
+    Returns:
+        The result of the function.
+    """
+    context = contextvars.copy_context()
+    return await asyncio.get_running_loop().run_in_executor(
+        executor, functools.partial(context.run, fn, *args, **kwargs)
+    )
+
+
 class StateUpdate(Base):
     """A state update sent to the frontend."""
 
@@ -1453,6 +1815,78 @@ class StateUpdate(Base):
     # Whether this is the final state update for the event.
     final: bool = True
 
+    def json(self) -> str:
+        """Convert the state update to the json string sent to the client.
+
+        The delta is already formatted, so it is encoded directly instead of
+        being copied to dicts by pydantic first.
+
+        Returns:
+            The state update as a json string.
+        """
+        return format.fast_json_dumps(
+            {"delta": self.delta, "events": self.events, "final": self.final}
+        )
+
+    def merge(self, update: StateUpdate) -> StateUpdate:
+        """Merge a newer update into this one, as the client would apply them in order.
+
+        Args:
+            update: The newer update.
+
+        Returns:
+            The merged update.
+        """
+        delta = {name: dict(subdelta) for name, subdelta in self.delta.items()}
+        for name, subdelta in update.delta.items():
+            merged = delta.setdefault(name, {})
+            for prop, value in subdelta.items():
+                if prop in merged and _is_delta_patch(value):
+                    value = _merge_delta_patch(merged[prop], value)
+                merged[prop] = value
+        return StateUpdate(
+            delta=delta,
+            events=[*self.events, *update.events],
+            final=self.final or update.final,
+        )
+
+
+def _is_delta_patch(value: Any) -> bool:
+    """Check whether a value in a delta is a patch of the previous value.
+
+    Args:
+        value: The value in the delta.
+
+    Returns:
+        Whether the value is a patch.
+    """
+    return isinstance(value, dict) and constants.DeltaPatch.KEY in value
+
+
+def _merge_delta_patch(value: Any, patch: dict[str, Any]) -> Any:
+    """Apply a patch to a formatted value, or to an older patch.
+
+    Args:
+        value: The formatted list or dict value, or the older patch.
+        patch: The patch to apply.
+
+    Returns:
+        The patched value.
+    """
+    ops = patch[constants.DeltaPatch.KEY]
+    if _is_delta_patch(value):
+        return {constants.DeltaPatch.KEY: [*value[constants.DeltaPatch.KEY], *ops]}
+    value = copy.copy(value)
+    for op, arg in ops:
+        if op == constants.DeltaPatch.APPEND:
+            value.extend(arg)
+        elif op == constants.DeltaPatch.SET:
+            value.update(arg)
+        elif op == constants.DeltaPatch.DELETE:
+            for key in arg:
+                value.pop(key, None)
+    return value
+
 
 class StateManager(Base, ABC):
     """A class to manage many client states."""
@@ -1460,6 +1894,9 @@ class StateManager(Base, ABC):
     # The state class to use.
     state: Type[BaseState]
 
+    # The codec used to persist the states.
+    codec: StateCodec = PickleCodec()
+
     @classmethod
     def create(cls, state: Type[BaseState]):
         """Create a new state manager.
@@ -1470,10 +1907,20 @@ class StateManager(Base, ABC):
         Returns:
             The state manager (either memory or redis).
         """
+        config = get_config()
         redis = prerequisites.get_redis()
         if redis is not None:
-            return StateManagerRedis(state=state, redis=redis)
-        return StateManagerMemory(state=state)
+            return StateManagerRedis(
+                state=state,
+                redis=redis,
+                substate_keys=config.redis_substate_keys,
+            )
+        return StateManagerMemory(
+            state=state,
+            max_sessions=config.state_max_sessions,
+            idle_timeout=config.state_idle_timeout,
+            spill_dir=config.state_spill_dir,
+        )
 
     @abstractmethod
     async def get_state(self, token: str) -> BaseState:
@@ -1499,11 +1946,15 @@ class StateManager(Base, ABC):
 
     @abstractmethod
     @contextlib.asynccontextmanager
-    async def modify_state(self, token: str) -> AsyncIterator[BaseState]:
+    async def modify_state(
+        self, token: str, path: Sequence[str] | None = None
+    ) -> AsyncIterator[BaseState]:
         """Modify the state for a token while holding exclusive lock.
 
         Args:
             token: The token to modify the state for.
+            path: The path of the substate that will be modified. State managers
+                may use it to only load the parts of the state tree that are needed.
 
         Yields:
             The state for the token.
@@ -1511,23 +1962,70 @@ class StateManager(Base, ABC):
         yield self.state()
 
 
+class SessionStats(Base):
+    """Memory accounting of the states held by the in-memory state manager."""
+
+    # The number of states currently held in memory.
+    sessions: int = 0
+
+    # The number of states evicted because the maximum number of sessions was reached.
+    evicted: int = 0
+
+    # The number of states evicted because they were idle for too long.
+    expired: int = 0
+
+    # The number of evicted states written to disk and read back from it.
+    spilled: int = 0
+    restored: int = 0
+
+    # The total size of the states currently spilled to disk (bytes).
+    spilled_bytes: int = 0
+
+
 class StateManagerMemory(StateManager):
     """A state manager that stores states in memory."""
 
-    # The mapping of client ids to states.
+    # The mapping of client ids to states, from least to most recently used.
     states: Dict[str, BaseState] = {}
 
+    # The maximum number of states to keep in memory, least recently used are evicted first.
+    max_sessions: Optional[int] = None
+
+    # The time after which a state that was not accessed is evicted from memory (s).
+    idle_timeout: Optional[float] = None
+
+    # The directory evicted states are written to, so they are restored when the client returns.
+    spill_dir: Optional[str] = None
+
+    # The time after which a spilled state is discarded (s).
+    token_expiration: int = constants.Expiration.TOKEN
+
+    # The memory accounting of the states.
+    session_stats: SessionStats = SessionStats()
+
     # The mutex ensures the dict of mutexes is updated exclusively
     _state_manager_lock = asyncio.Lock()
 
     # The dict of mutexes for each client
     _states_locks: Dict[str, asyncio.Lock] = pydantic.PrivateAttr({})
 
+    # The last time each state was accessed (monotonic clock).
+    _last_access: Dict[str, float] = pydantic.PrivateAttr({})
+
+    # The number of modify_state calls holding or waiting for the lock of each state.
+    _in_use: Dict[str, int] = pydantic.PrivateAttr({})
+
+    # The last time expired states were removed from the spill directory.
+    _last_spill_sweep: float = pydantic.PrivateAttr(0.0)
+
     class Config:
         """The Pydantic config."""
 
         fields = {
             "_states_locks": {"exclude": True},
+            "_last_access": {"exclude": True},
+            "_in_use": {"exclude": True},
+            "_last_spill_sweep": {"exclude": True},
         }
 
     async def get_state(self, token: str) -> BaseState:
@@ -1539,8 +2037,15 @@ class StateManagerMemory(StateManager):
         Returns:
             The state for the token.
         """
-        if token not in self.states:
-            self.states[token] = self.state()
+        if token in self.states:
+            # Move the state to the end, so the least recently used states come first.
+            self.states[token] = self.states.pop(token)
+        else:
+            state = self._restore_state(token)
+            self.states[token] = state if state is not None else self.state()
+        now = time.monotonic()
+        self._last_access[token] = now
+        self._evict_states(now, keep=token)
         return self.states[token]
 
     async def set_state(self, token: str, state: BaseState):
@@ -1553,24 +2058,168 @@ class StateManagerMemory(StateManager):
         pass
 
     @contextlib.asynccontextmanager
-    async def modify_state(self, token: str) -> AsyncIterator[BaseState]:
+    async def modify_state(
+        self, token: str, path: Sequence[str] | None = None
+    ) -> AsyncIterator[BaseState]:
         """Modify the state for a token while holding exclusive lock.
 
         Args:
             token: The token to modify the state for.
+            path: Ignored, the whole state tree is always kept in memory.
 
         Yields:
             The state for the token.
         """
-        if token not in self._states_locks:
-            async with self._state_manager_lock:
-                if token not in self._states_locks:
-                    self._states_locks[token] = asyncio.Lock()
+        # States in use are never evicted, so their lock is never replaced.
+        self._in_use[token] = self._in_use.get(token, 0) + 1
+        try:
+            if token not in self._states_locks:
+                async with self._state_manager_lock:
+                    if token not in self._states_locks:
+                        self._states_locks[token] = asyncio.Lock()
+
+            lock = self._states_locks[token]
+            with event_metrics.span("state_lock"):
+                await lock.acquire()
+            try:
+                with event_metrics.span("state_load"):
+                    state = await self.get_state(token)
+                yield state
+                with event_metrics.span("state_save"):
+                    await self.set_state(token, state)
+            finally:
+                lock.release()
+        finally:
+            self._in_use[token] -= 1
+            if not self._in_use[token]:
+                del self._in_use[token]
 
-        async with self._states_locks[token]:
-            state = await self.get_state(token)
-            yield state
-            await self.set_state(token, state)
+    def _evict_states(self, now: float, keep: str):
+        """Evict the least recently used states over the limits.
+
+        States are visited from least to most recently used, so this stops at
+        the first state that is within the limits.
+
+        Args:
+            now: The current time (monotonic clock).
+            keep: The token of the state being accessed, which is never evicted.
+        """
+        n_excess = (
+            len(self.states) - self.max_sessions if self.max_sessions is not None else 0
+        )
+        evicted, expired = [], []
+        for token in self.states:
+            if n_excess > 0:
+                victims = evicted
+            elif (
+                self.idle_timeout is not None
+                and now - self._last_access[token] > self.idle_timeout
+            ):
+                victims = expired
+            else:
+                break
+            if token == keep or token in self._in_use:
+                continue
+            victims.append(token)
+            n_excess -= 1
+
+        for token in evicted + expired:
+            state = self.states.pop(token)
+            del self._last_access[token]
+            self._states_locks.pop(token, None)
+            if self.spill_dir is not None:
+                self._spill_state(token, state)
+        self.session_stats.evicted += len(evicted)
+        self.session_stats.expired += len(expired)
+        self.session_stats.sessions = len(self.states)
+
+    def _spill_path(self, token: str) -> str:
+        """Get the path of the file a state is spilled to.
+
+        Args:
+            token: The token of the state.
+
+        Returns:
+            The path of the file.
+        """
+        assert self.spill_dir is not None
+        return os.path.join(self.spill_dir, hashlib.sha256(token.encode()).hexdigest())
+
+    def _spill_state(self, token: str, state: BaseState):
+        """Write an evicted state to the spill directory.
+
+        Args:
+            token: The token of the state.
+            state: The evicted state.
+        """
+        assert self.spill_dir is not None
+        data = self.codec.dumps(state)
+        os.makedirs(self.spill_dir, exist_ok=True)
+        with open(self._spill_path(token), "wb") as f:
+            f.write(data)
+        self.session_stats.spilled += 1
+        self.session_stats.spilled_bytes += len(data)
+        self._sweep_spill_dir()
+
+    def _restore_state(self, token: str) -> BaseState | None:
+        """Read back a state that was spilled to disk, removing the file.
+
+        Args:
+            token: The token of the state.
+
+        Returns:
+            The restored state, or None if it was not spilled or has expired.
+        """
+        if self.spill_dir is None:
+            return None
+        path = self._spill_path(token)
+        try:
+            expired = time.time() - os.path.getmtime(path) > self.token_expiration
+            with open(path, "rb") as f:
+                data = f.read()
+            os.remove(path)
+        except FileNotFoundError:
+            return None
+        self.session_stats.spilled_bytes = max(
+            self.session_stats.spilled_bytes - len(data), 0
+        )
+        if expired:
+            return None
+        self.session_stats.restored += 1
+        return self.codec.loads(data)
+
+    def _sweep_spill_dir(self):
+        """Remove the expired spilled states, at most once per token expiration."""
+        assert self.spill_dir is not None
+        now = time.time()
+        if now - self._last_spill_sweep < self.token_expiration:
+            return
+        self._last_spill_sweep = now
+        for entry in os.scandir(self.spill_dir):
+            with contextlib.suppress(FileNotFoundError):
+                if now - entry.stat().st_mtime > self.token_expiration:
+                    size = entry.stat().st_size
+                    os.remove(entry.path)
+                    self.session_stats.spilled_bytes = max(
+                        self.session_stats.spilled_bytes - size, 0
+                    )
+
+
+class LockStats(Base):
+    """Contention metrics of the redis state locks."""
+
+    # The number of times a lock was already held when an event tried to obtain it.
+    contended: int = 0
+
+    # The number of coroutines currently waiting for a lock.
+    waiting: int = 0
+
+    # The total and the longest time spent waiting for a lock (s).
+    wait_time: float = 0.0
+    max_wait_time: float = 0.0
+
+    # The number of lock release notifications received.
+    notifications: int = 0
 
 
 class StateManagerRedis(StateManager):
@@ -1585,6 +2234,9 @@ class StateManagerRedis(StateManager):
     # The maximum time to hold a lock (ms).
     lock_expiration: int = constants.Expiration.LOCK
 
+    # Whether to store each substate under its own key and only load/write the needed substates.
+    substate_keys: bool = False
+
     # The keyspace subscription string when redis is waiting for lock to be released
     _redis_notify_keyspace_events: str = (
         "K"  # Enable keyspace notifications (target a particular key)
@@ -1601,20 +2253,92 @@ class StateManagerRedis(StateManager):
         b"evicted",
     }
 
-    async def get_state(self, token: str) -> BaseState:
+    # Lua script to obtain the lock and fetch the state keys in one round trip.
+    # KEYS: lock key, state keys. ARGV: lock id, lock expiration (ms).
+    _lock_and_get_script: str = """
+        if not redis.call("SET", KEYS[1], ARGV[1], "PX", ARGV[2], "NX") then
+            return false
+        end
+        local values = {}
+        for i = 2, #KEYS do
+            values[i - 1] = redis.call("GET", KEYS[i])
+        end
+        return values
+    """
+
+    # Lua script to set the state keys only if the lock is still held, optionally releasing it.
+    # KEYS: lock key, keys to set, keys to refresh.
+    # ARGV: lock id, token expiration (s), whether to unlock, values of the keys to set.
+    _set_if_locked_script: str = """
+        if redis.call("GET", KEYS[1]) ~= ARGV[1] then
+            return 0
+        end
+        local n_values = #ARGV - 3
+        for i = 1, n_values do
+            redis.call("SET", KEYS[i + 1], ARGV[i + 3], "EX", ARGV[2])
+        end
+        for i = n_values + 2, #KEYS do
+            redis.call("EXPIRE", KEYS[i], ARGV[2])
+        end
+        if ARGV[3] == "1" then
+            redis.call("DEL", KEYS[1])
+        end
+        return 1
+    """
+
+    # Lua script to release the lock only if it is held by the given lock id.
+    # KEYS: lock key. ARGV: lock id.
+    _unlock_script: str = """
+        if redis.call("GET", KEYS[1]) == ARGV[1] then
+            return redis.call("DEL", KEYS[1])
+        end
+        return 0
+    """
+
+    # The contention metrics of the state locks.
+    lock_stats: LockStats = LockStats()
+
+    # The lua scripts registered with the redis client.
+    _scripts: Dict[str, Any] = pydantic.PrivateAttr({})
+
+    # The futures of the coroutines waiting for each lock key to be released.
+    _lock_waiters: Dict[bytes, Set[asyncio.Future]] = pydantic.PrivateAttr({})
+
+    # The pubsub and task listening for lock releases, shared by all waiters.
+    _lock_pubsub: Any = pydantic.PrivateAttr(None)
+    _lock_listener: Optional[asyncio.Task] = pydantic.PrivateAttr(None)
+    _lock_listener_ready: Optional[asyncio.Future] = pydantic.PrivateAttr(None)
+
+    class Config:
+        """The Pydantic config."""
+
+        fields = {
+            "_scripts": {"exclude": True},
+            "_lock_waiters": {"exclude": True},
+            "_lock_pubsub": {"exclude": True},
+            "_lock_listener": {"exclude": True},
+            "_lock_listener_ready": {"exclude": True},
+        }
+
+    async def get_state(
+        self, token: str, path: Sequence[str] | None = None
+    ) -> BaseState:
         """Get the state for a token.
 
         Args:
             token: The token to get the state for.
+            path: With substate keys, the path of the substate that is needed.
+                Only that substate, its parents, its substates and any substates
+                that depend on them are loaded. If None, the whole tree is loaded.
 
         Returns:
             The state for the token.
         """
-        redis_state = await self.redis.get(token)
-        if redis_state is None:
+        redis_states = await self.redis.mget(self._get_state_keys(token, path))
+        if not self.substate_keys and redis_states[0] is None:
             await self.set_state(token, self.state())
             return await self.get_state(token)
-        return cloudpickle.loads(redis_state)
+        return self._load_state(path, redis_states)
 
     async def set_state(
         self, token: str, state: BaseState, lock_id: bytes | None = None
@@ -1625,36 +2349,334 @@ class StateManagerRedis(StateManager):
             token: The token to set the state for.
             state: The state to set.
             lock_id: If provided, the lock_key must be set to this value to set the state.
+        """
+        if lock_id is not None:
+            # check that we're holding the lock while setting the state
+            await self._set_state_if_locked(token, state, lock_id, unlock=False)
+            return
+        values, refresh_keys = self._dump_state(token, state)
+        async with self.redis.pipeline(transaction=False) as pipe:
+            for key, value in values.items():
+                pipe.set(key, value, ex=self.token_expiration)
+            for key in refresh_keys:
+                pipe.expire(key, self.token_expiration)
+            await pipe.execute()
+
+    @contextlib.asynccontextmanager
+    async def modify_state(
+        self, token: str, path: Sequence[str] | None = None
+    ) -> AsyncIterator[BaseState]:
+        """Modify the state for a token while holding exclusive lock.
+
+        The lock is obtained and the state fetched in a single round trip, and
+        the state is written back and the lock released in a second one.
+
+        Args:
+            token: The token to modify the state for.
+            path: With substate keys, the path of the substate that will be modified.
+
+        Yields:
+            The state for the token.
+        """
+        lock_key = self._lock_key(token)
+        lock_id = uuid.uuid4().hex.encode()
+        keys = self._get_state_keys(token, path)
+
+        with event_metrics.span("state_lock"):
+            redis_states = await self._try_get_lock_and_states(lock_key, lock_id, keys)
+            if redis_states is None:
+                # Missed the fast-path to get lock, subscribe for lock delete/expire events
+                redis_states = await self._wait_lock(lock_key, lock_id, keys)
+        state_is_locked = True
+
+        try:
+            with event_metrics.span("state_load"):
+                state = self._load_state(path, redis_states)
+            yield state
+            with event_metrics.span("state_save"):
+                await self._set_state_if_locked(token, state, lock_id, unlock=True)
+            # The lock was released along with writing the state (or already expired).
+            state_is_locked = False
+        finally:
+            if state_is_locked:
+                # only delete our lock
+                await self._run_script(self._unlock_script, [lock_key], [lock_id])
+
+    def _get_state_keys(
+        self, token: str, path: Sequence[str] | None = None
+    ) -> list[str]:
+        """Get the redis keys holding the state needed for the given path.
+
+        Args:
+            token: The token to get the keys for.
+            path: The path of the substate that is needed, or None for the whole tree.
+
+        Returns:
+            The redis keys, in the order expected by _load_state.
+        """
+        if not self.substate_keys:
+            return [token]
+        return [
+            self._substate_key(token, state_cls)
+            for state_cls in self._get_required_substates(path)
+        ]
+
+    def _load_state(
+        self, path: Sequence[str] | None, redis_states: list[bytes | None]
+    ) -> BaseState:
+        """Unpickle the state fetched from the keys returned by _get_state_keys.
+
+        Args:
+            path: The path the keys were computed for.
+            redis_states: The values of the keys (None for missing keys).
+
+        Returns:
+            The root state instance.
+        """
+        if self.substate_keys:
+            return self._load_substates(path, redis_states)
+        if redis_states[0] is None:
+            return self.state()
+        return self.codec.loads(redis_states[0])
+
+    def _dump_state(
+        self, token: str, state: BaseState
+    ) -> tuple[dict[str, bytes], list[str]]:
+        """Pickle the state to be written to redis.
+
+        Args:
+            token: The token to set the state for.
+            state: The state to set.
+
+        Returns:
+            The values to set by key, and the keys that only need their expiration refreshed.
+        """
+        if self.substate_keys:
+            return self._dump_substates(token, state)
+        return {token: self.codec.dumps(state)}, []
+
+    async def _set_state_if_locked(
+        self, token: str, state: BaseState, lock_id: bytes, unlock: bool
+    ):
+        """Set the state for a token only if the lock is held, in a single round trip.
+
+        Args:
+            token: The token to set the state for.
+            state: The state to set.
+            lock_id: The lock_key must be set to this value to set the state.
+            unlock: Whether to release the lock after setting the state.
 
         Raises:
-            LockExpiredError: If lock_id is provided and the lock for the token is not held by that ID.
+            LockExpiredError: If the lock for the token is not held by lock_id.
         """
-        # check that we're holding the lock
-        if (
-            lock_id is not None
-            and await self.redis.get(self._lock_key(token)) != lock_id
-        ):
+        values, refresh_keys = self._dump_state(token, state)
+        is_set = await self._run_script(
+            self._set_if_locked_script,
+            [self._lock_key(token), *values, *refresh_keys],
+            [lock_id, self.token_expiration, int(unlock), *values.values()],
+        )
+        if not is_set:
             raise LockExpiredError(
                 f"Lock expired for token {token} while processing. Consider increasing "
                 f"`app.state_manager.lock_expiration` (currently {self.lock_expiration}) "
                 "or use `@xt.background` decorator for long-running tasks."
             )
-        await self.redis.set(token, cloudpickle.dumps(state), ex=self.token_expiration)
 
-    @contextlib.asynccontextmanager
-    async def modify_state(self, token: str) -> AsyncIterator[BaseState]:
-        """Modify the state for a token while holding exclusive lock.
+    @staticmethod
+    def _substate_key(token: str, state: Type[BaseState] | BaseState) -> str:
+        """Get the redis key for a single substate of a token.
 
         Args:
-            token: The token to modify the state for.
+            token: The token the state belongs to.
+            state: The state class or instance.
 
-        Yields:
-            The state for the token.
+        Returns:
+            The redis key for the substate.
         """
-        async with self._lock(token) as lock_id:
-            state = await self.get_state(token)
-            yield state
-            await self.set_state(token, state, lock_id)
+        return f"{token}_{state.get_full_name()}"
+
+    def _get_required_substates(
+        self, path: Sequence[str] | None = None
+    ) -> list[Type[BaseState]]:
+        """Get the state classes that must be loaded to process an event.
+
+        An event needs the state it targets, all of its parents (inherited
+        vars are read from the parent instances) and all of its substates.
+        Any substate that may be marked dirty by one of those states (through
+        ComputedVar dependencies or ComputedVar with cache=False) is also
+        needed, so the delta can be computed.
+
+        Args:
+            path: The path of the targeted substate, or None for the whole tree.
+
+        Returns:
+            The state classes to load, parents before their substates.
+        """
+        required = set()
+
+        def _add_tree(state_cls: Type[BaseState]):
+            required.add(state_cls)
+            for substate_cls in state_cls.get_substates():
+                _add_tree(substate_cls)
+
+        if path is None:
+            _add_tree(self.state)
+        else:
+            target = self.state.get_class_substate(tuple(path))
+            _add_tree(target)
+            while target is not self.state:
+                target = target.get_parent_state()  # type: ignore
+                required.add(target)
+
+            # Add substates that may be dirtied by the loaded states.
+            queue = list(required)
+            while queue:
+                state_cls = queue.pop()
+                dependent_substates = set(state_cls._always_dirty_substates)
+                for substate_names in state_cls._substate_var_dependencies.values():
+                    dependent_substates.update(substate_names)
+                for substate_cls in state_cls.get_substates():
+                    if (
+                        substate_cls.get_name() in dependent_substates
+                        and substate_cls not in required
+                    ):
+                        required.add(substate_cls)
+                        queue.append(substate_cls)
+
+        # A parent's full name is a prefix of its substates' names, so it sorts first.
+        return sorted(required, key=lambda state_cls: state_cls.get_full_name())
+
+    def _serialize_substate(self, state: BaseState) -> bytes:
+        """Pickle a single state instance without its parent and substates.
+
+        Args:
+            state: The state instance to serialize.
+
+        Returns:
+            The pickled state.
+        """
+        pickle_state = state.__getstate__()
+        pickle_state["__dict__"].update(parent_state=None, substates={})
+        pickle_state["__dict__"].pop("_was_touched", None)
+        return self.codec.dumps(pickle_state)
+
+    def _deserialize_substate(
+        self, state_cls: Type[BaseState], data: bytes, parent_state: BaseState | None
+    ) -> BaseState:
+        """Unpickle a single state instance and attach it to its parent.
+
+        Args:
+            state_cls: The class of the state.
+            data: The pickled state.
+            parent_state: The already loaded parent state instance.
+
+        Returns:
+            The state instance.
+        """
+        state = state_cls.__new__(state_cls)
+        state.__setstate__(self.codec.loads(data))
+        state.__dict__["parent_state"] = parent_state
+        return state
+
+    def _load_substates(
+        self, path: Sequence[str] | None, redis_states: list[bytes | None]
+    ) -> BaseState:
+        """Unpickle the substates needed for the given path from their own keys.
+
+        Args:
+            path: The path of the substate that is needed, or None for the whole tree.
+            redis_states: The values of the substate keys.
+
+        Returns:
+            The root state instance, with the required substates attached.
+        """
+        state_classes = self._get_required_substates(path)
+        if redis_states[0] is None:
+            # A new session: create (and later persist) the whole tree.
+            state = self.state()
+            state._was_touched = True
+            for substate in self._iter_substates(state):
+                substate._was_touched = True
+            return state
+
+        loaded = {}
+        for state_cls, redis_state in zip(state_classes, redis_states):
+            parent_cls = state_cls.get_parent_state()
+            parent_state = None if parent_cls is None else loaded[parent_cls]
+            if redis_state is None:
+                # The substate expired or was added after the session was created.
+                substate = state_cls(parent_state=parent_state)
+                substate.substates = {}
+                substate._was_touched = True
+            else:
+                substate = self._deserialize_substate(
+                    state_cls, redis_state, parent_state
+                )
+            if parent_state is not None:
+                parent_state.substates[substate.get_name()] = substate
+            loaded[state_cls] = substate
+
+        root_state = loaded[state_classes[0]]
+        for state_cls in reversed(state_classes):
+            # Changes that were not sent to the client yet are still pending.
+            substate = loaded[state_cls]
+            substate.dirty_substates = set(
+                name
+                for name, child in substate.substates.items()
+                if child.dirty_vars or child.dirty_substates
+            )
+        for substate in loaded.values():
+            if (
+                substate.parent_state is not None
+                and substate.router_data != substate.parent_state.router_data
+            ):
+                # Substates that were not loaded recently may have stale router data.
+                substate.router_data = substate.parent_state.router_data
+        return root_state
+
+    def _dump_substates(
+        self, token: str, state: BaseState
+    ) -> tuple[dict[str, bytes], list[str]]:
+        """Pickle the modified substates to be written to their own keys.
+
+        Untouched substates are not rewritten, but their expiration is refreshed
+        so the whole session expires at once.
+
+        Args:
+            token: The token to set the state for.
+            state: The state to set (any state in the tree).
+
+        Returns:
+            The values to set by key, and the keys that only need their expiration refreshed.
+        """
+        while state.parent_state is not None:
+            state = state.parent_state
+
+        values = {}
+        for substate in [state, *self._iter_substates(state)]:
+            if substate._is_touched():
+                values[self._substate_key(token, substate)] = self._serialize_substate(
+                    substate
+                )
+                substate._was_touched = False
+        refresh_keys = [key for key in self._get_state_keys(token) if key not in values]
+        return values, refresh_keys
+
+    @classmethod
+    def _iter_substates(cls, state: BaseState) -> list[BaseState]:
+        """Get all loaded substates of a state, recursively.
+
+        Args:
+            state: The state to get the substates of.
+
+        Returns:
+            The substates, parents before their substates.
+        """
+        substates = []
+        for substate in state.substates.values():
+            substates.append(substate)
+            substates.extend(cls._iter_substates(substate))
+        return substates
 
     @staticmethod
     def _lock_key(token: str) -> bytes:
@@ -1668,85 +2690,146 @@ class StateManagerRedis(StateManager):
         """
         return f"{token}_lock".encode()
 
-    async def _try_get_lock(self, lock_key: bytes, lock_id: bytes) -> bool | None:
-        """Try to get a redis lock for a token.
+    async def _run_script(self, source: str, keys: list, args: list) -> Any:
+        """Run a lua script, registering it with the redis client on first use.
 
         Args:
-            lock_key: The redis key for the lock.
-            lock_id: The ID of the lock.
+            source: The source of the script.
+            keys: The keys the script accesses.
+            args: The other arguments of the script.
 
         Returns:
-            True if the lock was obtained.
+            The return value of the script.
         """
-        return await self.redis.set(
-            lock_key,
-            lock_id,
-            px=self.lock_expiration,
-            nx=True,  # only set if it doesn't exist
-        )
-
-    async def _wait_lock(self, lock_key: bytes, lock_id: bytes) -> None:
-        """Wait for a redis lock to be released via pubsub.
+        if source not in self._scripts:
+            self._scripts[source] = self.redis.register_script(source)
+        return await self._scripts[source](keys=keys, args=args)
 
-        Coroutine will not return until the lock is obtained.
+    async def _try_get_lock_and_states(
+        self, lock_key: bytes, lock_id: bytes, keys: list[str]
+    ) -> list[bytes | None] | None:
+        """Try to get a redis lock for a token and fetch the state keys in one round trip.
 
         Args:
             lock_key: The redis key for the lock.
             lock_id: The ID of the lock.
+            keys: The state keys to fetch once the lock is obtained.
+
+        Returns:
+            The values of the state keys if the lock was obtained, otherwise None.
         """
-        state_is_locked = False
-        lock_key_channel = f"__keyspace@0__:{lock_key.decode()}"
-        # Enable keyspace notifications for the lock key, so we know when it is available.
-        await self.redis.config_set(
-            "notify-keyspace-events", self._redis_notify_keyspace_events
+        return await self._run_script(
+            self._lock_and_get_script,
+            [lock_key, *keys],
+            [lock_id, self.lock_expiration],
         )
-        async with self.redis.pubsub() as pubsub:
-            await pubsub.psubscribe(lock_key_channel)
-            while not state_is_locked:
-                # wait for the lock to be released
-                while True:
-                    if not await self.redis.exists(lock_key):
-                        break  # key was removed, try to get the lock again
-                    message = await pubsub.get_message(
-                        ignore_subscribe_messages=True,
-                        timeout=self.lock_expiration / 1000.0,
-                    )
-                    if message is None:
-                        continue
-                    if message["data"] in self._redis_keyspace_lock_release_events:
-                        break
-                state_is_locked = await self._try_get_lock(lock_key, lock_id)
 
-    @contextlib.asynccontextmanager
-    async def _lock(self, token: str):
-        """Obtain a redis lock for a token.
+    async def _ensure_lock_listener(self):
+        """Start the shared lock release listener if it is not running in this event loop.
 
-        Args:
-            token: The token to obtain a lock for.
+        Keyspace notifications are enabled once and all lock keys are watched through a
+        single pattern subscription, so waiting on a lock costs no extra connection.
+        """
+        loop = asyncio.get_running_loop()
+        if (
+            self._lock_listener is None
+            or self._lock_listener.done()
+            or self._lock_listener.get_loop() is not loop
+        ):
+            self._lock_listener_ready = loop.create_future()
+            self._lock_listener = loop.create_task(
+                self._listen_lock_releases(self._lock_listener_ready)
+            )
+        # Do not cancel the shared startup if this waiter is cancelled.
+        await asyncio.shield(self._lock_listener_ready)
 
-        Yields:
-            The ID of the lock (to be passed to set_state).
+    async def _listen_lock_releases(self, ready: asyncio.Future):
+        """Wake up the waiters of each lock key released according to the keyspace events.
 
-        Raises:
-            LockExpiredError: If the lock has expired while processing the event.
+        Args:
+            ready: The future to resolve once the subscription is active.
         """
-        lock_key = self._lock_key(token)
-        lock_id = uuid.uuid4().hex.encode()
+        try:
+            # Enable keyspace notifications, so we know when a lock is available.
+            await self.redis.config_set(
+                "notify-keyspace-events", self._redis_notify_keyspace_events
+            )
+            db = self.redis.connection_pool.connection_kwargs.get("db", 0)
+            self._lock_pubsub = pubsub = self.redis.pubsub()
+            await pubsub.psubscribe(f"__keyspace@{db}__:*_lock")
+        except BaseException as ex:
+            if isinstance(ex, Exception):
+                ready.set_exception(ex)
+            else:
+                ready.cancel()
+            raise
+        ready.set_result(None)
+        try:
+            async for message in pubsub.listen():
+                if message["type"] != "pmessage":
+                    continue
+                if message["data"] not in self._redis_keyspace_lock_release_events:
+                    continue
+                self.lock_stats.notifications += 1
+                lock_key = message["channel"].split(b":", 1)[1]
+                for waiter in self._lock_waiters.get(lock_key, ()):
+                    if not waiter.done():
+                        waiter.set_result(None)
+        finally:
+            # Wake all waiters to retry, a new listener is started by the next waiter.
+            for waiters in self._lock_waiters.values():
+                for waiter in waiters:
+                    if not waiter.done():
+                        waiter.set_result(None)
 
-        if not await self._try_get_lock(lock_key, lock_id):
-            # Missed the fast-path to get lock, subscribe for lock delete/expire events
-            await self._wait_lock(lock_key, lock_id)
-        state_is_locked = True
+    async def _wait_lock(
+        self, lock_key: bytes, lock_id: bytes, keys: list[str]
+    ) -> list[bytes | None]:
+        """Wait for a redis lock to be released via the shared lock release listener.
 
+        Coroutine will not return until the lock is obtained.
+
+        Args:
+            lock_key: The redis key for the lock.
+            lock_id: The ID of the lock.
+            keys: The state keys to fetch once the lock is obtained.
+
+        Returns:
+            The values of the state keys.
+        """
+        await self._ensure_lock_listener()
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        self.lock_stats.contended += 1
+        self.lock_stats.waiting += 1
         try:
-            yield lock_id
-        except LockExpiredError:
-            state_is_locked = False
-            raise
+            while True:
+                waiter = loop.create_future()
+                waiters = self._lock_waiters.setdefault(lock_key, set())
+                waiters.add(waiter)
+                try:
+                    # Try again now that the release cannot be missed.
+                    redis_states = await self._try_get_lock_and_states(
+                        lock_key, lock_id, keys
+                    )
+                    if redis_states is not None:
+                        return redis_states
+                    # Notifications are not guaranteed, so retry at least once per lock expiration.
+                    with contextlib.suppress(asyncio.TimeoutError):
+                        await asyncio.wait_for(
+                            waiter, timeout=self.lock_expiration / 1000.0
+                        )
+                finally:
+                    waiters.discard(waiter)
+                    if not waiters:
+                        self._lock_waiters.pop(lock_key, None)
         finally:
-            if state_is_locked:
-                # only delete our lock
-                await self.redis.delete(lock_key)
+            wait_time = loop.time() - start
+            self.lock_stats.waiting -= 1
+            self.lock_stats.wait_time += wait_time
+            self.lock_stats.max_wait_time = max(
+                self.lock_stats.max_wait_time, wait_time
+            )
 
     async def close(self):
         """Explicitly close the redis connection and connection_pool.
@@ -1757,6 +2840,15 @@ class StateManagerRedis(StateManager):
 
         Note: Connections will be automatically reopened when needed.
         """
+        if self._lock_listener is not None:
+            self._lock_listener.cancel()
+            with contextlib.suppress(asyncio.CancelledError, RuntimeError):
+                await self._lock_listener
+            self._lock_listener = None
+        if self._lock_pubsub is not None:
+            with contextlib.suppress(RuntimeError):
+                await self._lock_pubsub.reset()
+            self._lock_pubsub = None
         await self.redis.close(close_connection_pool=True)
 
 
@@ -1861,6 +2953,13 @@ class LocalStorage(ClientStorageBase, str):
         return inst
 
 
+# Set the internal attributes of a proxy, rather than of the wrapped object.
+_proxy_setattr = wrapt.ObjectProxy.__setattr__
+
+# Whether values of a type are wrapped in a MutableProxy, by type.
+_mutable_types_cache: Dict[type, bool] = {}
+
+
 class MutableProxy(wrapt.ObjectProxy):
     """A proxy for a mutable object that tracks changes."""
 
@@ -1895,7 +2994,16 @@ class MutableProxy(wrapt.ObjectProxy):
 
     __mutable_types__ = (list, dict, set, Base)
 
-    def __init__(self, wrapped: Any, state: BaseState, field_name: str):
+    # Store the internal attributes in slots, so nested proxies do not allocate a dict.
+    __slots__ = ("_self_state", "_self_field_name", "_self_top_level")
+
+    def __init__(
+        self,
+        wrapped: Any,
+        state: BaseState,
+        field_name: str,
+        top_level: bool = False,
+    ):
         """Create a proxy for a mutable object that tracks changes.
 
         Args:
@@ -1903,10 +3011,14 @@ class MutableProxy(wrapt.ObjectProxy):
             state: The state to mark dirty when the object is changed.
             field_name: The name of the field on the state associated with the
                 wrapped object.
+            top_level: Whether the object is the value of the field itself.
         """
         super().__init__(wrapped)
-        self._self_state = state
-        self._self_field_name = field_name
+        # Nested values are proxied on every access, so skip the checks of __setattr__.
+        _proxy_setattr(self, "_self_state", state)
+        _proxy_setattr(self, "_self_field_name", field_name)
+        # Whether the proxy wraps the var itself, rather than a value nested in it.
+        _proxy_setattr(self, "_self_top_level", top_level)
 
     def _mark_dirty(
         self,
@@ -1928,10 +3040,67 @@ class MutableProxy(wrapt.ObjectProxy):
         Returns:
             The result of the wrapped function.
         """
+        args, kwargs = self._record_patch(wrapped, args, kwargs or {})
         self._self_state.dirty_vars.add(self._self_field_name)
         self._self_state._mark_dirty()
         if wrapped is not None:
-            return wrapped(*args, **(kwargs or {}))
+            return wrapped(*args, **kwargs)
+
+    def _record_patch(
+        self, wrapped: Any, args: tuple, kwargs: dict
+    ) -> tuple[tuple, dict]:
+        """Record the change made by a wrapped function as a patch of the var.
+
+        Appending to a list and setting or deleting the keys of a dict are recorded,
+        so the state can send the change instead of the full value. Any other change
+        sends the full value with the next delta.
+
+        Args:
+            wrapped: The wrapped function.
+            args: The args for the wrapped function.
+            kwargs: The kwargs for the wrapped function.
+
+        Returns:
+            The args and kwargs to call the wrapped function with, with iterators consumed.
+        """
+        state = self._self_state
+        field_name = self._self_field_name
+        patches = state._delta_patches
+        ops = patches.get(field_name)
+        if field_name in state.dirty_vars and ops is None:
+            # The var was already replaced, so the full value is sent anyway.
+            return args, kwargs
+
+        op = None
+        method = getattr(wrapped, "__name__", None)
+        if not self._self_top_level or method is None:
+            pass
+        elif isinstance(self.__wrapped__, list):
+            if method == "append":
+                op = [constants.DeltaPatch.APPEND, [args[0]]]
+            elif method == "extend":
+                args = (list(args[0]),)
+                op = [constants.DeltaPatch.APPEND, args[0]]
+        elif isinstance(self.__wrapped__, dict):
+            if method == "__setitem__":
+                op = [constants.DeltaPatch.SET, {args[0]: args[1]}]
+            elif method == "update":
+                args, kwargs = (dict(*args, **kwargs),), {}
+                op = [constants.DeltaPatch.SET, args[0]]
+            elif method in ("__delitem__", "pop") and args:
+                op = [constants.DeltaPatch.DELETE, [args[0]]]
+
+        if op is None:
+            patches[field_name] = None
+        elif not ops:
+            patches[field_name] = [op]
+        elif ops[-1][0] == op[0]:
+            # Merge consecutive operations of the same kind.
+            last = ops[-1][1]
+            last.update(op[1]) if isinstance(last, dict) else last.extend(op[1])
+        else:
+            ops.append(op)
+        return args, kwargs
 
     def _wrap_recursive(self, value: Any) -> Any:
         """Wrap a value recursively if it is mutable.
@@ -1942,12 +3111,13 @@ class MutableProxy(wrapt.ObjectProxy):
         Returns:
             The wrapped value.
         """
-        if isinstance(value, self.__mutable_types__):
-            return type(self)(
-                wrapped=value,
-                state=self._self_state,
-                field_name=self._self_field_name,
+        is_mutable = _mutable_types_cache.get(type(value))
+        if is_mutable is None:
+            is_mutable = _mutable_types_cache[type(value)] = issubclass(
+                type(value), self.__mutable_types__
             )
+        if is_mutable:
+            return type(self)(value, self._self_state, self._self_field_name)
         return value
 
     def _wrap_recursive_decorator(self, wrapped, instance, args, kwargs) -> Any:
@@ -2017,9 +3187,10 @@ class MutableProxy(wrapt.ObjectProxy):
         Yields:
             Each item value (possibly wrapped in MutableProxy).
         """
-        for value in super().__iter__():
+        wrap_recursive = self._wrap_recursive
+        for value in self.__wrapped__:
             # Recursively wrap mutable items retrieved through this proxy.
-            yield self._wrap_recursive(value)
+            yield wrap_recursive(value)
 
     def __delattr__(self, name):
         """Delete the attribute on the proxied object and mark state dirty.
@@ -2108,6 +3279,8 @@ class ImmutableMutableProxy(MutableProxy):
     to modify the wrapped object when the StateProxy is immutable.
     """
 
+    __slots__ = ()
+
     def _mark_dirty(
         self,
         wrapped=None,
@@ -4,12 +4,14 @@ from __future__ import annotations
 import contextlib
 import dataclasses
 import dis
+import functools
 import inspect
 import json
 import random
 import re
 import string
 import sys
+import time
 from types import CodeType, FunctionType
 from typing import (
     TYPE_CHECKING,
@@ -34,6 +36,7 @@ from typing import (
 import pydantic
 
 from nextpy import constants
+from nextpy.backend.monitor import TimingStats
 from nextpy.base import Base
 from nextpy.frontend import imports
 
@@ -1515,6 +1518,7 @@ class Var:
             else wrapped_var.strip("{}")
         )
 
+
 # Allow automatic serialization of Var within JSON structures
 serializers.serializer(_encode_var)
 
@@ -1648,27 +1652,45 @@ class ComputedVar(Var, property):
     # Whether to track dependencies and cache computed values
     _cache: bool = dataclasses.field(default=False)
 
+    # Whether to evaluate the getter in an executor rather than on the event loop
+    _offload: bool = dataclasses.field(default=False)
+
     def __init__(
         self,
         fget: Callable[[BaseState], Any],
         fset: Callable[[BaseState, Any], None] | None = None,
         fdel: Callable[[BaseState], Any] | None = None,
         doc: str | None = None,
+        offload: bool = False,
         **kwargs,
     ):
         """Initialize a ComputedVar.
 
         Args:
-            fget: The getter function.
+            fget: The getter function, which may be async.
             fset: The setter function.
             fdel: The deleter function.
             doc: The docstring.
+            offload: Whether to evaluate the getter in an executor before sending the delta.
             **kwargs: additional attributes to set on the instance
+
+        Raises:
+            TypeError: If an async getter is offloaded.
         """
         property.__init__(self, fget, fset, fdel, doc)
         kwargs["_var_name"] = kwargs.pop("_var_name", fget.__name__)
         kwargs["_var_type"] = kwargs.pop("_var_type", self._determine_var_type())
         BaseVar.__init__(self, **kwargs)  # type: ignore
+        self._is_async = inspect.iscoroutinefunction(fget)
+        if offload and self._is_async:
+            raise TypeError(
+                f"Computed var {fget.__qualname__} is async, it cannot be offloaded."
+            )
+        self._offload = offload
+        # Whether the state evaluates this var concurrently before computing the delta.
+        self._is_deferred = self._is_async or offload
+        # The time spent evaluating the getter, for all the state instances.
+        self._timing = TimingStats()
 
     @property
     def _cache_attr(self) -> str:
@@ -1684,6 +1706,9 @@ class ComputedVar(Var, property):
 
         If the value is already cached on the instance, return the cached value.
 
+        Async vars cannot be awaited here: they return the value last evaluated by
+        the state before a delta, or None if it was never evaluated.
+
         Args:
             instance: the instance of the class accessing this computed var.
             owner: the class that this descriptor is attached to.
@@ -1691,14 +1716,55 @@ class ComputedVar(Var, property):
         Returns:
             The value of the var for the given instance.
         """
-        if instance is None or not self._cache:
+        if instance is None:
             return super().__get__(instance, owner)
 
+        if self._is_deferred:
+            # use the value evaluated concurrently for the pending delta
+            computed_values = instance.__dict__.get("_computed_values")
+            if computed_values and self._var_name in computed_values:
+                return computed_values[self._var_name]
+            if self._is_async:
+                return getattr(instance, self._cache_attr, None)
+
+        if not self._cache:
+            return self._compute(instance)
+
         # handle caching
         if not hasattr(instance, self._cache_attr):
-            setattr(instance, self._cache_attr, super().__get__(instance, owner))
+            setattr(instance, self._cache_attr, self._compute(instance))
         return getattr(instance, self._cache_attr)
 
+    def _compute(self, instance: BaseState) -> Any:
+        """Evaluate the synchronous getter, recording the time spent.
+
+        Args:
+            instance: the state instance to evaluate the var for.
+
+        Returns:
+            The value of the var.
+        """
+        start = time.perf_counter()
+        try:
+            return self.fget(instance)  # type: ignore
+        finally:
+            self._timing.record(time.perf_counter() - start)
+
+    async def _compute_async(self, instance: BaseState) -> Any:
+        """Evaluate the async getter, recording the time spent.
+
+        Args:
+            instance: the state instance to evaluate the var for.
+
+        Returns:
+            The value of the var.
+        """
+        start = time.perf_counter()
+        try:
+            return await self.fget(instance)  # type: ignore
+        finally:
+            self._timing.record(time.perf_counter() - start)
+
     def _deps(
         self,
         objclass: Type,
@@ -1806,19 +1872,27 @@ class ComputedVar(Var, property):
         return Any
 
 
-def cached_var(fget: Callable[[Any], Any]) -> ComputedVar:
+def cached_var(
+    fget: Callable[[Any], Any] | None = None, *, offload: bool = False
+) -> ComputedVar | Callable[[Callable[[Any], Any]], ComputedVar]:
     """A field with computed getter that tracks other state dependencies.
 
     The cached_var will only be recalculated when other state vars that it
     depends on are modified.
 
+    Can be used as @cached_var or as @cached_var(offload=True), to evaluate an
+    expensive getter in an executor without blocking the event loop.
+
     Args:
         fget: the function that calculates the variable value.
+        offload: whether to evaluate the getter in an executor.
 
     Returns:
-        ComputedVar that is recomputed when dependencies change.
+        ComputedVar that is recomputed when dependencies change, or a decorator creating it.
     """
-    cvar = ComputedVar(fget=fget)
+    if fget is None:
+        return functools.partial(cached_var, offload=offload)
+    cvar = ComputedVar(fget=fget, offload=offload)
     cvar._cache = True
     return cvar
 
@@ -56,8 +56,9 @@ def generate_sitemap_config(deploy_url: str, export=False):
 
     config = json.dumps(config)
 
-    with open(constants.Next.SITEMAP_CONFIG_FILE, "w") as f:
-        f.write(templates.SITEMAP_CONFIG(config=config))
+    path_ops.write_file(
+        constants.Next.SITEMAP_CONFIG_FILE, templates.SITEMAP_CONFIG(config=config)
+    )
 
 
 def _zip(
@@ -0,0 +1,230 @@
+"""Cache the compiled pages, to only recompile the pages that changed."""
+
+from __future__ import annotations
+
+import collections
+import hashlib
+import json
+import os
+from typing import Dict, Iterable, List, Set
+
+from nextpy import constants
+from nextpy.build.compiler import utils
+from nextpy.frontend.components.component import CollectedTree, Component
+
+
+def hash_code(code: str) -> str:
+    """Hash the code of an output file.
+
+    Args:
+        code: The code.
+
+    Returns:
+        The hex digest of the code.
+    """
+    return hashlib.md5(code.encode("utf-8")).hexdigest()
+
+
+def fingerprint_page(component: Component, tree: CollectedTree) -> str:
+    """Fingerprint everything the compiled code of a page is made of.
+
+    Args:
+        component: The page component, styled but not memoized yet.
+        tree: The imports, hooks and custom code of the page component.
+
+    Returns:
+        The hex digest of the page.
+    """
+    return hash_code(
+        "\n".join(
+            [
+                str(component.render()),
+                str(tree.imports),
+                str(sorted(tree.hooks)),
+                str(sorted(tree.custom_code)),
+                str(sorted(tree.dynamic_imports)),
+                str(sorted(tree.refs)),
+            ]
+        )
+    )
+
+
+class CompileCache:
+    """The fingerprints of the compiled pages and the hashes of the output files.
+
+    The cache is saved in the .web directory, as the hot reloads compile the app
+    in a new process. Delete the file to compile all the pages again.
+    """
+
+    def __init__(self, key: str, path: str = constants.COMPILE_CACHE_FILE):
+        """Initialize an empty cache.
+
+        Args:
+            key: The key invalidating the whole cache, e.g. with the Nextpy version.
+            path: The path of the cache file.
+        """
+        self.key = key
+        self.path = path
+        # The previous compilation: the fingerprint of the pages and their references
+        # to stateful components, by route.
+        self.pages: Dict[str, dict] = {}
+        # The hash of the output files of the previous compilation, by path.
+        self.files: Dict[str, str] = {}
+        # The stateful components shared by several pages in the previous compilation.
+        self.shared: List[str] = []
+        # The routes of the pages which did not change since the previous compilation.
+        self.unchanged: Set[str] = set()
+        # The current compilation, saved to the cache file.
+        self.new_pages: Dict[str, dict] = {}
+        self.new_files: Dict[str, str] = {}
+
+    @classmethod
+    def load(cls, key: str, path: str = constants.COMPILE_CACHE_FILE) -> CompileCache:
+        """Load the cache of the previous compilation.
+
+        Args:
+            key: The key invalidating the whole cache.
+            path: The path of the cache file.
+
+        Returns:
+            The cache, empty if the file is missing, invalid or has another key.
+        """
+        cache = cls(key, path)
+        try:
+            with open(path, encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return cache
+        if isinstance(data, dict) and data.get("key") == key:
+            cache.pages = data.get("pages", {})
+            cache.files = data.get("files", {})
+            cache.shared = data.get("shared", [])
+        return cache
+
+    def is_unchanged(self, route: str, fingerprint: str) -> bool:
+        """Check whether a page did not change since the previous compilation.
+
+        Args:
+            route: The route of the page.
+            fingerprint: The fingerprint of the page, see fingerprint_page.
+
+        Returns:
+            Whether the page has the same fingerprint and its compiled code is still
+            in place.
+        """
+        entry = self.pages.get(route)
+        output_path = utils.get_page_path(route)
+        return (
+            entry is not None
+            and entry["fingerprint"] == fingerprint
+            and output_path in self.files
+            and os.path.exists(output_path)
+        )
+
+    def check_page(self, route: str, fingerprint: str) -> bool:
+        """Record the fingerprint of a page and check whether it must be compiled again.
+
+        Args:
+            route: The route of the page.
+            fingerprint: The fingerprint of the page, see fingerprint_page.
+
+        Returns:
+            Whether the page did not change since the previous compilation.
+        """
+        self.new_pages[route] = {"fingerprint": fingerprint, "references": {}}
+        if not self.is_unchanged(route, fingerprint):
+            return False
+        self.unchanged.add(route)
+        return True
+
+    def set_references(self, route: str, references: Dict[str, int]):
+        """Set the references of a compiled page to stateful components.
+
+        Args:
+            route: The route of the page.
+            references: The number of references by tag of stateful component.
+        """
+        self.new_pages.setdefault(route, {})["references"] = references
+
+    def count_references(self, routes: Iterable[str]) -> Dict[str, int]:
+        """Count the references of the pages to stateful components.
+
+        Args:
+            routes: The routes of the pages.
+
+        Returns:
+            The number of references by tag of stateful component, from the previous
+            compilation for the unchanged pages.
+        """
+        references = collections.Counter()
+        for route in routes:
+            entry = self.pages if route in self.unchanged else self.new_pages
+            references.update(entry[route]["references"])
+        return dict(references)
+
+    def keep_shared_components(self, shared: List[str], path: str) -> bool:
+        """Check whether the unchanged pages can be kept with the shared components.
+
+        A page imports the shared stateful components and defines the other ones,
+        so all the pages are compiled again when the shared components changed.
+
+        Args:
+            shared: The stateful components shared by several pages.
+            path: The path of the module of the shared components.
+
+        Returns:
+            Whether the module of the shared components is kept, otherwise none of
+            the pages is unchanged anymore.
+        """
+        if self.unchanged and shared == self.shared and self.keep_file(path):
+            return True
+        for route in self.unchanged:
+            self.set_references(route, self.pages[route]["references"])
+        self.unchanged.clear()
+        return False
+
+    def keep_file(self, path: str) -> bool:
+        """Keep an output file of the previous compilation.
+
+        Args:
+            path: The path of the file.
+
+        Returns:
+            Whether the file was output by the previous compilation and still exists.
+        """
+        if path not in self.files or not os.path.exists(path):
+            return False
+        self.new_files[path] = self.files[path]
+        return True
+
+    def update_file(self, path: str, code: str) -> bool:
+        """Record the code of an output file.
+
+        Args:
+            path: The path of the file.
+            code: The compiled code.
+
+        Returns:
+            Whether the file must be written, as its code changed or it is missing.
+        """
+        code_hash = self.new_files[path] = hash_code(code)
+        return self.files.get(path) != code_hash or not os.path.exists(path)
+
+    def save(self, shared: List[str]):
+        """Save the current compilation for the next one.
+
+        Args:
+            shared: The stateful components shared by several pages.
+        """
+        for route in self.unchanged:
+            self.new_pages[route] = self.pages[route]
+        with open(self.path, "w", encoding="utf-8") as f:
+            json.dump(
+                {
+                    "key": self.key,
+                    "pages": self.new_pages,
+                    "files": self.new_files,
+                    "shared": shared,
+                },
+                f,
+            )
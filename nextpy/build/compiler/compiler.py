@@ -1,14 +1,17 @@
 """Compiler for the nextpy apps."""
 from __future__ import annotations
 
+import collections
 import os
 from pathlib import Path
-from typing import Iterable, Optional, Type
+from typing import Dict, Iterable, List, Optional, Tuple, Type
 
 from nextpy import constants
 from nextpy.build.compiler import templates, utils
+from nextpy.build.compiler.cache import CompileCache
 from nextpy.frontend.components.component import (
     BaseComponent,
+    CollectedTree,
     Component,
     ComponentStyle,
     CustomComponent,
@@ -98,17 +101,18 @@ def _compile_page(
     Returns:
         The compiled component.
     """
-    imports = component.get_imports()
-    imports = utils.compile_imports(imports)
+    # Collect the imports, hooks and custom code of the tree in a single walk.
+    tree = CollectedTree(component)
+    imports = utils.compile_imports(tree.imports)
 
     # Compile the code to render the component.
     kwargs = {"state_name": state.get_name()} if state else {}
 
     return templates.PAGE.render(
         imports=imports,
-        dynamic_imports=component.get_dynamic_imports(),
-        custom_codes=component.get_custom_code(),
-        hooks=component.get_hooks(),
+        dynamic_imports=tree.dynamic_imports,
+        custom_codes=tree.custom_code,
+        hooks=tree.hooks,
         render=component.render(),
         **kwargs,
     )
@@ -203,9 +207,9 @@ def _compile_components(components: set[CustomComponent]) -> str:
     )
 
 
-def _compile_stateful_components(
+def _get_shared_components_code(
     page_components: list[BaseComponent],
-) -> str:
+) -> tuple[list[str], list[ImportDict]]:
     """Walk the page components and extract shared stateful components.
 
     Any StatefulComponent that is shared by more than one page will be rendered
@@ -217,10 +221,12 @@ def _compile_stateful_components(
         page_components: The Components or StatefulComponents to compile.
 
     Returns:
-        The rendered stateful components code.
+        The code of the shared components and their imports.
     """
     all_import_dicts = []
     rendered_components = {}
+    # The tags of the shared components already rendered, as pages share them.
+    rendered_tags = set()
 
     def get_shared_components_recursive(component: BaseComponent):
         """Get the shared components for a component and its children.
@@ -239,13 +245,14 @@ def _compile_stateful_components(
         # When the component is referenced by more than one page, render it
         # to be included in the STATEFUL_COMPONENTS module.
         if isinstance(component, StatefulComponent) and component.references > 1:
-            # Reset this flag to render the actual component.
-            component.rendered_as_shared = False
+            if component.tag not in rendered_tags:
+                rendered_tags.add(component.tag)
+                # Reset this flag to render the actual component.
+                component.rendered_as_shared = False
 
-            rendered_components.update(
-                {code: None for code in component.get_custom_code()},
-            )
-            all_import_dicts.append(component.get_imports())
+                tree = CollectedTree(component)
+                rendered_components.update(dict.fromkeys(tree.custom_code))
+                all_import_dicts.append(tree.imports)
 
             # Indicate that this component now imports from the shared file.
             component.rendered_as_shared = True
@@ -253,18 +260,47 @@ def _compile_stateful_components(
     for page_component in page_components:
         get_shared_components_recursive(page_component)
 
+    return list(rendered_components), all_import_dicts
+
+
+def _render_stateful_components(
+    codes: Iterable[str], import_dicts: list[ImportDict]
+) -> str:
+    """Render the module of the shared stateful components.
+
+    Args:
+        codes: The code of the shared components.
+        import_dicts: The imports of the shared components.
+
+    Returns:
+        The rendered stateful components code.
+    """
     # Don't import from the file that we're about to create.
-    all_imports = utils.merge_imports(*all_import_dicts)
+    all_imports = utils.merge_imports(*import_dicts)
     all_imports.pop(
         f"/{constants.Dirs.UTILS}/{constants.PageNames.STATEFUL_COMPONENTS}", None
     )
 
     return templates.STATEFUL_COMPONENTS.render(
         imports=utils.compile_imports(all_imports),
-        memoized_code="\n".join(rendered_components),
+        memoized_code="\n".join(codes),
     )
 
 
+def _compile_stateful_components(
+    page_components: list[BaseComponent],
+) -> str:
+    """Walk the page components and compile the shared stateful components.
+
+    Args:
+        page_components: The Components or StatefulComponents to compile.
+
+    Returns:
+        The rendered stateful components code.
+    """
+    return _render_stateful_components(*_get_shared_components_code(page_components))
+
+
 def _compile_tailwind(
     config: dict,
 ) -> str:
@@ -390,27 +426,107 @@ def compile_components(components: set[CustomComponent]):
     return output_path, code
 
 
+def get_stateful_references(component: BaseComponent) -> Dict[str, int]:
+    """Count the references of a memoized component tree to stateful components.
+
+    Args:
+        component: The memoized component.
+
+    Returns:
+        The number of references by tag of stateful component.
+    """
+    references = collections.Counter()
+
+    def count_recursive(component: BaseComponent):
+        for child in component.children:
+            count_recursive(child)
+        if isinstance(component, StatefulComponent):
+            references[component.tag] += 1
+
+    count_recursive(component)
+    return dict(references)
+
+
+def get_shared_components(references: Dict[str, int]) -> List[str]:
+    """Get the stateful components referenced more than once in the app.
+
+    Args:
+        references: The number of references by tag of stateful component.
+
+    Returns:
+        The sorted tags of the shared components.
+    """
+    return sorted(tag for tag, count in references.items() if count > 1)
+
+
+def set_stateful_references(references: Dict[str, int]):
+    """Set the references of the stateful components to the counts of the whole app.
+
+    Args:
+        references: The number of references by tag of stateful component.
+    """
+    for tag, stateful_component in StatefulComponent.tag_to_stateful_component.items():
+        stateful_component.references = references.get(tag, 0)
+        stateful_component.rendered_as_shared = False
+
+
 def compile_stateful_components(
-    pages: Iterable[Component],
-) -> tuple[str, str, list[BaseComponent]]:
+    pages: Dict[str, Component],
+    cache: CompileCache | None = None,
+) -> Tuple[str, Optional[str], Dict[str, BaseComponent], List[str]]:
     """Separately compile components that depend on State vars.
 
     StatefulComponents are compiled as their own component functions with their own
     useContext declarations, which allows page components to be stateless and avoid
     re-rendering along with parts of the page that actually depend on state.
 
+    The unchanged pages of the cache are not memoized, their references to stateful
+    components come from the previous compilation.
+
     Args:
-        pages: The pages to extract stateful components from.
+        pages: The pages to extract stateful components from, by route.
+        cache: The cache of the previous compilation.
 
     Returns:
-        The path and code of the compiled stateful components.
+        The path and code of the compiled stateful components (None when kept from the
+        previous compilation), the memoized components of the pages to compile by
+        route, and the tags of the shared components.
     """
     output_path = utils.get_stateful_components_path()
+    if cache is None:
+        cache = CompileCache(key="")
+
+    def memoize(routes: Iterable[str]) -> Dict[str, BaseComponent]:
+        memoized = {}
+        for route in routes:
+            memoized[route] = (
+                StatefulComponent.compile_from(pages[route]) or pages[route]
+            )
+            cache.set_references(route, get_stateful_references(memoized[route]))  # type: ignore
+        return memoized
+
+    # Memoize the stateful components of the pages that changed.
+    page_components = memoize(route for route in pages if route not in cache.unchanged)
+    references = cache.count_references(pages)
+    shared = get_shared_components(references)
+    if not cache.keep_shared_components(shared, output_path):
+        page_components.update(
+            memoize(route for route in pages if route not in page_components)
+        )
+
+    # Count the references from all the pages, including the ones from previous compilations.
+    set_stateful_references(references)
+
+    if cache.unchanged:
+        # The shared components did not change, only import them from the existing module.
+        for tag in shared:
+            if tag in StatefulComponent.tag_to_stateful_component:
+                StatefulComponent.tag_to_stateful_component[tag].rendered_as_shared = True
+        return output_path, None, page_components, shared
 
     # Compile the stateful components.
-    page_components = [StatefulComponent.compile_from(page) or page for page in pages]
-    code = _compile_stateful_components(page_components)
-    return output_path, code, page_components
+    code = _compile_stateful_components(list(page_components.values()))
+    return output_path, code, page_components, shared
 
 
 def compile_tailwind(
@@ -432,6 +548,21 @@ def compile_tailwind(
     return output_path, code
 
 
-def purge_web_pages_dir():
-    """Empty out .web directory."""
-    utils.empty_dir(constants.Dirs.WEB_PAGES, keep_files=["_app.js"])
+def purge_web_pages_dir(keep_files: Iterable[str] = ()):
+    """Empty out .web directory.
+
+    Args:
+        keep_files: The paths of the files to keep, along with _app.js.
+    """
+    if not keep_files:
+        utils.empty_dir(constants.Dirs.WEB_PAGES, keep_files=["_app.js"])
+        return
+    keep = {os.path.normpath(path) for path in keep_files}
+    keep.add(os.path.normpath(utils.get_page_path(constants.PageNames.APP_ROOT)))
+    for root, _, files in os.walk(constants.Dirs.WEB_PAGES, topdown=False):
+        for file in files:
+            path = os.path.normpath(os.path.join(root, file))
+            if path not in keep:
+                os.remove(path)
+        if root != constants.Dirs.WEB_PAGES and not os.listdir(root):
+            os.rmdir(root)
@@ -0,0 +1,215 @@
+"""Compile the pages of an app in worker processes."""
+
+from __future__ import annotations
+
+import gc
+import multiprocessing
+import traceback
+from multiprocessing.connection import Connection
+from typing import Dict, List, Optional, Tuple, Type
+
+from nextpy.backend.state import BaseState
+from nextpy.build.compiler import compiler
+from nextpy.build.compiler.cache import CompileCache, fingerprint_page
+from nextpy.frontend.components.component import (
+    BaseComponent,
+    CollectedTree,
+    Component,
+    StatefulComponent,
+)
+from nextpy.frontend.imports import ImportDict
+
+
+def can_fork() -> bool:
+    """Check whether the worker processes can be forked on this platform.
+
+    Returns:
+        Whether the fork start method is available.
+    """
+    return "fork" in multiprocessing.get_all_start_methods()
+
+
+def _run_worker(
+    pages: Dict[str, Component],
+    state: Optional[Type[BaseState]],
+    cache: CompileCache,
+    conn: Connection,
+):
+    """Memoize and compile pages in a forked process.
+
+    The worker inherits the styled pages of the app, so only routes and compiled
+    code go through the connection. It first sends the imports, fingerprint and
+    references to stateful components of each page, then receives the references
+    of the whole app with the routes to compile, and sends back the compiled pages
+    along with the code of the shared components they use.
+
+    Args:
+        pages: The pages of the worker, by route.
+        state: The app state.
+        cache: The cache of the previous compilation.
+        conn: The connection to the parent process.
+    """
+    try:
+        memoized: Dict[str, BaseComponent] = {}
+        results = []
+        for route, component in pages.items():
+            tree = CollectedTree(component)
+            fingerprint = fingerprint_page(component, tree)
+            references = None
+            if not cache.is_unchanged(route, fingerprint):
+                memoized[route] = StatefulComponent.compile_from(component) or component
+                references = compiler.get_stateful_references(memoized[route])
+            results.append((route, tree.imports, fingerprint, references))
+        conn.send(results)
+
+        references, routes = conn.recv()
+        for route in routes:
+            if route not in memoized:
+                memoized[route] = (
+                    StatefulComponent.compile_from(pages[route]) or pages[route]
+                )
+        compiler.set_stateful_references(references)
+        page_components = [memoized[route] for route in routes]
+        codes, import_dicts = compiler._get_shared_components_code(page_components)
+        compiled = [
+            compiler.compile_page(route, memoized[route], state) for route in routes
+        ]
+        conn.send((compiled, codes, import_dicts))
+    except Exception:
+        conn.send(RuntimeError(traceback.format_exc()))
+    finally:
+        conn.close()
+
+
+class PageWorkers:
+    """Processes memoizing and compiling the pages of an app.
+
+    Rendering the pages is CPU bound, so the threads of the compiler do not run
+    in parallel. The workers are forked with the pages of the app, which do not
+    need to be pickled, and each one compiles a share of the routes.
+    """
+
+    def __init__(
+        self,
+        pages: Dict[str, Component],
+        state: Optional[Type[BaseState]],
+        cache: CompileCache,
+        processes: int,
+    ):
+        """Fork the worker processes.
+
+        Fork them before starting any thread.
+
+        Args:
+            pages: The pages of the app, styled, by route.
+            state: The app state.
+            cache: The cache of the previous compilation.
+            processes: The number of processes.
+        """
+        self.cache = cache
+        context = multiprocessing.get_context("fork")
+        # Keep the garbage collector of the workers off the pages inherited from the app.
+        gc.freeze()
+        routes = list(pages)
+        # The routes compiled by each worker, with the connection to the worker.
+        self.workers: List[Tuple[List[str], Connection, multiprocessing.Process]] = []
+        for i in range(min(processes, len(routes))):
+            worker_routes = routes[i::processes]
+            conn, worker_conn = context.Pipe()
+            process = context.Process(
+                target=_run_worker,
+                args=(
+                    {route: pages[route] for route in worker_routes},
+                    state,
+                    cache,
+                    worker_conn,
+                ),
+            )
+            process.start()
+            worker_conn.close()
+            self.workers.append((worker_routes, conn, process))
+        gc.unfreeze()
+
+    @staticmethod
+    def _receive(conn: Connection):
+        """Receive a message from a worker.
+
+        Args:
+            conn: The connection to the worker.
+
+        Returns:
+            The message.
+
+        Raises:
+            RuntimeError: When the worker failed.
+        """
+        message = conn.recv()
+        if isinstance(message, Exception):
+            raise message
+        return message
+
+    def memoize(self) -> Dict[str, ImportDict]:
+        """Wait for the workers to memoize the pages, and record them in the cache.
+
+        Returns:
+            The imports of the pages, by route.
+        """
+        page_imports = {}
+        for _, conn, _ in self.workers:
+            for route, imports, fingerprint, references in self._receive(conn):
+                page_imports[route] = imports
+                self.cache.check_page(route, fingerprint)
+                if references is not None:
+                    self.cache.set_references(route, references)
+        return page_imports
+
+    def compile(
+        self, stateful_components_path: str
+    ) -> Tuple[Optional[str], List[Tuple[str, str]], List[str]]:
+        """Compile the pages that changed in the workers.
+
+        Args:
+            stateful_components_path: The path of the module of the shared components.
+
+        Returns:
+            The code of the shared stateful components (None when kept from the
+            previous compilation), the paths and code of the compiled pages, and the
+            tags of the shared components.
+        """
+        routes = [
+            route for worker_routes, _, _ in self.workers for route in worker_routes
+        ]
+        references = self.cache.count_references(routes)
+        shared = compiler.get_shared_components(references)
+        keep_shared = self.cache.keep_shared_components(
+            shared, stateful_components_path
+        )
+        for worker_routes, conn, _ in self.workers:
+            conn.send(
+                (
+                    references,
+                    [r for r in worker_routes if r not in self.cache.unchanged],
+                )
+            )
+
+        compiled = []
+        codes = {}
+        import_dicts = []
+        for _, conn, _ in self.workers:
+            worker_compiled, worker_codes, worker_import_dicts = self._receive(conn)
+            compiled.extend(worker_compiled)
+            codes.update(dict.fromkeys(worker_codes))
+            import_dicts.extend(worker_import_dicts)
+
+        if keep_shared:
+            return None, compiled, shared
+        code = compiler._render_stateful_components(codes, import_dicts)
+        return code, compiled, shared
+
+    def close(self):
+        """Stop the workers, which are done or waiting after an error of the app."""
+        for _, conn, process in self.workers:
+            conn.close()
+            if process.is_alive():
+                process.terminate()
+            process.join()
@@ -418,16 +418,17 @@ def add_meta(
     return page
 
 
-def write_page(path: str, code: str):
-    """Write the given code to the given path.
+def write_page(path: str, code: str) -> bool:
+    """Write the given code to the given path, unless the file already has it.
 
     Args:
         path: The path to write the code to.
         code: The code to write.
+
+    Returns:
+        Whether the file was written.
     """
-    path_ops.mkdir(os.path.dirname(path))
-    with open(path, "w", encoding="utf-8") as f:
-        f.write(code)
+    return path_ops.write_file(path, code)
 
 
 def empty_dir(path: str, keep_files: list[str] | None = None):
@@ -158,9 +158,48 @@ class Config(Base):
     # The database url.
     db_url: Optional[str] = "sqlite:///nextpy.db"
 
+    # The url of the database with an async driver, derived from db_url when unset.
+    async_db_url: Optional[str] = None
+
+    # The number of connections kept in the pool of the database engines.
+    db_pool_size: Optional[int] = None
+
+    # The number of connections opened beyond the pool size under load.
+    db_max_overflow: Optional[int] = None
+
+    # The age after which a connection of the pool is replaced (s).
+    db_pool_recycle: Optional[int] = None
+
     # The redis url.
     redis_url: Optional[str] = None
 
+    # Whether to store each substate under its own redis key, so events only load
+    # and write the substates they need instead of the whole state tree.
+    redis_substate_keys: bool = False
+
+    # Without redis, the maximum number of client states kept in memory (None for no limit).
+    state_max_sessions: Optional[int] = None
+
+    # Without redis, the time after which an idle client state is evicted from memory (s).
+    state_idle_timeout: Optional[int] = None
+
+    # Without redis, the directory evicted client states are written to and restored from.
+    state_spill_dir: Optional[str] = None
+
+    # The minimum length of a list or dict var to send appends and key changes as patches
+    # in the state updates, instead of the full value (None to always send the full value).
+    delta_patch_min_length: Optional[int] = None
+
+    # The number of threads synchronous event handlers run in by default, so slow
+    # handlers do not block the event loop (None to run them on the event loop).
+    sync_handler_threads: Optional[int] = None
+
+    # The event loop lag above which a warning is logged (seconds, None to never warn).
+    event_loop_lag_warning: Optional[float] = None
+
+    # Whether to measure the stages of the event processing and serve them at /metrics.
+    metrics_enabled: bool = False
+
     # Telemetry opt-in.
     telemetry_enabled: bool = True
 
@@ -173,6 +212,9 @@ class Config(Base):
     # Tailwind config.
     tailwind: Optional[Dict[str, Any]] = {}
 
+    # The number of processes compiling the pages, by default they are compiled in threads.
+    compile_processes: Optional[int] = None
+
     # Timeout when launching the gunicorn server. TODO(rename this to backend_timeout?)
     timeout: int = 120
 
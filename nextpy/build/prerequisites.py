@@ -432,9 +432,7 @@ def update_next_config(export=False):
 
     next_config = _update_next_config(get_config(), export=export)
 
-    with open(next_config_file, "w") as file:
-        file.write(next_config)
-        file.write("\n")
+    path_ops.write_file(next_config_file, next_config + "\n")
 
 
 def _update_next_config(config, export=False):
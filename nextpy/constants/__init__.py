@@ -18,6 +18,7 @@ from .base import (
     Templates,
 )
 from .compiler import (
+    COMPILE_CACHE_FILE,
     NOCOMPILE_FILE,
     SETTER_PREFIX,
     CompileVars,
@@ -40,7 +41,7 @@ from .config import (
 from .custom_components import (
     CustomComponents,
 )
-from .event import Endpoint, EventTriggers, SocketEvent
+from .event import DeltaPatch, Endpoint, EventTriggers, SocketEvent
 from .hosting import Hosting
 from .installer import (
     Bun,
@@ -67,9 +68,11 @@ __ALL__ = [
     Bun,
     ColorMode,
     Config,
+    COMPILE_CACHE_FILE,
     COOKIES,
     ComponentName,
     DefaultPage,
+    DeltaPatch,
     Dirs,
     Endpoint,
     Env,
@@ -13,6 +13,9 @@ SETTER_PREFIX = "set_"
 # The file used to specify no compilation.
 NOCOMPILE_FILE = ".web/nocompile"
 
+# The file caching the fingerprints of the compiled pages and the hashes of the outputs.
+COMPILE_CACHE_FILE = ".web/compile_cache.json"
+
 
 class Ext(SimpleNamespace):
     """Extension used in Nextpy."""
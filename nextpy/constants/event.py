@@ -9,6 +9,7 @@ class Endpoint(Enum):
     PING = "ping"
     EVENT = "_event"
     UPLOAD = "_upload"
+    METRICS = "metrics"
 
     def __str__(self) -> str:
         """Get the string representation of the endpoint.
@@ -55,6 +56,19 @@ class SocketEvent(SimpleNamespace):
         return str(self.value)
 
 
+class DeltaPatch(SimpleNamespace):
+    """Patches sent in a delta in place of the full value of a large list or dict var."""
+
+    # The key of the operations in the patch object.
+    KEY = "__nextpy_patch__"
+    # Append items to a list.
+    APPEND = "append"
+    # Set keys of a dict.
+    SET = "set"
+    # Delete keys of a dict.
+    DELETE = "delete"
+
+
 class EventTriggers(SimpleNamespace):
     """All trigger names used in Nextpy."""
 
@@ -2,7 +2,7 @@
 import json
 import os
 import uuid
-from typing import Any, Dict, List, Optional, Type, TypeVar
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Type, TypeVar
 
 from filelock import FileLock
 from sqlmodel import SQLModel
@@ -82,15 +82,27 @@ class JsonDatabase:
     This class supports basic CRUD (Create, Read, Update, Delete) operations
     on a JSON file, utilizing SQLModel for data validation and schema definition.
 
+    By default, every operation reads the whole file and every change rewrites it.
+    With `append_only=True`, the records are kept in memory, indexed by ID and by
+    the `indexes` fields, and the changes are appended to a log next to the file
+    (`<filename>.log`), which is compacted into the file every `compact_every`
+    changes. Other processes sharing the files see the changes, as the log is
+    replayed under the file lock before each operation.
+
     Attributes:
         filename (str): Name of the json file to be used.
         model (Type[T]): SQLModel for data validation.
         id_fieldname (str): Field name for the ID, optional.
         lock (filelock.FileLock): File lock for handling concurrency issues.
+        append_only (bool): Whether the changes are appended to a log.
+        indexes (Tuple[str, ...]): Fields indexed for queries, in append-only mode.
+        compact_every (int): Number of logged changes before a compaction.
 
     Methods:
         add(instance: T) -> T
             Adds a data instance into the database.
+        add_many(instances: Iterable[T]) -> List[T]
+            Adds data instances into the database at once.
         query(**kwargs) -> List[T]
             Query over the database with given parameters.
         get(id_value: int) -> Optional[T]
@@ -99,6 +111,10 @@ class JsonDatabase:
             Deletes an instance from the database by its id.
         update(id_value: int, new_data: Dict[str, Any]) -> None
             Updates an instance in the database by its id.
+        update_many(updates: Dict[int, Dict[str, Any]]) -> None
+            Updates instances in the database by their ids at once.
+        compact() -> None
+            Writes the records to the file and empties the log, in append-only mode.
 
     Example Usage:
         # Define a User model using SQLModel
@@ -111,6 +127,9 @@ class JsonDatabase:
         # Initialize the JSON database with the User model
         db = JsonDatabase('users.json', model=User)
 
+        # Or keep the users in memory, indexed by username, and log the changes
+        db = JsonDatabase('users.json', model=User, append_only=True, indexes=["username"])
+
         # Create a new user and add to the database
         new_user = User(username="johndoe", email="john@example.com", password="securepassword123")
         db.add(new_user)
@@ -123,18 +142,51 @@ class JsonDatabase:
         db.update(new_user.id, {"password": "newpassword123"})
     """
 
-    def __init__(self, filename: str, model: Type[T], id_fieldname: str = "id") -> None:
+    def __init__(
+        self,
+        filename: str,
+        model: Type[T],
+        id_fieldname: str = "id",
+        append_only: bool = False,
+        indexes: Iterable[str] = (),
+        compact_every: int = 1000,
+    ) -> None:
         """Initializes the JsonDatabase object.
 
         Args:
             filename (str): The JSON file name for the database.
             model (Type[T]): The SQLModel class for data validation.
             id_fieldname (str): The ID field name (defaults to "id").
+            append_only (bool): Whether to keep the records in memory and append the
+                changes to a log (defaults to False).
+            indexes (Iterable[str]): The fields to index for queries, in append-only mode.
+            compact_every (int): The number of logged changes before the log is
+                compacted into the file (defaults to 1000).
+
+        Raises:
+            ValueError: If indexes are declared without the append-only mode.
         """
         self.filename = filename
         self.model = model
         self.id_fieldname = id_fieldname
         self.lock = FileLock(f"{filename}.lock")
+        self.append_only = append_only
+        self.indexes = tuple(indexes)
+        if self.indexes and not append_only:
+            raise ValueError("Indexes require append_only=True.")
+        self.compact_every = compact_every
+        self.log_filename = f"{filename}.log"
+        # In append-only mode, the records by ID, in insertion order.
+        self._records: Dict[Any, Dict[str, Any]] = {}
+        # The IDs of the records by value, for each indexed field.
+        self._index: Dict[str, Dict[Any, Dict[Any, None]]] = {
+            field: {} for field in self.indexes
+        }
+        # The size of the log replayed so far, and its number of changes.
+        self._log_offset = 0
+        self._log_changes = 0
+        # The stat of the file when it was loaded, to reload it after a compaction.
+        self._file_stat: Optional[Tuple[int, int, int]] = None
         self._create_db()
 
     def _create_db(self) -> None:
@@ -169,6 +221,163 @@ class JsonDatabase:
         with self.lock, open(self.filename, "w") as db_file:
             json.dump(data, db_file, indent=2)
 
+    @staticmethod
+    def _index_key(value: Any) -> Any:
+        """Gets the key of a value in an index.
+
+        Args:
+            value (Any): The value of an indexed field.
+
+        Returns:
+            Any: The value, or its JSON encoding if it is not hashable.
+        """
+        try:
+            hash(value)
+        except TypeError:
+            return json.dumps(value, sort_keys=True)
+        return value
+
+    def _put_record(self, record: Dict[str, Any]) -> None:
+        """Puts a record in memory, replacing the record with the same ID.
+
+        Args:
+            record (Dict[str, Any]): The record.
+        """
+        id_value = record[self.id_fieldname]
+        self._remove_record(id_value)
+        self._records[id_value] = record
+        for field, index in self._index.items():
+            key = self._index_key(record.get(field))
+            index.setdefault(key, {})[id_value] = None
+
+    def _remove_record(self, id_value: Any) -> None:
+        """Removes a record from memory, if present.
+
+        Args:
+            id_value (Any): The ID of the record.
+        """
+        record = self._records.pop(id_value, None)
+        if record is None:
+            return
+        for field, index in self._index.items():
+            key = self._index_key(record.get(field))
+            ids = index[key]
+            del ids[id_value]
+            if not ids:
+                del index[key]
+
+    def _stat_file(self) -> Optional[Tuple[int, int, int]]:
+        """Gets the stat of the JSON file identifying its version.
+
+        Returns:
+            Optional[Tuple[int, int, int]]: The inode, modification time and size.
+        """
+        try:
+            stat = os.stat(self.filename)
+        except FileNotFoundError:
+            return None
+        return stat.st_ino, stat.st_mtime_ns, stat.st_size
+
+    def _sync(self) -> None:
+        """Loads the changes made since the last operation, under the file lock.
+
+        The JSON file is loaded again after a compaction, otherwise only the new
+        changes of the log are replayed.
+        """
+        try:
+            log_size = os.path.getsize(self.log_filename)
+        except FileNotFoundError:
+            log_size = 0
+        if self._stat_file() != self._file_stat or log_size < self._log_offset:
+            with open(self.filename, "r") as db_file:
+                records = json.load(db_file)["data"]
+            self._records.clear()
+            for index in self._index.values():
+                index.clear()
+            for record in records:
+                self._put_record(record)
+            self._file_stat = self._stat_file()
+            self._log_offset = 0
+            self._log_changes = 0
+        if log_size == self._log_offset:
+            return
+        with open(self.log_filename, "rb") as log_file:
+            log_file.seek(self._log_offset)
+            for line in log_file:
+                # Stop at a change being written, or cut by a crash.
+                if not line.endswith(b"\n"):
+                    break
+                self._apply(json.loads(line))
+                self._log_offset += len(line)
+                self._log_changes += 1
+
+    def _apply(self, change: Dict[str, Any]) -> None:
+        """Applies a change of the log to the records in memory.
+
+        Args:
+            change (Dict[str, Any]): The new version of a record under "put", or
+                the ID of a deleted record under "delete".
+        """
+        if "put" in change:
+            self._put_record(change["put"])
+        else:
+            self._remove_record(change["delete"])
+
+    def _log(self, changes: List[Dict[str, Any]]) -> None:
+        """Appends changes to the log and applies them, under the file lock.
+
+        Args:
+            changes (List[Dict[str, Any]]): The changes, see _apply.
+        """
+        lines = "".join(json.dumps(change) + "\n" for change in changes)
+        with open(self.log_filename, "ab") as log_file:
+            self._log_offset += log_file.write(lines.encode("utf-8"))
+        for change in changes:
+            self._apply(change)
+        self._log_changes += len(changes)
+        if self._log_changes >= self.compact_every:
+            self._compact()
+
+    def _compact(self) -> None:
+        """Writes the records to the JSON file and empties the log, under the file lock.
+
+        The file is replaced atomically. Replaying the log again after a crash before
+        it is emptied gives the same records.
+        """
+        tmp_filename = f"{self.filename}.tmp"
+        with open(tmp_filename, "w") as db_file:
+            json.dump({"data": list(self._records.values())}, db_file)
+        os.replace(tmp_filename, self.filename)
+        with open(self.log_filename, "w") as log_file:
+            log_file.truncate()
+        self._file_stat = self._stat_file()
+        self._log_offset = 0
+        self._log_changes = 0
+
+    def compact(self) -> None:
+        """Writes the records to the JSON file and empties the log, in append-only mode."""
+        if not self.append_only:
+            return
+        with self.lock:
+            self._sync()
+            self._compact()
+
+    def _check_instance(self, instance: T) -> Dict[str, Any]:
+        """Checks the type of an instance to add and gets its record.
+
+        Args:
+            instance (T): The data instance to be added.
+
+        Returns:
+            Dict[str, Any]: The record of the instance.
+
+        Raises:
+            ValueError: If the instance is not of the correct model type.
+        """
+        if not isinstance(instance, self.model):
+            raise ValueError(f"Instance must be of type {self.model.__name__}.")
+        return instance.model_dump()
+
     def add(self, instance: T) -> T:
         """Adds a new data instance into the database.
 
@@ -181,22 +390,72 @@ class JsonDatabase:
         Raises:
             ValueError: If the instance is not of the correct model type or if the ID already exists.
         """
-        data = self._read_data()
-        if not isinstance(instance, self.model):
-            raise ValueError(f"Instance must be of type {self.model.__name__}.")
-        instance_data = instance.model_dump()
-        if instance_data.get(self.id_fieldname) is None:
-            instance_data[self.id_fieldname] = self._get_id()
+        return self.add_many([instance])[0]
+
+    def add_many(self, instances: Iterable[T]) -> List[T]:
+        """Adds new data instances into the database, writing them at once.
+
+        Args:
+            instances (Iterable[T]): The data instances to be added.
+
+        Returns:
+            List[T]: The added data instances, with IDs assigned.
+
+        Raises:
+            ValueError: If an instance is not of the correct model type or if an ID already exists.
+        """
+        instances = list(instances)
+        records = [self._check_instance(instance) for instance in instances]
+        with self.lock:
+            if self.append_only:
+                self._sync()
+                existing_ids = self._records.keys()
+            else:
+                data = self._read_data()
+                existing_ids = {d.get(self.id_fieldname) for d in data["data"]}
+            new_ids = set()
+            for record in records:
+                if record.get(self.id_fieldname) is None:
+                    record[self.id_fieldname] = self._get_id()
+                elif (
+                    record[self.id_fieldname] in existing_ids
+                    or record[self.id_fieldname] in new_ids
+                ):
+                    raise ValueError(f"ID {record[self.id_fieldname]} already exists.")
+                new_ids.add(record[self.id_fieldname])
+            if self.append_only:
+                self._log([{"put": record} for record in records])
+            else:
+                data["data"].extend(records)
+                self._write_data(data)
+        for instance, record in zip(instances, records):
+            setattr(instance, self.id_fieldname, record[self.id_fieldname])
+        return instances
+
+    def _query_records(self, **kwargs) -> List[Dict[str, Any]]:
+        """Queries the records in memory, using the indexes of the fields.
+
+        Args:
+            **kwargs: Field names and values for the query.
+
+        Returns:
+            List[Dict[str, Any]]: The records matching the query.
+        """
+        indexed = [field for field in kwargs if field in self._index]
+        if not indexed:
+            records: Iterable[Dict[str, Any]] = self._records.values()
         else:
-            existing_ids = [d.get(self.id_fieldname) for d in data["data"]]
-            if instance_data[self.id_fieldname] in existing_ids:
-                raise ValueError(
-                    f"ID {instance_data[self.id_fieldname]} already exists."
-                )
-        data["data"].append(instance_data)
-        self._write_data(data)
-        instance.id = instance_data[self.id_fieldname]  # type: ignore
-        return instance
+            candidates = [
+                self._index[field].get(self._index_key(kwargs[field]), {})
+                for field in indexed
+            ]
+            smallest = min(candidates, key=len)
+            records = (self._records[id_value] for id_value in smallest)
+        return [
+            record
+            for record in records
+            if all(record.get(k) == v for k, v in kwargs.items())
+        ]
 
     def query(self, **kwargs) -> List[T]:
         """Queries the database with the given parameters.
@@ -207,6 +466,12 @@ class JsonDatabase:
         Returns:
             List[T]: A list of instances that match the query.
         """
+        if self.append_only:
+            with self.lock:
+                self._sync()
+                filtered_data = self._query_records(**kwargs)
+            return [self.model(**record) for record in filtered_data]  # type: ignore
+
         data = self._read_data()["data"]
         if not kwargs:
             return [self.model(**record) for record in data]  # type: ignore
@@ -236,6 +501,14 @@ class JsonDatabase:
                 f"Expected id_value to be an int, got {type(id_value).__name__} instead."
             )
 
+        if self.append_only:
+            with self.lock:
+                self._sync()
+                record = self._records.get(id_value)
+            if record is None:
+                raise IdNotFoundError(f"Id {id_value!r} does not exist.")
+            return self.model(**record)  # type: ignore
+
         data = self._read_data()["data"]
         for record in data:
             if record.get(self.id_fieldname) == id_value:
@@ -258,6 +531,14 @@ class JsonDatabase:
                 f"Expected id_value to be an int, got {type(id_value).__name__} instead."
             )
 
+        if self.append_only:
+            with self.lock:
+                self._sync()
+                if id_value not in self._records:
+                    raise IdNotFoundError(f"Id {id_value} does not exist.")
+                self._log([{"delete": id_value}])
+            return
+
         data = self._read_data()
         original_count = len(data["data"])
         data["data"] = [
@@ -280,21 +561,49 @@ class JsonDatabase:
             TypeError: If id_value is not an integer.
             IdNotFoundError: If no instance with the given ID is found.
         """
-        if not isinstance(id_value, int):
-            raise TypeError(
-                f"Expected id_value to be an int, got {type(id_value).__name__} instead."
-            )
+        self.update_many({id_value: new_data})
 
-        data = self._read_data()
-        item_updated = False
-        for record in data["data"]:
-            if record.get(self.id_fieldname) == id_value:
-                record.update(new_data)
-                item_updated = True
-                break
-        if not item_updated:
-            raise IdNotFoundError(f"Id {id_value!r} not found.")
-        self._write_data(data)
+    def update_many(self, updates: Dict[int, Dict[str, Any]]) -> None:
+        """Updates instances in the database by their IDs, writing them at once.
+
+        Args:
+            updates (Dict[int, Dict[str, Any]]): New values for the instance fields,
+                by ID of the instance.
+
+        Raises:
+            TypeError: If an ID is not an integer.
+            IdNotFoundError: If no instance with one of the IDs is found, in which
+                case none of the instances is updated.
+        """
+        for id_value in updates:
+            if not isinstance(id_value, int):
+                raise TypeError(
+                    f"Expected id_value to be an int, got {type(id_value).__name__} instead."
+                )
+
+        with self.lock:
+            if self.append_only:
+                self._sync()
+                records = self._records
+            else:
+                data = self._read_data()
+                records = {
+                    record.get(self.id_fieldname): record for record in data["data"]
+                }
+            for id_value in updates:
+                if id_value not in records:
+                    raise IdNotFoundError(f"Id {id_value!r} not found.")
+            if self.append_only:
+                self._log(
+                    [
+                        {"put": {**records[id_value], **new_data}}
+                        for id_value, new_data in updates.items()
+                    ]
+                )
+                return
+            for id_value, new_data in updates.items():
+                records[id_value].update(new_data)
+            self._write_data(data)
 
     def add_from_json(self, data: Dict[str, Any]) -> Any:
         """Adds an entry to the database from a JSON-style dictionary.
@@ -5,7 +5,7 @@ from __future__ import annotations
 import os
 from collections import defaultdict
 from pathlib import Path
-from typing import Any, Optional
+from typing import Any, Dict, Optional
 
 import alembic.autogenerate
 import alembic.command
@@ -17,16 +17,61 @@ import alembic.util
 import sqlalchemy
 import sqlalchemy.orm
 import sqlmodel
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 from nextpy import constants
 from nextpy.base import Base
 from nextpy.build.config import get_config
 from nextpy.utils import console
 
+# The engines by database url, each one with its connection pool.
+_engines: Dict[str, sqlalchemy.engine.Engine] = {}
+_async_engines: Dict[str, AsyncEngine] = {}
 
-def get_engine(url: str | None = None):
+# The async drivers of the dialects, to derive the async url from the database url.
+ASYNC_DRIVERS = {
+    "sqlite": "aiosqlite",
+    "postgresql": "asyncpg",
+    "mysql": "aiomysql",
+}
+
+
+def _get_engine_args(url: str) -> Dict[str, Any]:
+    """Get the arguments to create the engine of a database.
+
+    Args:
+        url: The database url.
+
+    Returns:
+        The keyword arguments of create_engine.
+    """
+    conf = get_config()
+    if not Path(constants.ALEMBIC_CONFIG).exists():
+        console.warn(
+            "Database is not initialized, run [bold]nextpy db init[/bold] first."
+        )
+    # Print the SQL queries if the log level is INFO or lower.
+    echo_db_query = os.environ.get("SQLALCHEMY_ECHO") == "True"
+    # Needed for the admin dash on sqlite.
+    connect_args = {"check_same_thread": False} if url.startswith("sqlite") else {}
+    pool_args = {
+        "pool_size": conf.db_pool_size,
+        "max_overflow": conf.db_max_overflow,
+        "pool_recycle": conf.db_pool_recycle,
+    }
+    return {
+        "echo": echo_db_query,
+        "connect_args": connect_args,
+        **{name: value for name, value in pool_args.items() if value is not None},
+    }
+
+
+def get_engine(url: str | None = None) -> sqlalchemy.engine.Engine:
     """Get the database engine.
 
+    The engine is created once per url, and its connections are pooled.
+
     Args:
         url: the DB url to use.
 
@@ -36,19 +81,62 @@ def get_engine(url: str | None = None):
     Raises:
         ValueError: If the database url is None.
     """
+    url = url or get_config().db_url
+    if url is None:
+        raise ValueError("No database url configured")
+    engine = _engines.get(url)
+    if engine is None:
+        engine = sqlmodel.create_engine(url, **_get_engine_args(url))
+        engine = _engines.setdefault(url, engine)
+    return engine
+
+
+def get_async_url(url: str | None = None) -> str:
+    """Get the url of the database with an async driver.
+
+    Args:
+        url: The database url, async_db_url or derived from db_url by default.
+
+    Returns:
+        The url, with the async driver of its dialect when it has no driver. The
+        configured async_db_url is returned as is.
+
+    Raises:
+        ValueError: If the database url is None, or its driver is not async.
+    """
     conf = get_config()
+    if url is None and conf.async_db_url is not None:
+        return conf.async_db_url
     url = url or conf.db_url
     if url is None:
         raise ValueError("No database url configured")
-    if not Path(constants.ALEMBIC_CONFIG).exists():
-        console.warn(
-            "Database is not initialized, run [bold]nextpy db init[/bold] first."
-        )
-    # Print the SQL queries if the log level is INFO or lower.
-    echo_db_query = os.environ.get("SQLALCHEMY_ECHO") == "True"
-    # Needed for the admin dash on sqlite.
-    connect_args = {"check_same_thread": False} if url.startswith("sqlite") else {}
-    return sqlmodel.create_engine(url, echo=echo_db_query, connect_args=connect_args)
+    scheme, sep, rest = url.partition(":")
+    if scheme in ASYNC_DRIVERS:
+        return f"{scheme}+{ASYNC_DRIVERS[scheme]}{sep}{rest}"
+    if scheme.partition("+")[2] in ASYNC_DRIVERS.values():
+        return url
+    raise ValueError(
+        f"No async driver for the database url {scheme}:..., set async_db_url."
+    )
+
+
+def get_async_engine(url: str | None = None) -> AsyncEngine:
+    """Get the async database engine.
+
+    The engine is created once per url, and its connections are pooled.
+
+    Args:
+        url: The database url, see get_async_url.
+
+    Returns:
+        The async database engine.
+    """
+    url = get_async_url(url)
+    engine = _async_engines.get(url)
+    if engine is None:
+        engine = create_async_engine(url, **_get_engine_args(url))
+        engine = _async_engines.setdefault(url, engine)
+    return engine
 
 
 class Model(Base, sqlmodel.SQLModel):
@@ -319,3 +407,17 @@ def session(url: str | None = None) -> sqlmodel.Session:
         A database session.
     """
     return sqlmodel.Session(get_engine(url))
+
+
+def async_session(url: str | None = None) -> AsyncSession:
+    """Get an async session to interact with the database, without blocking the event loop.
+
+    The objects stay loaded after a commit, as they are not refreshed lazily.
+
+    Args:
+        url: The database url, see get_async_url.
+
+    Returns:
+        An async database session.
+    """
+    return AsyncSession(get_async_engine(url), expire_on_commit=False)
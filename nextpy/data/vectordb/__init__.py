@@ -1 +1 @@
-from nextpy.ai.models.embedding.base import VectorDB
+from nextpy.data.vectordb.base import VectorDB
@@ -1,15 +1,19 @@
 """Wrapper around Redis vector database."""
 from __future__ import annotations
 
+import itertools
 import json
 import logging
 import sys
+import time
 import uuid
+from concurrent.futures import ThreadPoolExecutor
 from typing import (
     TYPE_CHECKING,
     Any,
     Callable,
     Iterable,
+    Iterator,
     List,
     Literal,
     Mapping,
@@ -20,8 +24,9 @@ from typing import (
 
 import numpy as np
 
-from nextpy.ai.models.embedding.base import Embeddings, VectorDB
+from nextpy.ai.models.embedding.base import Embeddings
 from nextpy.ai.schema import Document
+from nextpy.data.vectordb.base import VectorDB
 from nextpy.utils.data_ops import get_from_dict_or_env
 
 logger = logging.getLogger(__name__)
@@ -83,6 +88,13 @@ def _redis_prefix(index_name: str) -> str:
     return f"doc:{index_name}"
 
 
+def _batched(texts: Iterable[str], batch_size: int) -> Iterator[List[str]]:
+    """Split the texts into lists of at most batch_size texts."""
+    iterator = iter(texts)
+    while batch := list(itertools.islice(iterator, batch_size)):
+        yield batch
+
+
 def _default_relevance_score(val: float) -> float:
     return 1 - val
 
@@ -195,10 +207,13 @@ class Redis(VectorDB):
             metadatas (Optional[List[dict]], optional): Optional list of metadatas.
                 Defaults to None.
             embeddings (Optional[List[List[float]]], optional): Optional pre-generated
-                embeddings. Defaults to None.
+                embeddings, of all the texts or of the first ones, the other texts
+                are embedded. Defaults to None.
             keys (List[str]) or ids (List[str]): Identifiers of entries.
                 Defaults to None.
-            batch_size (int, optional): Batch size to use for writes. Defaults to 1000.
+            batch_size (int, optional): Batch size to use for the embedding calls
+                and the writes. The next batch is embedded while the current one
+                is written. Defaults to 1000.
 
         Returns:
             List[str]: List of ids added to the vectordb
@@ -210,31 +225,69 @@ class Redis(VectorDB):
         # Other vectordb use ids
         keys_or_ids = kwargs.get("keys", kwargs.get("ids"))
 
-        # Write data to redis
-        pipeline = self.client.pipeline(transaction=False)
-        for i, text in enumerate(texts):
-            # Use provided values by default or fallback
-            key = keys_or_ids[i] if keys_or_ids else _redis_key(prefix)
-            metadata = metadatas[i] if metadatas else {}
-            embedding = embeddings[i] if embeddings else self.embedding_function(text)
-            pipeline.hset(
-                key,
-                mapping={
-                    self.content_key: text,
-                    self.vector_key: np.array(embedding, dtype=np.float32).tobytes(),
-                    self.metadata_key: json.dumps(metadata),
-                },
-            )
-            ids.append(key)
+        def embed(batch: List[str], offset: int) -> List[List[float]]:
+            batch_embeddings = list((embeddings or [])[offset : offset + len(batch)])
+            if len(batch_embeddings) < len(batch):
+                batch_embeddings += self._embed_documents(
+                    batch[len(batch_embeddings) :]
+                )
+            return batch_embeddings
 
-            # Write batch
-            if i % batch_size == 0:
+        # Write data to redis, one batch at a time, while the next one is embedded
+        start = time.perf_counter()
+        pipeline = self.client.pipeline(transaction=False)
+        batches = _batched(texts, batch_size)
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            batch = next(batches, None)
+            future = executor.submit(embed, batch, 0) if batch else None
+            while batch:
+                batch_embeddings = future.result()
+                next_batch = next(batches, None)
+                if next_batch:
+                    future = executor.submit(embed, next_batch, len(ids) + len(batch))
+                for text, embedding in zip(batch, batch_embeddings):
+                    # Use provided values by default or fallback
+                    i = len(ids)
+                    key = keys_or_ids[i] if keys_or_ids else _redis_key(prefix)
+                    metadata = metadatas[i] if metadatas else {}
+                    pipeline.hset(
+                        key,
+                        mapping={
+                            self.content_key: text,
+                            self.vector_key: np.array(
+                                embedding, dtype=np.float32
+                            ).tobytes(),
+                            self.metadata_key: json.dumps(metadata),
+                        },
+                    )
+                    ids.append(key)
                 pipeline.execute()
-
-        # Cleanup final batch
-        pipeline.execute()
+                batch = next_batch
+
+        elapsed = time.perf_counter() - start
+        logger.info(
+            "Added %d texts to %s in %.2fs (%.1f texts/s)",
+            len(ids),
+            self.index_name,
+            elapsed,
+            len(ids) / elapsed if elapsed else 0.0,
+        )
         return ids
 
+    def _embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """Embed a batch of texts in one call when the embedding function allows it.
+
+        The embedding function is either an Embeddings object or a function such as
+        `embeddings.embed_query`, in which case the texts are embedded with the
+        `embed_documents` method of its object, or one by one otherwise.
+        """
+        embeddings = getattr(
+            self.embedding_function, "__self__", self.embedding_function
+        )
+        if isinstance(embeddings, Embeddings):
+            return embeddings.embed_documents(texts)
+        return [self.embedding_function(text) for text in texts]
+
     def _prepare_query(self, k: int) -> Query:
         try:
             from redis.commands.search.query import Query
@@ -353,14 +406,17 @@ class Redis(VectorDB):
             **kwargs,
         )
 
-        # Create embeddings over documents
-        embeddings = embedding_function.embed_documents(texts)
+        # Get the vector size from the first document, add_texts then embeds the
+        # other documents in batches while writing them
+        partial_embeddings = embedding_function.embed_documents(texts[:1])
 
         # Create the search index
-        instance._create_index(dim=len(embeddings[0]), distance_metric=distance_metric)
+        instance._create_index(
+            dim=len(partial_embeddings[0]), distance_metric=distance_metric
+        )
 
         # Add data to Redis
-        keys = instance.add_texts(texts, metadatas, embeddings)
+        keys = instance.add_texts(texts, metadatas, partial_embeddings)
         return instance, keys
 
     @classmethod
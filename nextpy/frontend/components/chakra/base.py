@@ -26,7 +26,7 @@ class ChakraComponent(Component):
             (60, "ChakraProvider"): chakra_provider,
         }
 
-    def get_imports(self) -> imports.ImportDict:
+    def _get_imports(self) -> imports.ImportDict:
         """Chakra requires focus-visible and imported into each page.
 
         This allows the GlobalStyle defined by the ChakraProvider to hide the blue border.
@@ -35,7 +35,7 @@ class ChakraComponent(Component):
             The imports for the component.
         """
         return imports.merge_imports(
-            super().get_imports(),
+            super()._get_imports(),
             {
                 "": {
                     imports.ReactImportVar(
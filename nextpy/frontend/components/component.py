@@ -1727,3 +1727,105 @@ class MemoizationLeaf(Component):
                 update={"disposition": MemoizationDisposition.ALWAYS}
             )
         return comp
+
+
+# The methods walking the component tree, gathered by a CollectedTree.
+_TREE_GETTERS = (
+    "get_imports",
+    "get_hooks",
+    "get_custom_code",
+    "get_dynamic_imports",
+    "get_refs",
+)
+
+
+@lru_cache(maxsize=None)
+def _overrides_tree_getters(component_type: Type[BaseComponent]) -> bool:
+    """Check whether a component class overrides a method walking the tree.
+
+    Args:
+        component_type: The component class.
+
+    Returns:
+        Whether the class is not a Component or overrides one of the tree getters.
+    """
+    if not issubclass(component_type, Component):
+        return True
+    return any(
+        getattr(component_type, getter) is not getattr(Component, getter)
+        for getter in _TREE_GETTERS
+    )
+
+
+class CollectedTree:
+    """The imports, hooks, custom code, dynamic imports and refs of a component tree.
+
+    Calling get_imports, get_hooks, get_custom_code, get_dynamic_imports and get_refs
+    on a component walks the whole tree each time, and get_imports merges the imports
+    at each level. These are gathered in a single traversal instead, with the imports
+    merged once. Components overriding one of these methods are asked directly.
+    """
+
+    def __init__(self, component: BaseComponent):
+        """Collect the component tree.
+
+        Args:
+            component: The root of the tree.
+        """
+        # The imports of each component, merged in imports.
+        self._import_dicts: List[imports.ImportDict] = []
+        self.hooks: Set[str] = set()
+        self.custom_code: Set[str] = set()
+        self.dynamic_imports: Set[str] = set()
+        self.refs: Set[str] = set()
+        self._collect(component, with_hooks=True)
+        self.imports: imports.ImportDict = imports.merge_imports(*self._import_dicts)
+        del self._import_dicts
+
+    def _collect(self, component: BaseComponent, with_hooks: bool):
+        """Collect a component and its children.
+
+        Args:
+            component: The component.
+            with_hooks: Whether to collect the hooks, which stateful components keep.
+        """
+        if isinstance(component, StatefulComponent):
+            if component.rendered_as_shared:
+                self._import_dicts.append(component.get_imports())
+                return
+            # The stateful component renders its own hooks.
+            self.custom_code.add(component.code)
+            self._collect(component.component, with_hooks=False)
+            return
+
+        if _overrides_tree_getters(type(component)):
+            self._import_dicts.append(component.get_imports())
+            if with_hooks:
+                self.hooks |= component.get_hooks()
+            self.custom_code |= component.get_custom_code()
+            self.dynamic_imports |= component.get_dynamic_imports()
+            self.refs |= component.get_refs()
+            return
+
+        assert isinstance(component, Component)
+        self._import_dicts.append(component._get_imports())
+        if with_hooks:
+            self.hooks |= component._get_hooks_internal()
+            hooks = component._get_hooks()
+            if hooks is not None:
+                self.hooks.add(hooks)
+        custom_code = component._get_custom_code()
+        if custom_code is not None:
+            self.custom_code.add(custom_code)
+        dynamic_import = component._get_dynamic_imports()
+        if dynamic_import:
+            self.dynamic_imports.add(dynamic_import)
+        for prop in component.get_component_props():
+            if getattr(component, prop) is not None:
+                self.dynamic_imports |= getattr(component, prop).get_dynamic_imports()
+        ref = component.get_ref()
+        if ref is not None:
+            self.refs.add(ref)
+
+        for child in component.children:
+            self._collect(child, with_hooks)
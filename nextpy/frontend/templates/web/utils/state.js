@@ -112,13 +112,45 @@ export const getEventURL = () => {
   return endpoint
 }
 
+// Key of the operations in a patch sent in place of the full value of a var.
+const DELTA_PATCH_KEY = "__nextpy_patch__";
+
+/**
+ * Apply the operations of a patch to a list or dict value.
+ * @param value The previous value of the var.
+ * @param ops The operations to apply, as [operation, argument] pairs.
+ * @returns The new value of the var.
+ */
+const applyPatch = (value, ops) => {
+  for (const [op, arg] of ops) {
+    if (op === "append") {
+      value = [...value, ...arg]
+    } else if (op === "set") {
+      value = { ...value, ...arg }
+    } else if (op === "delete") {
+      value = { ...value }
+      for (const key of arg) {
+        delete value[key]
+      }
+    }
+  }
+  return value
+};
+
 /**
  * Apply a delta to the state.
  * @param state The state to apply the delta to.
  * @param delta The delta to apply.
  */
 export const applyDelta = (state, delta) => {
-  return { ...state, ...delta }
+  const new_state = { ...state, ...delta }
+  for (const key in delta) {
+    const value = delta[key]
+    if (value !== null && typeof value === "object" && DELTA_PATCH_KEY in value) {
+      new_state[key] = applyPatch(state[key], value[DELTA_PATCH_KEY])
+    }
+  }
+  return new_state
 };
 
 
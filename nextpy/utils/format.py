@@ -4,13 +4,17 @@ from __future__ import annotations
 
 import inspect
 import json
+import math
 import os
 import re
 import sys
 from typing import TYPE_CHECKING, Any, List, Union
 
+import wrapt
+
 from nextpy import constants
 from nextpy.backend.vars import BaseVar, Var
+from nextpy.base import Base
 from nextpy.utils import exceptions, serializers, types
 from nextpy.utils.serializers import serialize
 
@@ -18,6 +22,11 @@ if TYPE_CHECKING:
     from nextpy.backend.event import EventChain, EventHandler, EventSpec
     from nextpy.frontend.components.component import ComponentStyle
 
+try:
+    import orjson
+except ImportError:
+    orjson = None  # type: ignore
+
 WRAP_MAP = {
     "{": "}",
     "(": ")",
@@ -306,6 +315,7 @@ def format_match(cond: str | Var, match_cases: List[BaseVar], default: Var) -> s
 
     return switch_code
 
+
 def format_prop(
     prop: Union[Var, EventChain, ComponentStyle, str],
 ) -> Union[int, float, str]:
@@ -643,6 +653,81 @@ def json_dumps(obj: Any) -> str:
     return json.dumps(obj, ensure_ascii=False, default=serialize)
 
 
+def _fast_json_default(value: Any) -> Any:
+    """Convert a value the json encoder does not handle natively.
+
+    Args:
+        value: The value to convert.
+
+    Returns:
+        A value the json encoder can handle, or the serialized value.
+    """
+    if isinstance(value, Base):
+        return value.dict()
+    if isinstance(value, wrapt.ObjectProxy):
+        return value.__wrapped__
+    return serialize(value)
+
+
+def _has_non_finite(value: Any) -> bool:
+    """Check whether a value contains NaN or infinite floats.
+
+    Args:
+        value: The value to check, with nested containers and Base models.
+
+    Returns:
+        Whether a float of the value is not finite.
+    """
+    if isinstance(value, float):
+        return not math.isfinite(value)
+    if isinstance(value, dict):
+        return any(_has_non_finite(v) for v in value.values())
+    if isinstance(value, (list, tuple, set)):
+        return any(_has_non_finite(v) for v in value)
+    if isinstance(value, Base):
+        return _has_non_finite(value.__dict__)
+    if isinstance(value, wrapt.ObjectProxy):
+        return _has_non_finite(value.__wrapped__)
+    return False
+
+
+def fast_json_dumps(obj: Any) -> str:
+    """Encode an object to a compact json string in a single pass.
+
+    Uses orjson when it is installed. Nested Base models are converted to dicts
+    and other values are serialized with the registered serializers while
+    encoding, so the object does not need to be copied to plain dicts first.
+
+    orjson encodes NaN and infinite floats as null, while the client parses
+    NaN and Infinity, so the json module encodes the objects containing them.
+
+    Args:
+        obj: The object to be serialized.
+
+    Returns:
+        A string
+    """
+    if orjson is not None:
+        try:
+            encoded = orjson.dumps(
+                obj,
+                default=_fast_json_default,
+                option=orjson.OPT_NON_STR_KEYS
+                | orjson.OPT_PASSTHROUGH_DATACLASS
+                | orjson.OPT_PASSTHROUGH_DATETIME,
+            )
+        except TypeError:
+            # E.g. integers larger than 64 bits, which the json module supports.
+            pass
+        else:
+            # Only look for non-finite floats when they may have become null.
+            if b"null" not in encoded or not _has_non_finite(obj):
+                return encoded.decode()
+    return json.dumps(
+        obj, ensure_ascii=False, separators=(",", ":"), default=_fast_json_default
+    )
+
+
 def unwrap_vars(value: str) -> str:
     """Unwrap var values from a JSON string.
 
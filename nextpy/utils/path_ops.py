@@ -6,6 +6,7 @@ import json
 import os
 import re
 import shutil
+import uuid
 from pathlib import Path
 
 from nextpy import constants
@@ -78,6 +79,38 @@ def mkdir(path: str):
     os.makedirs(path, exist_ok=True)
 
 
+def write_file(path: str, content: str) -> bool:
+    """Write a file atomically, unless it already has the content.
+
+    The content goes to a temporary file renamed over the path, so the watchers
+    of the directory, like the Next.js dev server, never see a partial file.
+
+    Args:
+        path: The path to the file.
+        content: The content of the file.
+
+    Returns:
+        Whether the file was written.
+    """
+    try:
+        with open(path, encoding="utf-8") as f:
+            if f.read() == content:
+                return False
+    except (OSError, UnicodeDecodeError):
+        pass
+    mkdir(os.path.dirname(path) or ".")
+    tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+    try:
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(content)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return True
+
+
 def ln(src: str, dest: str, overwrite: bool = False) -> bool:
     """Create a symbolic link.
 
@@ -156,24 +189,17 @@ def update_json_file(file_path: str, update_dict: dict[str, int | str]):
     """
     fp = Path(file_path)
 
-    # Create the file if it doesn't exist.
-    fp.touch(exist_ok=True)
-
-    # Create an empty json object if file is empty
-    fp.write_text("{}") if fp.stat().st_size == 0 else None
-
     # Read the existing json object from the file.
     json_object = {}
-    if fp.stat().st_size == 0:
+    if fp.exists() and fp.stat().st_size != 0:
         with open(fp) as f:
             json_object = json.load(f)
 
     # Update the json object with the new data.
     json_object.update(update_dict)
 
-    # Write the updated json object to the file
-    with open(fp, "w") as f:
-        json.dump(json_object, f, ensure_ascii=False)
+    # Write the updated json object to the file, if it changed.
+    write_file(str(fp), json.dumps(json_object, ensure_ascii=False))
 
 
 def find_replace(directory: str, find: str, replace: str):
@@ -5,7 +5,18 @@ from __future__ import annotations
 import json
 import types as builtin_types
 from datetime import date, datetime, time, timedelta
-from typing import Any, Callable, Dict, List, Set, Tuple, Type, Union, get_type_hints
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    Set,
+    Tuple,
+    Type,
+    Union,
+    get_type_hints,
+)
 
 from nextpy.base import Base
 from nextpy.utils import exceptions, format, types
@@ -16,6 +27,12 @@ SerializedType = Union[str, bool, int, float, list, dict]
 Serializer = Callable[[Type], SerializedType]
 SERIALIZERS: dict[Type, Serializer] = {}
 
+# Cache of the serializer resolved for each type (None if there is none), so
+# subclasses of registered types do not scan the registry every time.
+# It is cleared whenever the registry changes size.
+_SERIALIZER_CACHE: dict[Type, Serializer | None] = {}
+_SERIALIZER_CACHE_REGISTRY_SIZE = 0
+
 
 def serializer(fn: Serializer) -> Serializer:
     """Decorator to add a serializer for a given type.
@@ -52,6 +69,7 @@ def serializer(fn: Serializer) -> Serializer:
 
     # Register the serializer.
     SERIALIZERS[type_] = fn
+    _SERIALIZER_CACHE.clear()
 
     # Return the function.
     return fn
@@ -77,6 +95,26 @@ def serialize(value: Any) -> SerializedType | None:
     return serializer(value)
 
 
+def serialize_many(values: Iterable[Any]) -> list[SerializedType | None]:
+    """Serialize many values, resolving the serializer once per type.
+
+    Args:
+        values: The values to serialize.
+
+    Returns:
+        The serialized values, with None for the values without a serializer.
+    """
+    serializers: dict[Type, Serializer | None] = {}
+    serialized = []
+    for value in values:
+        type_ = type(value)
+        if type_ not in serializers:
+            serializers[type_] = get_serializer(type_)
+        serializer = serializers[type_]
+        serialized.append(serializer(value) if serializer is not None else None)
+    return serialized
+
+
 def get_serializer(type_: Type) -> Serializer | None:
     """Get the serializer for the type.
 
@@ -86,8 +124,32 @@ def get_serializer(type_: Type) -> Serializer | None:
     Returns:
         The serializer for the type, or None if there is no serializer.
     """
-    global SERIALIZERS
+    global _SERIALIZER_CACHE_REGISTRY_SIZE
+
+    # The registry may also be modified directly, e.g. to remove a serializer.
+    if len(SERIALIZERS) != _SERIALIZER_CACHE_REGISTRY_SIZE:
+        _SERIALIZER_CACHE.clear()
+        _SERIALIZER_CACHE_REGISTRY_SIZE = len(SERIALIZERS)
 
+    try:
+        return _SERIALIZER_CACHE[type_]
+    except KeyError:
+        serializer = _SERIALIZER_CACHE[type_] = _resolve_serializer(type_)
+        return serializer
+    except TypeError:
+        # Unhashable types, e.g. some generic aliases, are not cached.
+        return _resolve_serializer(type_)
+
+
+def _resolve_serializer(type_: Type) -> Serializer | None:
+    """Find the serializer for the type in the registry.
+
+    Args:
+        type_: The type to get the serializer for.
+
+    Returns:
+        The serializer for the type, or None if there is no serializer.
+    """
     # First, check if the type is registered.
     serializer = SERIALIZERS.get(type_)
     if serializer is not None:
@@ -0,0 +1,103 @@
+from typing import List
+
+import pytest
+
+embedding = pytest.importorskip("nextpy.ai.models.embedding")
+
+
+class CountingEmbeddings(embedding.FakeEmbeddings):
+    """Fake embeddings recording the texts sent to the model."""
+
+    model: str = "fake"
+    calls: List[List[str]] = []
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """Embed each text as a vector filled with its length.
+
+        Args:
+            texts: The texts to embed.
+
+        Returns:
+            The embeddings of the texts.
+        """
+        self.calls.append(list(texts))
+        return [[float(len(text))] * self.size for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        """Embed a query as a vector filled with the opposite of its length.
+
+        Args:
+            text: The text to embed.
+
+        Returns:
+            The embedding of the text.
+        """
+        self.calls.append([text])
+        return [-float(len(text))] * self.size
+
+
+def test_embed_documents_misses():
+    """Test that only the texts missing from the cache are sent to the model, once."""
+    model = CountingEmbeddings(size=2, calls=[])
+    cache = embedding.CacheBackedEmbeddings(model)
+
+    assert cache.embed_documents(["a", "bb", "a", " a"]) == [
+        [1.0, 1.0],
+        [2.0, 2.0],
+        [1.0, 1.0],
+        [2.0, 2.0],
+    ]
+    assert model.calls == [["a", "bb", " a"]]
+    assert (cache.hits, cache.misses) == (1, 3)
+
+    assert cache.embed_documents(["bb", "ccc", "a"])[1] == [3.0, 3.0]
+    assert model.calls[-1] == ["ccc"]
+    assert (cache.hits, cache.misses) == (3, 4)
+    assert cache.hit_rate == 3 / 7
+
+
+def test_embed_query():
+    """Test that queries are cached apart from the documents."""
+    model = CountingEmbeddings(size=1, calls=[])
+    cache = embedding.CacheBackedEmbeddings(model)
+    assert cache.embed_documents(["q"]) == [[1.0]]
+    assert cache.embed_query("q") == cache.embed_query("q") == [-1.0]
+    assert model.calls == [["q"], ["q"]]
+    assert (cache.hits, cache.misses) == (1, 2)
+
+
+def test_lru_eviction():
+    """Test that the least recently used vectors are dropped from memory."""
+    model = CountingEmbeddings(size=1, calls=[])
+    cache = embedding.CacheBackedEmbeddings(model, max_size=2)
+    cache.embed_documents(["a", "bb"])
+    cache.embed_documents(["a"])
+    cache.embed_documents(["ccc"])
+    model.calls.clear()
+
+    cache.embed_documents(["a", "ccc", "bb"])
+    assert model.calls == [["bb"]]
+
+
+def test_disk_cache(tmp_path):
+    """Test that the vectors on disk are shared by the caches of the same model.
+
+    Args:
+        tmp_path: A temporary directory.
+    """
+    path = str(tmp_path / "embeddings.sqlite")
+    model = CountingEmbeddings(size=2, calls=[])
+    embedding.CacheBackedEmbeddings(model, path=path).embed_documents(["a", "bb"])
+
+    cache = embedding.CacheBackedEmbeddings(model, path=path, max_size=1)
+    assert cache.embed_documents(["bb", "a", "ccc"]) == [
+        [2.0, 2.0],
+        [1.0, 1.0],
+        [3.0, 3.0],
+    ]
+    assert model.calls == [["a", "bb"], ["ccc"]]
+    assert (cache.hits, cache.misses) == (2, 1)
+
+    other = embedding.CacheBackedEmbeddings(model, path=path, model_id="other")
+    other.embed_documents(["a"])
+    assert model.calls[-1] == ["a"]
@@ -0,0 +1,129 @@
+from types import SimpleNamespace
+from typing import List
+
+import pytest
+
+rag = pytest.importorskip("nextpy.ai.rag.base")
+
+
+class FakeTransformer:
+    """A transformer splitting each document into its words."""
+
+    def split_documents(self, documents) -> List[SimpleNamespace]:
+        """Split the documents.
+
+        Args:
+            documents: The documents to split.
+
+        Returns:
+            The chunks of the documents.
+        """
+        return [
+            SimpleNamespace(page_content=word, metadata=document.metadata)
+            for document in documents
+            for word in document.page_content.split()
+        ]
+
+
+class FakeVectorStore:
+    """A vector store recording its batches, failing for some words."""
+
+    def __init__(self, fail=()):
+        """Initialize an empty store.
+
+        Args:
+            fail: The words of the batches failing to be added.
+        """
+        self.fail = set(fail)
+        self.batches: List[List[str]] = []
+
+    def add_documents(self, documents) -> List[str]:
+        """Add a batch of chunks.
+
+        Args:
+            documents: The chunks.
+
+        Returns:
+            The ids of the chunks.
+
+        Raises:
+            IOError: If the batch contains a failing word.
+        """
+        words = [document.page_content for document in documents]
+        if self.fail.intersection(words):
+            raise IOError("store unavailable")
+        self.batches.append(words)
+        return words
+
+
+def document(text: str) -> SimpleNamespace:
+    return SimpleNamespace(page_content=text, metadata={"source": text})
+
+
+def test_add_data_batches():
+    """Test that the chunks are added in batches across the documents."""
+    store = FakeVectorStore()
+    simple_rag = rag.SimpleRAG(
+        (document(text) for text in ["a b c", "d", "e f"]),
+        FakeTransformer(),
+        store,
+        batch_size=4,
+    )
+    assert store.batches == [["a", "b", "c", "d"], ["e", "f"]]
+    assert [ref["source"] for ref in simple_rag.references] == ["a b c", "d", "e f"]
+    assert simple_rag.add_data([document("g h")]) == 2
+
+
+def test_add_data_store_without_ids():
+    """Test that the chunks are counted when the store does not return their ids."""
+    store = FakeVectorStore()
+    store.add_documents = lambda documents: None  # type: ignore
+    simple_rag = rag.SimpleRAG([document("a b c")], FakeTransformer(), store)
+    assert simple_rag.add_data([document("d e")]) == 2
+
+
+def test_add_data_empty():
+    """Test that empty data is rejected, also from a generator."""
+    simple_rag = rag.SimpleRAG([document("a")], FakeTransformer(), FakeVectorStore())
+    for raw_data in (None, [], (document(text) for text in [])):
+        with pytest.raises(ValueError):
+            simple_rag.add_data(raw_data)
+
+
+def test_add_data_resume(tmp_path):
+    """Test that a failed ingestion resumes with the failed batches only.
+
+    Args:
+        tmp_path: A temporary directory.
+    """
+    checkpoint = tmp_path / "checkpoint.json"
+    store = FakeVectorStore(fail={"c"})
+    data = [document("a b"), document("c d"), document("e f")]
+    with pytest.raises(RuntimeError, match=r"\[1\]"):
+        rag.SimpleRAG(
+            data,
+            FakeTransformer(),
+            store,
+            batch_size=2,
+            max_workers=2,
+            checkpoint_path=str(checkpoint),
+        )
+    assert sorted(store.batches) == [["a", "b"], ["e", "f"]]
+    assert len(checkpoint.read_text().splitlines()) == 2
+
+    store.fail.clear()
+    store.batches.clear()
+    simple_rag = rag.SimpleRAG(
+        data,
+        FakeTransformer(),
+        store,
+        batch_size=2,
+        checkpoint_path=str(checkpoint),
+    )
+    assert store.batches == [["c", "d"]]
+    assert len(simple_rag.references) == 3
+    assert not checkpoint.exists()
+
+    # New data is added in full after an ingestion without failures.
+    simple_rag.add_data([document("g h"), document("i j")])
+    assert store.batches[1:] == [["g", "h"], ["i", "j"]]
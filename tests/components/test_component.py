@@ -12,6 +12,7 @@ from nextpy.frontend import imports
 from nextpy.frontend.components.base.bare import Bare
 from nextpy.frontend.components.chakra.layout.box import Box
 from nextpy.frontend.components.component import (
+    CollectedTree,
     Component,
     CustomComponent,
     StatefulComponent,
@@ -650,6 +651,33 @@ def test_stateful_banner():
     assert isinstance(stateful_component, StatefulComponent)
 
 
+@pytest.mark.parametrize("shared", [False, True])
+def test_collected_tree(test_state, shared: bool):
+    """Test that a single walk collects what the recursive methods return.
+
+    Args:
+        test_state: A test state.
+        shared: Whether the stateful component is rendered as shared.
+    """
+    stateful_component = StatefulComponent.compile_from(
+        xt.button(test_state.num, on_click=test_state.do_something)
+    )
+    assert isinstance(stateful_component, StatefulComponent)
+    stateful_component.rendered_as_shared = shared
+    component = xt.vstack(
+        xt.input(id="name"),
+        xt.box(xt.text(test_state.num), stateful_component),
+        xt.connection_modal(),
+    )
+
+    tree = CollectedTree(component)
+    assert tree.imports == component.get_imports()
+    assert tree.hooks == component.get_hooks()
+    assert tree.custom_code == component.get_custom_code()
+    assert tree.dynamic_imports == component.get_dynamic_imports()
+    assert tree.refs == component.get_refs() == {"ref_name"}
+
+
 TEST_VAR = Var.create_safe("test")._replace(
     merge_var_data=VarData(
         hooks={"useTest"}, imports={"test": {ReactImportVar(tag="test")}}, state="Test"
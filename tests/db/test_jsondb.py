@@ -109,6 +109,79 @@ def test_delete_nonexistent_user_by_id(test_db):
     with pytest.raises(IdNotFoundError):
         test_db.delete(999)
 
+# Set up a fixture for an append-only test database indexed by username
+@pytest.fixture
+def append_only_db(tmp_path):
+    db_path = tmp_path / "test_users.json"
+    return JsonDatabase(
+        str(db_path),
+        model=MockUser,
+        append_only=True,
+        indexes=["username"],
+        compact_every=3,
+    )
+
+# Test the operations of an append-only database, through compactions
+def test_append_only_crud(append_only_db, tmp_path):
+    users = append_only_db.add_many(
+        MockUser(username=f"user{i % 2}", email=f"{i}@example.com", password="pw")
+        for i in range(4)
+    )
+    assert len({user.id for user in users}) == 4
+    assert [user.email for user in append_only_db.query(username="user1")] == [
+        "1@example.com",
+        "3@example.com",
+    ]
+
+    append_only_db.update_many({users[0].id: {"username": "user1"}})
+    assert len(append_only_db.query(username="user1")) == 3
+    assert append_only_db.query(username="user0", email="2@example.com")[0].id == users[2].id
+
+    append_only_db.delete(users[1].id)
+    with pytest.raises(IdNotFoundError):
+        append_only_db.get(users[1].id)
+    with pytest.raises(IdNotFoundError):
+        append_only_db.update_many({users[1].id: {"password": "new"}, users[2].id: {"password": "new"}})
+    assert append_only_db.get(users[2].id).password == "pw"
+
+    # Another instance loads the file along with the log.
+    other_db = JsonDatabase(str(tmp_path / "test_users.json"), model=MockUser, append_only=True)
+    assert sorted(user.id for user in other_db.query()) == sorted(
+        user.id for user in append_only_db.query()
+    )
+
+# Test that the changes of another instance are replayed from the log
+def test_append_only_shared_log(append_only_db, tmp_path):
+    other_db = JsonDatabase(
+        str(tmp_path / "test_users.json"), model=MockUser, append_only=True
+    )
+    user = other_db.add(MockUser(username="johndoe", email="john@example.com", password="pw"))
+    assert append_only_db.query(username="johndoe")[0].id == user.id
+    with pytest.raises(ValueError):
+        append_only_db.add(MockUser(id=user.id, username="dup", email="dup@example.com", password="pw"))
+
+    other_db.compact()
+    assert (tmp_path / "test_users.json.log").read_text() == ""
+    other_db.update(user.id, {"username": "janedoe"})
+    assert append_only_db.query(username="johndoe") == []
+    assert append_only_db.get(user.id).username == "janedoe"
+
+# Test that indexes require the append-only mode
+def test_indexes_require_append_only(tmp_path):
+    with pytest.raises(ValueError):
+        JsonDatabase(str(tmp_path / "test_users.json"), model=MockUser, indexes=["username"])
+
+# Test adding and updating users at once
+def test_batch_operations(test_db):
+    users = test_db.add_many(
+        MockUser(username=f"user{i}", email=f"{i}@example.com", password="pw")
+        for i in range(3)
+    )
+    test_db.update_many({user.id: {"password": "new"} for user in users[:2]})
+    assert [user.password for user in test_db.query()] == ["new", "new", "pw"]
+    with pytest.raises(ValueError):
+        test_db.add_many([MockUser(id=1, username="a", email="a", password="pw")] * 2)
+
 # Run the tests, if this file is invoked directly
 if __name__ == "__main__":
     pytest.main(["-s"])
@@ -0,0 +1,132 @@
+import json
+from typing import List
+from unittest import mock
+
+import numpy as np
+import pytest
+
+redis_vectordb = pytest.importorskip("nextpy.data.vectordb.redis")
+fake = pytest.importorskip("nextpy.ai.models.embedding.fake")
+
+
+class FakePipeline:
+    """A redis pipeline recording the batches of written entries."""
+
+    def __init__(self):
+        """Initialize an empty pipeline."""
+        self.pending = []
+        self.batches: List[list] = []
+
+    def hset(self, key, mapping):
+        """Queue writing an entry.
+
+        Args:
+            key: The key of the entry.
+            mapping: The fields of the entry.
+        """
+        self.pending.append((key, mapping))
+
+    def execute(self):
+        """Write the queued entries as a batch."""
+        self.batches.append(self.pending)
+        self.pending = []
+
+
+class CountingEmbeddings(fake.FakeEmbeddings):
+    """Fake embeddings recording the texts of each call."""
+
+    calls: List[List[str]] = []
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """Embed each text as a vector filled with the number ending the text.
+
+        Args:
+            texts: The texts to embed.
+
+        Returns:
+            The embeddings of the texts.
+        """
+        self.calls.append(list(texts))
+        return [[float(text.split()[-1])] * self.size for text in texts]
+
+
+# Set up a fixture for a Redis vector store with a fake client
+@pytest.fixture
+def pipeline(monkeypatch):
+    pipeline = FakePipeline()
+    client = mock.Mock()
+    client.pipeline.return_value = pipeline
+    monkeypatch.setattr("redis.from_url", mock.Mock(return_value=client))
+    monkeypatch.setattr(redis_vectordb, "_check_redis_module_exist", mock.Mock())
+    return pipeline
+
+
+def make_store(embeddings) -> "redis_vectordb.Redis":
+    return redis_vectordb.Redis("redis://localhost:6379", "index", embeddings)
+
+
+def vector(mapping) -> List[float]:
+    return np.frombuffer(mapping["content_vector"], dtype=np.float32).tolist()
+
+
+# Test that the texts are embedded and written batch by batch
+def test_add_texts_batches(pipeline):
+    embeddings = CountingEmbeddings(size=2, calls=[])
+    store = make_store(embeddings.embed_query)
+    texts = [f"text {i}" for i in range(7)]
+    ids = store.add_texts(
+        (text for text in texts),
+        metadatas=[{"i": i} for i in range(7)],
+        ids=[f"id{i}" for i in range(7)],
+        batch_size=3,
+    )
+
+    assert ids == [f"id{i}" for i in range(7)]
+    assert embeddings.calls == [texts[0:3], texts[3:6], texts[6:7]]
+    assert [len(batch) for batch in pipeline.batches] == [3, 3, 1]
+    entries = [entry for batch in pipeline.batches for entry in batch]
+    for i, (key, mapping) in enumerate(entries):
+        assert key == f"id{i}"
+        assert mapping["content"] == f"text {i}"
+        assert json.loads(mapping["metadata"]) == {"i": i}
+        assert vector(mapping) == [float(i)] * 2
+
+
+# Test that the given embeddings are used, and only the missing ones are computed
+def test_add_texts_embeddings(pipeline):
+    embeddings = CountingEmbeddings(size=1, calls=[])
+    store = make_store(embeddings)
+    texts = [f"text {i}" for i in range(5)]
+
+    store.add_texts(texts, embeddings=[[-1.0]] * 5, batch_size=2)
+    assert embeddings.calls == []
+    entries = [entry for batch in pipeline.batches for entry in batch]
+    assert [vector(mapping) for _, mapping in entries] == [[-1.0]] * 5
+
+    pipeline.batches.clear()
+    store.add_texts(texts, embeddings=[[-1.0]] * 3, batch_size=2)
+    assert embeddings.calls == [["text 3"], ["text 4"]]
+    entries = [entry for batch in pipeline.batches for entry in batch]
+    assert [vector(mapping) for _, mapping in entries] == [
+        [-1.0],
+        [-1.0],
+        [-1.0],
+        [3.0],
+        [4.0],
+    ]
+
+
+# Test that creating a store from texts embeds each text once
+def test_from_texts_embeds_once(pipeline, monkeypatch):
+    monkeypatch.setattr(redis_vectordb.Redis, "_create_index", mock.Mock())
+    embeddings = CountingEmbeddings(size=3, calls=[])
+    texts = [f"text {i}" for i in range(4)]
+
+    _, keys = redis_vectordb.Redis.from_texts_return_keys(
+        texts, embeddings, redis_url="redis://localhost:6379"
+    )
+    assert len(keys) == 4
+    assert sorted(sum(embeddings.calls, [])) == texts
+    redis_vectordb.Redis._create_index.assert_called_once_with(
+        dim=3, distance_metric="COSINE"
+    )
@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import asyncio
 import io
 import os.path
 import unittest.mock
@@ -11,6 +12,7 @@ from unittest.mock import AsyncMock
 import pytest
 import sqlmodel
 from fastapi import UploadFile
+from fastapi.testclient import TestClient
 from starlette_admin.auth import AuthProvider
 from starlette_admin.contrib.sqla.admin import Admin
 from starlette_admin.contrib.sqla.view import ModelView
@@ -20,12 +22,13 @@ from nextpy import constants
 from nextpy.app import (
     App,
     ComponentCallable,
+    StateUpdateCoalescer,
     default_overlay_component,
     process,
     upload,
 )
 from nextpy.backend.admin import AdminDash
-from nextpy.backend.event import Event
+from nextpy.backend.event import Event, coalesce_updates
 from nextpy.backend.middleware import HydrateMiddleware
 from nextpy.backend.state import (
     BaseState,
@@ -35,6 +38,9 @@ from nextpy.backend.state import (
     StateUpdate,
 )
 from nextpy.backend.vars import ComputedVar
+from nextpy.build.compiler import processes
+from nextpy.build.compiler import utils as compiler_utils
+from nextpy.build.config import get_config
 from nextpy.data.model import Model
 from nextpy.frontend.components import Box, Component, Cond, Fragment, Text
 from nextpy.frontend.style import Style
@@ -1137,6 +1143,80 @@ async def test_process_events(mocker, token: str):
         await app.state_manager.close()
 
 
+@pytest.mark.asyncio
+async def test_state_update_coalescer():
+    """Test that updates sent within the window are merged."""
+    emitted = []
+
+    async def emit(update: StateUpdate):
+        emitted.append(update)
+
+    coalescer = StateUpdateCoalescer(emit, "mock_sid", window=0.05)
+
+    # The first update is sent right away.
+    await coalescer.push(StateUpdate(delta={"state": {"a": 1}}, final=False))
+    assert len(emitted) == 1
+
+    # The next ones are merged until the end of the window.
+    await coalescer.push(StateUpdate(delta={"state": {"a": 2}}, final=False))
+    await coalescer.push(
+        StateUpdate(delta={"state": {"b": 3}, "state.child": {"c": 4}}, final=False)
+    )
+    assert len(emitted) == 1
+    await asyncio.sleep(0.1)
+    assert emitted[1] == StateUpdate(
+        delta={"state": {"a": 2, "b": 3}, "state.child": {"c": 4}}, final=False
+    )
+
+    # Updates queueing events are sent right away with the pending updates.
+    await coalescer.push(StateUpdate(delta={"state": {"a": 5}}, final=False))
+    await coalescer.push(StateUpdate(delta={"state": {"a": 6}}, final=False))
+    event = Event(token="token", name="state.go")
+    await coalescer.push(StateUpdate(delta={"state": {"b": 7}}, events=[event]))
+    assert emitted[2:] == [
+        StateUpdate(delta={"state": {"a": 5}}, final=False),
+        StateUpdate(delta={"state": {"a": 6, "b": 7}}, events=[event]),
+    ]
+
+    # Flushing sends the last update.
+    await coalescer.push(StateUpdate(delta={"state": {"a": 8}}))
+    await coalescer.flush()
+    assert emitted[4] == StateUpdate(delta={"state": {"a": 8}})
+    await coalescer.flush()
+    assert len(emitted) == 5
+
+
+def test_coalesce_updates():
+    """Test that the update window is set on the event handler."""
+
+    class CoalesceState(BaseState):
+        @coalesce_updates
+        def default_window(self):
+            pass
+
+        @coalesce_updates(window=0.016)
+        def custom_window(self):
+            pass
+
+        def no_window(self):
+            pass
+
+    assert CoalesceState.default_window.update_window == 0.03  # type: ignore
+    assert CoalesceState.custom_window.update_window == 0.016  # type: ignore
+    assert CoalesceState.no_window.update_window is None  # type: ignore
+
+    app = App(state=CoalesceState)
+    name = CoalesceState.get_name()
+    handler = app._get_event_handler(Event(token="", name=f"{name}.custom_window"))
+    assert handler is not None and handler.update_window == 0.016
+    handler = app._get_event_handler(Event(token="", name=f"{name}.no_window"))
+    assert handler is not None and handler.update_window is None
+    assert app._get_event_handler(Event(token="", name=f"{name}.missing")) is None
+
+    with pytest.raises(ValueError):
+        coalesce_updates(window=-1)
+
+
 @pytest.mark.parametrize(
     ("state", "overlay_component", "exp_page_child"),
     [
@@ -1295,3 +1375,143 @@ def test_app_wrap_priority(compilable_app):
         ")"
         "}"
     ) in "".join(app_js_lines)
+
+
+def test_compile_cache(compilable_app):
+    """Test that a new compile only writes the pages that changed.
+
+    Args:
+        compilable_app: compilable_app fixture.
+    """
+    app, web_dir = compilable_app
+    app.add_page(lambda: Text.create(ATestState.var), route="a")
+    app.add_page(lambda: Text.create("b"), route="b")
+    app.add_page(lambda: Text.create("c"), route="c")
+    app.compile_()
+    assert (web_dir / "compile_cache.json").exists()
+
+    # A new process compiling the app after a change.
+    app = App(theme=None)
+    app.get_frontend_packages = unittest.mock.Mock()
+    app.add_page(lambda: Text.create(ATestState.var), route="a")
+    app.add_page(lambda: Text.create("b changed"), route="b")
+    with unittest.mock.patch.object(
+        compiler_utils, "write_page", wraps=compiler_utils.write_page
+    ) as write_page:
+        app.compile_()
+    written = {call.args[0] for call in write_page.call_args_list}
+    assert written == {os.path.join(constants.Dirs.WEB_PAGES, "b.js")}
+    assert "b changed" in (web_dir / "pages" / "b.js").read_text()
+    assert "a_test_state.var" in (web_dir / "pages" / "a.js").read_text()
+    # The removed page is deleted.
+    assert not (web_dir / "pages" / "c.js").exists()
+
+    # The files are written again when missing.
+    (web_dir / "pages" / "a.js").unlink()
+    app = App(theme=None)
+    app.get_frontend_packages = unittest.mock.Mock()
+    app.add_page(lambda: Text.create(ATestState.var), route="a")
+    app.add_page(lambda: Text.create("b changed"), route="b")
+    app.compile_()
+    assert "a_test_state.var" in (web_dir / "pages" / "a.js").read_text()
+
+
+def test_compile_without_cache(compilable_app):
+    """Test that the files with the same code on disk are not written again.
+
+    Args:
+        compilable_app: compilable_app fixture.
+    """
+    app, web_dir = compilable_app
+    app.add_page(lambda: Text.create("a"), route="a")
+    app.add_page(lambda: Text.create("b"), route="b")
+    app.compile_()
+    outputs = [path for path in web_dir.rglob("*.js") if path.name != "stale.js"]
+    mtimes = {path: path.stat().st_mtime_ns for path in outputs}
+    (web_dir / "pages" / "stale.js").write_text("")
+    (web_dir / "compile_cache.json").unlink()
+
+    app = App(theme=None)
+    app.get_frontend_packages = unittest.mock.Mock()
+    app.add_page(lambda: Text.create("a"), route="a")
+    app.add_page(lambda: Text.create("b changed"), route="b")
+    app.compile_()
+    written = {path for path in outputs if path.stat().st_mtime_ns != mtimes[path]}
+    assert written == {web_dir / "pages" / "b.js"}
+    assert "b changed" in (web_dir / "pages" / "b.js").read_text()
+    assert not (web_dir / "pages" / "stale.js").exists()
+
+
+def test_compile_cache_shared_components(compilable_app):
+    """Test that the unchanged pages are compiled again when the shared components change.
+
+    Args:
+        compilable_app: compilable_app fixture.
+    """
+    app, web_dir = compilable_app
+    app.add_page(lambda: Box.create(Text.create(ATestState.var)), route="a")
+    app.add_page(lambda: Box.create(Text.create(ATestState.var)), route="b")
+    app.compile_()
+    stateful_components = web_dir / "utils" / "stateful_components.js"
+    assert "a_test_state.var" in stateful_components.read_text()
+    assert "a_test_state.var" not in (web_dir / "pages" / "a.js").read_text()
+
+    # The component of the unchanged page is no longer shared.
+    app = App(theme=None)
+    app.get_frontend_packages = unittest.mock.Mock()
+    app.add_page(lambda: Box.create(Text.create(ATestState.var)), route="a")
+    app.add_page(lambda: Box.create(Text.create("b")), route="b")
+    app.compile_()
+    assert "a_test_state.var" not in stateful_components.read_text()
+    assert "a_test_state.var" in (web_dir / "pages" / "a.js").read_text()
+
+
+@pytest.mark.skipif(not processes.can_fork(), reason="Forking is not supported.")
+def test_compile_processes(compilable_app, monkeypatch):
+    """Test that the pages compiled in processes are the same as in threads.
+
+    Args:
+        compilable_app: compilable_app fixture.
+        monkeypatch: Pytest monkeypatch object.
+    """
+    app, web_dir = compilable_app
+    outputs = [
+        *(f"pages/{route}.js" for route in "abc"),
+        "utils/stateful_components.js",
+    ]
+
+    def add_pages(app: App):
+        app.get_frontend_packages = unittest.mock.Mock()
+        app.add_page(lambda: Box.create(Text.create(ATestState.var)), route="a")
+        app.add_page(lambda: Box.create(Text.create(ATestState.var)), route="b")
+        app.add_page(lambda: Box.create(Text.create("c")), route="c")
+
+    add_pages(app)
+    app.compile_()
+    compiled_in_threads = [(web_dir / output).read_text() for output in outputs]
+    (web_dir / "compile_cache.json").unlink()
+
+    monkeypatch.setenv("COMPILE_PROCESSES", "2")
+    app = App(theme=None)
+    add_pages(app)
+    app.compile_()
+    assert [(web_dir / output).read_text() for output in outputs] == compiled_in_threads
+    assert "a_test_state.var" in (web_dir / outputs[-1]).read_text()
+
+
+def test_sync_handler_executor_shutdown(monkeypatch):
+    """Test that the threads of the synchronous handlers stop with the app.
+
+    Args:
+        monkeypatch: Pytest monkeypatch object.
+    """
+    config = get_config()
+    monkeypatch.setattr(config, "sync_handler_threads", 2)
+    monkeypatch.setattr("nextpy.app.get_config", lambda: config)
+    app = App(state=State)
+    executor = app.sync_handler_executor
+    assert executor is not None
+    with TestClient(app.api):
+        assert executor.submit(lambda: 42).result() == 42
+    with pytest.raises(RuntimeError):
+        executor.submit(lambda: 42)
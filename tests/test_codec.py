@@ -0,0 +1,93 @@
+import pickle
+
+import cloudpickle
+import numpy as np
+import pandas as pd
+import pytest
+
+from nextpy.backend.codec import CloudpickleCodec, PickleCodec, StateCodec
+from nextpy.base import Base
+
+
+class Row(Base):
+    """A row of a table."""
+
+    id: int
+    name: str
+
+
+PAYLOADS = [
+    {"count": 1, "name": "test", "nested": {"items": [1, 2.5, None, "three"]}},
+    [Row(id=i, name=f"row {i}") for i in range(100)],
+    np.arange(10000, dtype=np.float64),
+    pd.DataFrame({"a": np.arange(1000), "b": [f"value {i}" for i in range(1000)]}),
+]
+
+
+def _assert_equal(loaded, expected):
+    """Assert that a decoded payload equals the original.
+
+    Args:
+        loaded: The decoded payload.
+        expected: The original payload.
+    """
+    if isinstance(expected, np.ndarray):
+        np.testing.assert_array_equal(loaded, expected)
+    elif isinstance(expected, pd.DataFrame):
+        pd.testing.assert_frame_equal(loaded, expected)
+    else:
+        assert loaded == expected
+
+
+@pytest.mark.parametrize("codec", [PickleCodec(), CloudpickleCodec()])
+@pytest.mark.parametrize("payload", PAYLOADS)
+def test_round_trip(codec: StateCodec, payload):
+    """Test that the codecs decode what they encode.
+
+    Args:
+        codec: The codec to test.
+        payload: The object to encode.
+    """
+    _assert_equal(codec.loads(codec.dumps(payload)), payload)
+
+
+def test_pickle_codec_out_of_band_buffers():
+    """Test that arrays are stored out of band and loaded writable."""
+    array = np.arange(10000, dtype=np.float64)
+    data = PickleCodec().dumps(array)
+    # The array is stored once, next to a small pickle.
+    assert array.nbytes < len(data) < array.nbytes + 1000
+
+    loaded = PickleCodec().loads(data)
+    loaded[0] = 42
+    assert loaded[0] == 42
+
+
+def test_pickle_codec_cloudpickle_fallback():
+    """Test that objects the standard pickler cannot handle are pickled with cloudpickle."""
+    codec = PickleCodec()
+    payload = {"fn": lambda x: x + 1}
+    loaded = codec.loads(codec.dumps(payload))
+    assert loaded["fn"](1) == 2
+    assert dict in codec._cloudpickle_types
+
+
+def test_pickle_codec_loads_plain_pickle():
+    """Test that states stored as plain (cloud)pickles can still be loaded."""
+    payload = {"count": 1}
+    assert PickleCodec().loads(cloudpickle.dumps(payload)) == payload
+    assert PickleCodec().loads(pickle.dumps(payload)) == payload
+
+
+def test_pickle_codec_compression():
+    """Test that large data is compressed with zstd."""
+    pytest.importorskip("zstandard")
+    payload = ["the same string"] * 10000
+    codec = PickleCodec(compression_threshold=1024)
+    data = codec.dumps(payload)
+    assert len(data) < len(PickleCodec().dumps(payload))
+    assert codec.loads(data) == payload
+
+    # Incompressible data is not compressed.
+    array = np.random.default_rng(0).integers(0, 256, 10000, dtype=np.uint8)
+    assert codec.dumps(array) == PickleCodec().dumps(array)
@@ -0,0 +1,175 @@
+import contextlib
+from typing import List, Optional, Tuple
+from unittest.mock import AsyncMock, Mock
+
+import pytest
+from fastapi.testclient import TestClient
+
+from nextpy.app import App, process
+from nextpy.backend.event import Event
+from nextpy.backend.metrics import (
+    EventMetrics,
+    Histogram,
+    MetricsHook,
+    event_metrics,
+)
+from nextpy.backend.state import StateManagerRedis
+
+from .states import GenState
+
+
+class RecordingHook(MetricsHook):
+    """A hook recording the spans it receives."""
+
+    spans: List[Tuple[str, Optional[str]]] = []
+
+    def on_span(self, stage: str, duration: float, event_name: Optional[str]):
+        """Record the span.
+
+        Args:
+            stage: The stage.
+            duration: The duration in seconds.
+            event_name: The name of the event being processed.
+        """
+        self.spans.append((stage, event_name))
+
+
+@pytest.fixture
+def metrics():
+    """Enable the metrics of the backend for a test.
+
+    Yields:
+        The metrics, cleared.
+    """
+    event_metrics.clear()
+    event_metrics.enabled = True
+    yield event_metrics
+    event_metrics.enabled = False
+    event_metrics.hooks.clear()
+    event_metrics.clear()
+
+
+def test_histogram():
+    """Test that the buckets of a histogram are rendered cumulatively."""
+    histogram = Histogram(buckets=(0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 2.0):
+        histogram.observe(value)
+    assert list(histogram.render("latency", {"stage": "a"})) == [
+        'latency_bucket{stage="a",le="0.1"} 2',
+        'latency_bucket{stage="a",le="1.0"} 3',
+        'latency_bucket{stage="a",le="+Inf"} 4',
+        'latency_sum{stage="a"} 2.65',
+        'latency_count{stage="a"} 4',
+    ]
+
+
+def test_disabled_metrics():
+    """Test that nothing is measured while the metrics are disabled."""
+    metrics = EventMetrics()
+    with metrics.event("state.handler"), metrics.span("handler"):
+        pass
+    metrics.increment("state_updates")
+    assert not metrics.stages
+    assert not metrics.events
+    assert metrics.counters["state_updates"] == 0
+
+
+def test_metrics_hook():
+    """Test that hooks receive the spans along with the event being processed."""
+    metrics = EventMetrics()
+    hook = RecordingHook()
+    metrics.add_hook(hook)
+    assert metrics.enabled
+
+    with metrics.event("state.handler"), metrics.span("handler"):
+        pass
+    with metrics.span("emit"):
+        pass
+    assert hook.spans == [
+        ("handler", "state.handler"),
+        ("event", "state.handler"),
+        ("emit", None),
+    ]
+    assert metrics.stages["handler"].count == 1
+    assert metrics.events["state.handler"].count == 1
+
+
+@pytest.mark.asyncio
+async def test_process_metrics(metrics: EventMetrics, token: str):
+    """Test that the stages of processing an event are measured.
+
+    Args:
+        metrics: The enabled metrics.
+        token: A token.
+    """
+    app = App(state=GenState)
+    event = Event(
+        token=token,
+        name="gen_state.go",
+        payload={"c": 3},
+        router_data={"pathname": "/", "query": {}},
+    )
+    async for _update in process(app, event, "mock_sid", {}, "127.0.0.1"):
+        pass
+
+    stages = metrics.stages
+    for stage in ("state_lock", "state_load", "preprocess", "state_save"):
+        assert stages[stage].count == 1
+    # The handler is measured when called and for each step of the generator.
+    assert stages["handler"].count == 5
+    assert stages["delta"].count == stages["postprocess"].count == 4
+
+    if isinstance(app.state_manager, StateManagerRedis):
+        await app.state_manager.close()
+
+
+def test_metrics_endpoint(metrics: EventMetrics, monkeypatch):
+    """Test that the metrics are served in the Prometheus text format.
+
+    Args:
+        metrics: The enabled metrics.
+        monkeypatch: Pytest monkeypatch object.
+    """
+    monkeypatch.setenv("METRICS_ENABLED", "true")
+    app = App(state=GenState)
+    metrics.record("handler", 0.02)
+    metrics.increment("state_updates")
+
+    response = TestClient(app.api).get("/metrics")
+    assert response.status_code == 200
+    lines = response.text.splitlines()
+    assert "# TYPE nextpy_event_stage_seconds histogram" in lines
+    assert 'nextpy_event_stage_seconds_bucket{stage="handler",le="0.025"} 1' in lines
+    assert "nextpy_state_updates_total 1" in lines
+    assert 'nextpy_event_loop_lag_seconds_count{loop="main"} 0' in lines
+    assert "# TYPE nextpy_computed_var_seconds summary" in lines
+
+
+@pytest.mark.asyncio
+async def test_unknown_event_metrics(metrics: EventMetrics, token: str):
+    """Test that the events not matching a handler are measured under one name.
+
+    Args:
+        metrics: The enabled metrics.
+        token: A token.
+    """
+    app = App(state=GenState)
+    assert app.sio is not None
+    app.sio.get_environ = Mock(
+        return_value={"asgi.scope": {"headers": []}, "REMOTE_ADDR": "127.0.0.1"}
+    )
+    app.event_namespace.emit = AsyncMock()  # type: ignore
+    for name in ("gen_state.go", "gen_state.hydrate", "gen_state.a", "b.c"):
+        event = Event(
+            token=token,
+            name=name,
+            payload={"c": 1},
+            router_data={"pathname": "/", "query": {}},
+        )
+        with contextlib.suppress(Exception):
+            await app.event_namespace.on_event("mock_sid", event.json())  # type: ignore
+    assert sorted(metrics.events) == ["gen_state.go", "gen_state.hydrate", "unknown"]
+    assert metrics.events["unknown"].count == 2
+
+    if isinstance(app.state_manager, StateManagerRedis):
+        await app.state_manager.close()
@@ -73,6 +73,8 @@ def test_automigration(tmp_working_dir, monkeypatch):
 
     config_mock = mock.Mock()
     config_mock.db_url = f"sqlite:///{tmp_working_dir}/nextpy.db"
+    config_mock.db_pool_size = config_mock.db_max_overflow = None
+    config_mock.db_pool_recycle = None
     monkeypatch.setattr(
         nextpy.data.model, "get_config", mock.Mock(return_value=config_mock)
     )
@@ -178,3 +180,107 @@ def test_automigration(tmp_working_dir, monkeypatch):
     # drop remaining tables
     Model.migrate(autogenerate=True)
     assert len(list(versions.glob("*.py"))) == 6
+
+
+def test_engine_cache(tmp_working_dir, monkeypatch):
+    """Test that the engines are created once per url, with the configured pool.
+
+    Args:
+        tmp_working_dir: directory where the database is stored
+        monkeypatch: pytest fixture to overwrite attributes
+    """
+    config_mock = mock.Mock()
+    config_mock.db_url = f"sqlite:///{tmp_working_dir}/nextpy.db"
+    config_mock.db_pool_size = 3
+    config_mock.db_max_overflow = 2
+    config_mock.db_pool_recycle = None
+    monkeypatch.setattr(
+        nextpy.data.model, "get_config", mock.Mock(return_value=config_mock)
+    )
+
+    engine = nextpy.data.model.get_engine()
+    assert nextpy.data.model.get_engine(config_mock.db_url) is engine
+    assert engine.pool.size() == 3  # type: ignore
+    with nextpy.data.model.session() as session:
+        assert session.get_bind() is engine
+    other_url = f"sqlite:///{tmp_working_dir}/other.db"
+    assert nextpy.data.model.get_engine(other_url) is not engine
+
+
+@pytest.mark.parametrize(
+    "url,async_url",
+    [
+        ("sqlite:///nextpy.db", "sqlite+aiosqlite:///nextpy.db"),
+        ("postgresql://user@host/db", "postgresql+asyncpg://user@host/db"),
+        ("postgresql+asyncpg://user@host/db", "postgresql+asyncpg://user@host/db"),
+    ],
+)
+def test_get_async_url(url: str, async_url: str):
+    """Test that the async driver of the dialect is used.
+
+    Args:
+        url: The database url.
+        async_url: The expected url with an async driver.
+    """
+    assert nextpy.data.model.get_async_url(url) == async_url
+
+
+def test_get_async_url_sync_driver():
+    """Test that a database url with a sync driver is not used for async sessions."""
+    with pytest.raises(ValueError):
+        nextpy.data.model.get_async_url("postgresql+psycopg2://user@host/db")
+
+
+@pytest.mark.parametrize(
+    "async_url",
+    ["postgresql+psycopg://user@host/db", "mysql+asyncmy://user@host/db"],
+)
+def test_get_async_url_configured(async_url: str, monkeypatch):
+    """Test that the configured async_db_url is used as is.
+
+    Args:
+        async_url: The configured async database url.
+        monkeypatch: pytest fixture to overwrite attributes
+    """
+    config_mock = mock.Mock()
+    config_mock.async_db_url = async_url
+    config_mock.db_url = "sqlite:///nextpy.db"
+    monkeypatch.setattr(
+        nextpy.data.model, "get_config", mock.Mock(return_value=config_mock)
+    )
+    assert nextpy.data.model.get_async_url() == async_url
+
+
+@pytest.mark.asyncio
+async def test_async_session(tmp_working_dir, monkeypatch):
+    """Test querying the database with an async session.
+
+    Args:
+        tmp_working_dir: directory where the database is stored
+        monkeypatch: pytest fixture to overwrite attributes
+    """
+    pytest.importorskip("aiosqlite")
+    config_mock = mock.Mock()
+    config_mock.async_db_url = None
+    config_mock.db_url = f"sqlite:///{tmp_working_dir}/nextpy.db"
+    config_mock.db_pool_size = config_mock.db_max_overflow = None
+    config_mock.db_pool_recycle = None
+    monkeypatch.setattr(
+        nextpy.data.model, "get_config", mock.Mock(return_value=config_mock)
+    )
+
+    class AsyncThing(Model, table=True):  # type: ignore
+        name: str
+
+    try:
+        engine = nextpy.data.model.get_async_engine()
+        async with engine.begin() as connection:
+            await connection.run_sync(AsyncThing.metadata.create_all)
+        async with nextpy.data.model.async_session() as session:
+            session.add(AsyncThing(name="foo"))
+            await session.commit()
+            result = (await session.exec(sqlmodel.select(AsyncThing))).all()
+        assert [thing.name for thing in result] == ["foo"]
+        await engine.dispose()
+    finally:
+        sqlmodel.SQLModel.metadata.clear()
@@ -0,0 +1,69 @@
+import asyncio
+import concurrent.futures
+import time
+
+import pytest
+
+from nextpy.backend.event import Event, run_in_thread
+from nextpy.backend.monitor import EventLoopMonitor, TimingStats
+from nextpy.backend.state import BaseState
+
+
+class SlowState(BaseState):
+    """A state with handlers blocking for a while."""
+
+    count: int = 0
+
+    @run_in_thread
+    def slow(self):
+        """Block the thread running the handler."""
+        time.sleep(0.3)
+        self.count += 1
+
+
+@pytest.mark.asyncio
+async def test_event_loop_monitor():
+    """Test that the monitor measures the time the event loop was blocked."""
+    monitor = EventLoopMonitor(interval=0.01)
+    monitor.start()
+    await asyncio.sleep(0.05)
+    # Block the event loop.
+    time.sleep(0.2)
+    await asyncio.sleep(0.05)
+    monitor.stop()
+
+    assert monitor.stats.count > 1
+    assert monitor.stats.max_time >= 0.15
+    assert 0 < monitor.stats.mean_time < monitor.stats.max_time
+
+
+@pytest.mark.asyncio
+async def test_event_loop_monitor_thread_handler():
+    """Test that a slow handler running in a thread does not block the event loop."""
+    state = SlowState()
+    monitor = EventLoopMonitor(interval=0.01)
+    monitor.start()
+    async for _update in state._process(
+        Event(token="", name=f"{SlowState.get_name()}.slow", payload={})
+    ):
+        pass
+    monitor.stop()
+
+    assert state.count == 1
+    assert monitor.stats.count > 10
+    assert monitor.stats.max_time < 0.15
+
+
+def test_timing_stats_threads():
+    """Test that the durations recorded by concurrent threads are all counted."""
+    stats = TimingStats()
+
+    def record():
+        for _ in range(10000):
+            stats.record(0.001)
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=4) as executor:
+        for future in [executor.submit(record) for _ in range(4)]:
+            future.result()
+    assert stats.count == 40000
+    assert stats.total_time == pytest.approx(40)
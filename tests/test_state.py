@@ -1,19 +1,24 @@
 from __future__ import annotations
 
 import asyncio
+import concurrent.futures
 import copy
 import datetime
 import functools
 import json
 import os
+import pickle
 import sys
+import threading
 from typing import Any, Dict, Generator, List, Optional, Union
-from unittest.mock import AsyncMock, Mock
+from unittest.mock import AsyncMock, Mock, patch
 
 import pytest
 from plotly.graph_objects import Figure
+from redis.asyncio import Redis
 
 import nextpy as xt
+from nextpy import constants
 from nextpy.app import App
 from nextpy.backend.event import Event, EventHandler
 from nextpy.backend.state import (
@@ -864,6 +869,31 @@ def test_add_var():
     assert DynamicState().dynamic_dict == {"k1": 5, "k2": 10}
 
 
+def test_add_var_substate():
+    """Test that substates read and write vars added to their parent dynamically."""
+
+    class DynamicParentState(BaseState):
+        pass
+
+    class DynamicChildState(DynamicParentState):
+        pass
+
+    class DynamicGrandchildState(DynamicChildState):
+        pass
+
+    DynamicParentState.add_var("dynamic_str", str, "foo")
+    assert "dynamic_str" in DynamicGrandchildState._inherited_var_names
+
+    parent = DynamicParentState()
+    grandchild = parent.get_substate(
+        [DynamicChildState.get_name(), DynamicGrandchildState.get_name()]
+    )
+    assert grandchild.dynamic_str == "foo"  # type: ignore
+    grandchild.dynamic_str = "bar"  # type: ignore
+    assert parent.dynamic_str == "bar"  # type: ignore
+    assert "dynamic_str" in parent.dirty_vars
+
+
 def test_add_var_default_handlers(test_state):
     test_state.add_var("rand_int", int, 10)
     assert "set_rand_int" in test_state.event_handlers
@@ -1220,6 +1250,43 @@ def test_cached_var_depends_on_event_handler(use_partial: bool):
     assert s.x == 45
 
 
+def test_computed_var_closure():
+    """Test that chained computed vars are all marked dirty by a single lookup."""
+
+    class ChainState(BaseState):
+        v: int = 0
+
+        @xt.cached_var
+        def double_v(self) -> int:
+            return self.v * 2
+
+        @xt.cached_var
+        def quadruple_v(self) -> int:
+            return self.double_v * 2
+
+    class ChainChildState(ChainState):
+        @xt.cached_var
+        def octuple_v(self) -> int:
+            return self.quadruple_v * 2
+
+    assert ChainState._computed_var_closure["v"] == {"double_v", "quadruple_v"}
+    assert ChainState._computed_var_closure["double_v"] == {"quadruple_v"}
+    assert ChainState._substate_var_dependencies["quadruple_v"] == {
+        ChainChildState.get_name()
+    }
+
+    s = ChainState()
+    child = s.substates[ChainChildState.get_name()]
+    assert child.octuple_v == 0
+    s.v = 1
+    assert s.dirty_vars == {"v", "double_v", "quadruple_v"}
+    assert child.dirty_vars == {"quadruple_v", "octuple_v"}
+    assert s.get_delta() == {
+        ChainState.get_full_name(): {"v": 1, "double_v": 2, "quadruple_v": 4},
+        ChainChildState.get_full_name(): {"octuple_v": 8},
+    }
+
+
 def test_computed_var_dependencies():
     """Test that a ComputedVar correctly tracks its dependencies."""
 
@@ -1408,7 +1475,7 @@ async def test_state_with_invalid_yield(capsys):
     assert "must only return/yield: None, Events or other EventHandlers" in captured.out
 
 
-@pytest.fixture(scope="function", params=["in_process", "redis"])
+@pytest.fixture(scope="function", params=["in_process", "redis", "redis_substates"])
 def state_manager(request) -> Generator[StateManager, None, None]:
     """Instance of state manager parametrized for redis and in-process.
 
@@ -1419,9 +1486,10 @@ def state_manager(request) -> Generator[StateManager, None, None]:
         A state manager instance
     """
     state_manager = StateManager.create(state=TestState)
-    if request.param == "redis":
+    if request.param.startswith("redis"):
         if not isinstance(state_manager, StateManagerRedis):
             pytest.skip("Test requires redis")
+        state_manager.substate_keys = request.param == "redis_substates"
     else:
         # explicitly NOT using redis
         state_manager = StateManagerMemory(state=TestState)
@@ -1494,6 +1562,75 @@ async def test_state_manager_contend(state_manager: StateManager, token: str):
         assert not state_manager._states_locks[token].locked()
 
 
+@pytest.mark.asyncio
+async def test_state_manager_memory_max_sessions():
+    """Test that the least recently used states are evicted over the session limit."""
+    state_manager = StateManagerMemory(state=TestState, max_sessions=2)
+    await state_manager.get_state("a")
+    await state_manager.get_state("b")
+    await state_manager.get_state("a")
+    await state_manager.get_state("c")
+
+    assert list(state_manager.states) == ["a", "c"]
+    assert state_manager.session_stats.sessions == 2
+    assert state_manager.session_stats.evicted == 1
+
+
+@pytest.mark.asyncio
+async def test_state_manager_memory_idle_timeout():
+    """Test that idle states are evicted."""
+    state_manager = StateManagerMemory(state=TestState, idle_timeout=10)
+    async with state_manager.modify_state("a"):
+        pass
+    await state_manager.get_state("b")
+    state_manager._last_access["a"] -= 20
+    await state_manager.get_state("b")
+
+    assert list(state_manager.states) == ["b"]
+    assert "a" not in state_manager._states_locks
+    assert state_manager.session_stats.expired == 1
+
+
+@pytest.mark.asyncio
+async def test_state_manager_memory_keep_in_use():
+    """Test that a state is not evicted while an event is modifying it."""
+    state_manager = StateManagerMemory(state=TestState, max_sessions=1)
+    async with state_manager.modify_state("a") as state:
+        await state_manager.get_state("b")
+        assert state_manager.states["a"] is state
+    await state_manager.get_state("b")
+    assert list(state_manager.states) == ["b"]
+
+
+@pytest.mark.asyncio
+async def test_state_manager_memory_spill(tmp_path):
+    """Test that evicted states are written to disk and restored.
+
+    Args:
+        tmp_path: A temporary directory.
+    """
+    state_manager = StateManagerMemory(
+        state=TestState, max_sessions=1, spill_dir=str(tmp_path)
+    )
+    async with state_manager.modify_state("a") as state:
+        state.num1 = 42
+    await state_manager.get_state("b")
+    assert list(state_manager.states) == ["b"]
+    assert len(list(tmp_path.iterdir())) == 1
+    assert state_manager.session_stats.spilled_bytes > 0
+
+    state = await state_manager.get_state("a")
+    assert state.num1 == 42
+    assert state_manager.session_stats.spilled == 2
+    assert state_manager.session_stats.restored == 1
+
+    # Expired states are not restored.
+    state_manager.token_expiration = -1
+    assert (await state_manager.get_state("b")).num1 != 42
+    assert (await state_manager.get_state("a")).num1 != 42
+    assert state_manager.session_stats.restored == 1
+
+
 @pytest.fixture(scope="function")
 def state_manager_redis() -> Generator[StateManager, None, None]:
     """Instance of state manager for redis only.
@@ -1529,6 +1666,74 @@ async def test_state_manager_lock_expire(state_manager_redis: StateManager, toke
             await asyncio.sleep(LOCK_EXPIRE_SLEEP)
 
 
+@pytest.mark.asyncio
+async def test_state_manager_redis_round_trips(
+    state_manager_redis: StateManagerRedis, token: str
+):
+    """Test that an uncontended modify_state takes two round trips to redis.
+
+    Args:
+        state_manager_redis: A state manager instance.
+        token: A token.
+    """
+    # Register the lua scripts and create the state.
+    async with state_manager_redis.modify_state(token):
+        pass
+
+    execute_command = state_manager_redis.redis.execute_command
+    commands = []
+
+    async def _execute_command(*args, **options):
+        commands.append(args[0])
+        return await execute_command(*args, **options)
+
+    state_manager_redis.redis.execute_command = _execute_command  # type: ignore
+    async with state_manager_redis.modify_state(token) as state:
+        state.num1 = 42
+    assert commands == ["EVALSHA", "EVALSHA"]
+
+    assert (await state_manager_redis.get_state(token)).num1 == 42
+    assert (await state_manager_redis.redis.get(f"{token}_lock")) is None
+
+
+@pytest.mark.asyncio
+async def test_state_manager_redis_unlock_only_own_lock(
+    state_manager_redis: StateManagerRedis, token: str
+):
+    """Test that a failing event does not release a lock obtained by another event.
+
+    Args:
+        state_manager_redis: A state manager instance.
+        token: A token.
+    """
+    lock_key = f"{token}_lock"
+    with pytest.raises(RuntimeError):
+        async with state_manager_redis.modify_state(token):
+            # Simulate the lock expiring and being obtained by another event.
+            await state_manager_redis.redis.set(lock_key, b"other")
+            raise RuntimeError("handler failed")
+    assert await state_manager_redis.redis.get(lock_key) == b"other"
+    await state_manager_redis.redis.delete(lock_key)
+
+
+@pytest.mark.asyncio
+async def test_state_manager_redis_unlock_on_save_error(
+    state_manager_redis: StateManagerRedis, token: str
+):
+    """Test that the lock is released when the state cannot be written back.
+
+    Args:
+        state_manager_redis: A state manager instance.
+        token: A token.
+    """
+    with patch.object(
+        state_manager_redis, "_dump_state", side_effect=TypeError("not picklable")
+    ), pytest.raises(TypeError):
+        async with state_manager_redis.modify_state(token):
+            pass
+    assert await state_manager_redis.redis.get(f"{token}_lock") is None
+
+
 @pytest.mark.asyncio
 async def test_state_manager_lock_expire_contend(
     state_manager_redis: StateManager, token: str
@@ -1572,6 +1777,195 @@ async def test_state_manager_lock_expire_contend(
     assert (await state_manager_redis.get_state(token)).num1 == exp_num1
 
 
+@pytest.mark.asyncio
+async def test_state_manager_redis_shared_lock_listener(
+    state_manager_redis: StateManagerRedis, token: str
+):
+    """Test that all lock waiters share a single pubsub and contention is recorded.
+
+    Args:
+        state_manager_redis: A state manager instance.
+        token: A token.
+    """
+    n_coroutines = 10
+    other_token = f"{token}_other"
+    pubsub = state_manager_redis.redis.pubsub
+    pubsubs = []
+
+    def _pubsub(**kwargs):
+        pubsubs.append(pubsub(**kwargs))
+        return pubsubs[-1]
+
+    state_manager_redis.redis.pubsub = _pubsub  # type: ignore
+
+    async def _coro(token: str):
+        async with state_manager_redis.modify_state(token) as state:
+            await asyncio.sleep(0.01)
+            state.num1 += 1
+
+    await asyncio.gather(
+        *[_coro(t) for t in (token, other_token) for _ in range(n_coroutines)]
+    )
+
+    assert len(pubsubs) == 1
+    for t in (token, other_token):
+        assert (await state_manager_redis.get_state(t)).num1 == n_coroutines
+    stats = state_manager_redis.lock_stats
+    assert stats.contended > 0
+    assert stats.notifications > 0
+    assert stats.waiting == 0
+    assert stats.max_wait_time > 0
+    assert not state_manager_redis._lock_waiters
+
+
+class DependentParentState(BaseState):
+    """A state with substates that do and do not depend on its vars."""
+
+    value: int = 0
+
+
+class DependentChildState(DependentParentState):
+    """A substate with a computed var depending on a parent var."""
+
+    @xt.var
+    def double_value(self) -> int:
+        """Double the parent value.
+
+        Returns:
+            The parent value times two.
+        """
+        return self.value * 2
+
+
+class IndependentChildState(DependentParentState):
+    """A substate without dependencies on its parent."""
+
+    other: int = 0
+
+
+def test_state_manager_redis_required_substates():
+    """Test that only the substates needed by an event are loaded with substate keys."""
+    state_manager = StateManagerRedis(
+        state=TestState, redis=Redis(), substate_keys=True
+    )
+
+    assert state_manager._get_required_substates() == [
+        TestState,
+        ChildState,
+        GrandchildState,
+        ChildState2,
+    ]
+
+    assert state_manager._get_required_substates(["test_state", "child_state2"]) == [
+        TestState,
+        ChildState2,
+    ]
+    assert state_manager._get_required_substates(["test_state", "child_state"]) == [
+        TestState,
+        ChildState,
+        GrandchildState,
+    ]
+    assert state_manager._get_required_substates(
+        ["test_state", "child_state", "grandchild_state"]
+    ) == [TestState, ChildState, GrandchildState]
+
+
+def test_state_manager_redis_required_dependent_substates():
+    """Test that substates depending on a loaded parent var are loaded as well."""
+    state_manager = StateManagerRedis(
+        state=DependentParentState, redis=Redis(), substate_keys=True
+    )
+    parent_name = DependentParentState.get_name()
+
+    # Changing the parent var from the independent substate marks the dependent one dirty.
+    assert state_manager._get_required_substates(
+        [parent_name, IndependentChildState.get_name()]
+    ) == [DependentParentState, DependentChildState, IndependentChildState]
+    assert state_manager._get_required_substates(
+        [parent_name, DependentChildState.get_name()]
+    ) == [DependentParentState, DependentChildState]
+
+
+def test_state_manager_redis_serialize_substate(test_state, child_state):
+    """Test that a single substate is pickled without the rest of the tree.
+
+    Args:
+        test_state: A state.
+        child_state: A child state.
+    """
+    state_manager = StateManagerRedis(state=TestState, redis=Redis())
+    child_state.value = "changed"
+    data = state_manager._serialize_substate(child_state)
+
+    loaded = state_manager._deserialize_substate(ChildState, data, test_state)
+    assert loaded.parent_state is test_state
+    assert loaded.substates == {}
+    assert loaded.value == "changed"
+    assert loaded.count == child_state.count
+    # Bound event handlers are not pickled, they are bound to the loaded instance.
+    assert loaded.change_both.args == (loaded,)
+    assert loaded.do_something.args == (loaded,)
+
+
+def test_pickle_state(test_state):
+    """Test that a state tree can be pickled without the bound event handlers.
+
+    Args:
+        test_state: A state.
+    """
+    test_state.num1 = 42
+    test_state.get_substate(["child_state"]).value = "changed"
+    assert "do_something" not in test_state.__getstate__()["__dict__"]
+
+    loaded = pickle.loads(pickle.dumps(test_state))
+    child_state = loaded.get_substate(["child_state"])
+    assert loaded.num1 == 42
+    assert child_state.value == "changed"
+    assert child_state.change_both.args == (child_state,)
+    assert loaded.do_something.args == (loaded,)
+    assert loaded.dirty_vars == test_state.dirty_vars
+
+
+@pytest.mark.asyncio
+async def test_state_manager_redis_substate_keys(token: str):
+    """Test that only modified substates are written with substate keys.
+
+    Args:
+        token: A token.
+    """
+    state_manager = StateManager.create(state=TestState)
+    if not isinstance(state_manager, StateManagerRedis):
+        pytest.skip("Test requires redis")
+    state_manager.substate_keys = True
+
+    child_path = ["test_state", "child_state"]
+    try:
+        # A new session writes every substate.
+        async with state_manager.modify_state(token, child_path) as state:
+            state.get_substate(child_path).count = 5
+        keys = {
+            StateManagerRedis._substate_key(token, state_cls)
+            for state_cls in (TestState, ChildState, ChildState2, GrandchildState)
+        }
+        assert {
+            key.decode() for key in await state_manager.redis.keys(f"{token}*")
+        } == keys
+
+        child2_key = StateManagerRedis._substate_key(token, ChildState2)
+        child2_data = await state_manager.redis.get(child2_key)
+        async with state_manager.modify_state(token, child_path) as state:
+            assert "child_state2" not in state.substates
+            state.get_substate(child_path).count += 1
+        # Untouched substates are not rewritten.
+        assert await state_manager.redis.get(child2_key) == child2_data
+
+        state = await state_manager.get_state(token)
+        assert state.get_substate(child_path).count == 6
+        assert state.get_substate(["test_state", "child_state2"]).value == ""
+    finally:
+        await state_manager.close()
+
+
 @pytest.fixture(scope="function")
 def mock_app(monkeypatch, state_manager: StateManager) -> xt.App:
     """Mock app fixture.
@@ -1748,6 +2142,14 @@ class BackgroundTaskState(BaseState):
         """
         yield
 
+    @xt.background
+    @xt.coalesce_updates(window=0.5)
+    async def background_task_coalesced(self):
+        """A background task that updates the state many times in a row."""
+        for i in range(10):
+            async with self:
+                self.order.append(str(i))
+
     def other(self):
         """Some other event that updates the state."""
         self.order.append("other")
@@ -1919,6 +2321,209 @@ async def test_background_task_reset(mock_app: xt.App, token: str):
     ]
 
 
+@pytest.mark.asyncio
+async def test_background_task_coalesced(mock_app: xt.App, token: str):
+    """Test that the updates of a background task are merged within its window.
+
+    Args:
+        mock_app: An app that will be returned by `get_app()`
+        token: A token.
+    """
+    router_data = {"query": {}}
+    mock_app.state_manager.state = mock_app.state = BackgroundTaskState
+    async for _update in xt.app.process(  # type: ignore
+        mock_app,
+        Event(
+            token=token,
+            name=f"{BackgroundTaskState.get_name()}.background_task_coalesced",
+            router_data=router_data,
+            payload={},
+        ),
+        sid="",
+        headers={},
+        client_ip="",
+    ):
+        pass
+
+    # Explicit wait for background tasks
+    for task in tuple(mock_app.background_tasks):
+        await task
+    assert not mock_app.background_tasks
+
+    # The first update is sent right away, the others are merged into the last one.
+    assert mock_app.event_namespace is not None
+    emit_mock = mock_app.event_namespace.emit
+    messages = [json.loads(call.args[1]) for call in emit_mock.mock_calls]
+    assert len(messages) == 2
+    assert messages[0]["delta"]["background_task_state"]["order"] == ["0"]
+    assert messages[-1]["delta"]["background_task_state"]["order"] == [
+        str(i) for i in range(10)
+    ]
+
+
+class ThreadState(BaseState):
+    """A state recording the threads its handlers run in."""
+
+    threads: List[str] = []
+
+    def handler(self):
+        """Record the thread."""
+        self.threads.append(threading.current_thread().name)
+
+    def generator(self):
+        """Record the thread at each step.
+
+        Yields:
+            None
+        """
+        self.threads.append(threading.current_thread().name)
+        yield
+        self.threads.append(threading.current_thread().name)
+        return ThreadState.handler
+
+    @xt.run_in_thread(enabled=False)
+    def loop_handler(self):
+        """Record the thread, always on the event loop."""
+        self.threads.append(threading.current_thread().name)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    ("name", "n_updates"), [("handler", 1), ("generator", 3), ("loop_handler", 1)]
+)
+async def test_process_event_executor(name: str, n_updates: int):
+    """Test that synchronous handlers run in the executor unless disabled.
+
+    Args:
+        name: The name of the handler.
+        n_updates: The number of updates sent by the handler.
+    """
+    event = Event(token="", name=f"{ThreadState.get_name()}.{name}", payload={})
+    with concurrent.futures.ThreadPoolExecutor(thread_name_prefix="handler") as pool:
+        state = ThreadState()
+        updates = [update async for update in state._process(event, pool)]
+        assert len(updates) == n_updates
+        assert updates[-1].final
+        in_pool = [thread.startswith("handler") for thread in state.threads]
+        assert in_pool and all(in_pool) == (name != "loop_handler")
+
+    # Without an executor, the handlers run on the event loop.
+    state = ThreadState()
+    _ = [update async for update in state._process(event)]
+    assert state.threads == [threading.current_thread().name] * len(state.threads)
+
+
+def test_run_in_thread_async():
+    """Test that async handlers cannot be marked to run in a thread."""
+    with pytest.raises(TypeError):
+
+        @xt.run_in_thread
+        async def handler(self):
+            pass
+
+
+class AsyncVarState(BaseState):
+    """A state with async and offloaded computed vars."""
+
+    value: int = 1
+
+    @xt.cached_var
+    async def doubled(self) -> int:
+        """An async computed var.
+
+        Returns:
+            Twice the value.
+        """
+        await asyncio.sleep(0)
+        return self.value * 2
+
+    @xt.cached_var
+    def quadrupled(self) -> int:
+        """A computed var depending on an async computed var.
+
+        Returns:
+            Twice the doubled value.
+        """
+        return self.doubled * 2
+
+    @xt.cached_var(offload=True)
+    def offloaded(self) -> int:
+        """A computed var evaluated in a thread.
+
+        Returns:
+            The sum of the value and the doubled value.
+        """
+        assert threading.current_thread() is not threading.main_thread()
+        return self.doubled + self.value
+
+
+@pytest.mark.asyncio
+async def test_async_computed_vars():
+    """Test that async and offloaded computed vars are evaluated before the delta."""
+    state = AsyncVarState()
+    # Async vars are not evaluated when read.
+    assert state.doubled is None
+
+    await state._resolve_computed_vars()
+    assert state.get_delta() == {
+        AsyncVarState.get_full_name(): {"doubled": 2, "quadrupled": 4, "offloaded": 3}
+    }
+    state._clean()
+    assert (state.doubled, state.quadrupled, state.offloaded) == (2, 4, 3)
+
+    # Nothing is evaluated again until the dependencies change.
+    await state._resolve_computed_vars()
+    assert not state._computed_values
+    assert state.get_delta() == {}
+
+    state.value = 5
+    await state._resolve_computed_vars()
+    assert state.get_delta() == {
+        AsyncVarState.get_full_name(): {
+            "value": 5,
+            "doubled": 10,
+            "quadrupled": 20,
+            "offloaded": 15,
+        }
+    }
+    state._clean()
+    assert state.doubled == 10
+
+    timings = AsyncVarState.get_computed_var_timings()
+    assert timings[f"{AsyncVarState.get_full_name()}.doubled"].count >= 2
+    assert timings[f"{AsyncVarState.get_full_name()}.offloaded"].count >= 2
+
+
+@pytest.mark.asyncio
+async def test_async_computed_vars_process():
+    """Test that the updates of an event include the async and offloaded computed vars."""
+    event = Event(
+        token="",
+        name=f"{AsyncVarState.get_full_name()}.set_value",
+        payload={"value": 3},
+    )
+    state = AsyncVarState()
+    with concurrent.futures.ThreadPoolExecutor() as pool:
+        updates = [update async for update in state._process(event, pool)]
+    assert updates[-1].delta == {
+        AsyncVarState.get_full_name(): {
+            "value": 3,
+            "doubled": 6,
+            "quadrupled": 12,
+            "offloaded": 9,
+        }
+    }
+
+
+def test_offload_async_computed_var():
+    """Test that async computed vars cannot be offloaded."""
+    with pytest.raises(TypeError):
+
+        @xt.cached_var(offload=True)
+        async def cvar(self) -> int:
+            return 0
+
+
 @pytest.mark.asyncio
 async def test_background_task_no_chain():
     """Test that a background task cannot be chained."""
@@ -2126,6 +2731,145 @@ def test_mutable_custom(mutable_state):
     assert_custom_dirty()
 
 
+def test_mutable_iteration(patch_state: PatchState):
+    """Test that the rows yielded while iterating a var are tracked.
+
+    Args:
+        patch_state: A test state.
+    """
+    rows = patch_state.rows
+    assert rows._self_top_level
+    for row in rows:
+        assert isinstance(row, MutableProxy)
+        assert not row._self_top_level
+    assert not patch_state.dirty_vars
+
+    for row in rows:
+        row["id"] += 1
+    assert patch_state.dirty_vars == {"rows"}
+    assert [row["id"] for row in patch_state.rows] == list(range(1, 11))
+    # Modifying nested rows cannot be sent as a patch.
+    assert patch_state._delta_patches == {"rows": None}
+
+
+class PatchState(BaseState):
+    """A state with large list and dict vars."""
+
+    rows: List[Dict[str, int]] = [{"id": i} for i in range(10)]
+    labels: Dict[str, str] = {str(i): f"label {i}" for i in range(10)}
+    small: List[int] = [1, 2]
+
+
+@pytest.fixture
+def patch_state(monkeypatch) -> PatchState:
+    """A state sending patches for vars with at least 5 items.
+
+    Args:
+        monkeypatch: Pytest monkeypatch object.
+
+    Returns:
+        The state.
+    """
+    monkeypatch.setattr(PatchState, "_delta_patch_min_length", 5)
+    return PatchState()
+
+
+def test_delta_patches(patch_state: PatchState):
+    """Test that appends and key changes of large vars are sent as patches.
+
+    Args:
+        patch_state: A test state.
+    """
+    name = patch_state.get_full_name()
+    key = constants.DeltaPatch.KEY
+
+    patch_state.rows.append({"id": 10})
+    patch_state.rows.extend(iter([{"id": 11}, {"id": 12}]))
+    patch_state.labels["10"] = "label 10"
+    patch_state.labels.update({"11": "label 11"})
+    del patch_state.labels["0"]
+    patch_state.labels.pop("1")
+    patch_state.small.append(3)
+    assert patch_state.get_delta() == {
+        name: {
+            "rows": {key: [["append", [{"id": 10}, {"id": 11}, {"id": 12}]]]},
+            "labels": {
+                key: [
+                    ["set", {"10": "label 10", "11": "label 11"}],
+                    ["delete", ["0", "1"]],
+                ]
+            },
+            # Small vars are sent in full.
+            "small": [1, 2, 3],
+        }
+    }
+    assert len(patch_state.rows) == 13
+    patch_state._clean()
+    assert not patch_state._delta_patches
+
+    # Other changes send the full value.
+    patch_state.rows[0]["id"] = 42
+    patch_state.labels.clear()
+    assert patch_state.get_delta() == {
+        name: {"rows": patch_state.rows, "labels": {}},
+    }
+    patch_state._clean()
+
+    # As do appends to a var that was replaced since the last delta.
+    patch_state.rows.append({"id": 13})
+    patch_state.rows = patch_state.rows[-5:]
+    patch_state.rows.append({"id": 14})
+    assert patch_state.get_delta()[name]["rows"][-1] == {"id": 14}
+    patch_state._clean()
+
+    # And patches as large as the value.
+    patch_state.labels.update({str(i): "new label" for i in range(10)})
+    assert len(patch_state.get_delta()[name]["labels"]) == 10
+
+
+def test_delta_patches_disabled(patch_state: PatchState, monkeypatch):
+    """Test that the full value is sent when patches are disabled.
+
+    Args:
+        patch_state: A test state.
+        monkeypatch: Pytest monkeypatch object.
+    """
+    monkeypatch.setattr(PatchState, "_delta_patch_min_length", None)
+    patch_state.rows.append({"id": 10})
+    assert len(patch_state.get_delta()[patch_state.get_full_name()]["rows"]) == 11
+
+
+def test_state_update_merge_patches():
+    """Test that merged updates apply the patches to the previous values."""
+    key = constants.DeltaPatch.KEY
+    first = StateUpdate(
+        delta={"state": {"rows": [1, 2], "labels": {"a": 1}, "count": 1}},
+        final=False,
+    )
+    second = StateUpdate(
+        delta={
+            "state": {
+                "rows": {key: [["append", [3]]]},
+                "labels": {key: [["set", {"b": 2}], ["delete", ["a"]]]},
+                "items": {key: [["append", [4]]]},
+            }
+        }
+    )
+    third = StateUpdate(delta={"state": {"items": {key: [["append", [5]]]}}})
+    assert first.merge(second).merge(third) == StateUpdate(
+        delta={
+            "state": {
+                "rows": [1, 2, 3],
+                "labels": {"b": 2},
+                "count": 1,
+                "items": {key: [["append", [4]], ["append", [5]]]},
+            }
+        }
+    )
+    # The merged updates are not modified.
+    assert first.delta["state"]["rows"] == [1, 2]
+
+
 def test_mutable_backend(mutable_state):
     """Test that mutable backend vars are tracked correctly.
 
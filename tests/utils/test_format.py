@@ -1,10 +1,19 @@
 import datetime
+import json
 from typing import Any, List
 
 import pytest
 
-from nextpy.backend.event import EventChain, EventHandler, EventSpec, FrontendEvent
+from nextpy.backend.event import (
+    Event,
+    EventChain,
+    EventHandler,
+    EventSpec,
+    FrontendEvent,
+)
+from nextpy.backend.state import StateUpdate
 from nextpy.backend.vars import BaseVar, Var
+from nextpy.base import Base
 from nextpy.frontend.components.tags.tag import Tag
 from nextpy.frontend.style import Style
 from nextpy.utils import format
@@ -703,3 +712,37 @@ def test_format_library_name(input: str, output: str):
 )
 def test_json_dumps(input, output):
     assert format.json_dumps(input) == output
+
+
+@pytest.mark.parametrize("use_orjson", [True, False])
+@pytest.mark.parametrize(
+    "delta",
+    [
+        {"k1": False, "k2": [1, 2.5, None, "ü"], 3: {"nested": (1, 2)}},
+        {"td": datetime.timedelta(1, 1, 1), "d": datetime.date(1989, 11, 9)},
+        {"set": {1}, "big": 2**70},
+        {"nan": float("nan"), "inf": [float("inf"), -float("inf")], "none": None},
+        {"tags": [Tag(name="a", props={"value": datetime.timedelta(1)})]},
+        TestState().dict(),
+    ],
+)
+def test_fast_json_dumps(monkeypatch, delta, use_orjson: bool):
+    """Test that state updates are encoded like the pydantic json path.
+
+    Args:
+        monkeypatch: The pytest monkeypatch fixture.
+        delta: The state delta to encode.
+        use_orjson: Whether to encode with orjson.
+    """
+    if use_orjson:
+        pytest.importorskip("orjson")
+    else:
+        monkeypatch.setattr(format, "orjson", None)
+    update = StateUpdate(
+        delta=format.format_state(delta),
+        events=[Event(token="token", name="state.handler", payload={"x": 1})],
+    )
+    # Compare NaN and Infinity by name, as NaN is not equal to itself.
+    assert json.loads(update.json(), parse_constant=str) == json.loads(
+        Base.json(update), parse_constant=str
+    )
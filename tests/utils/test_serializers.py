@@ -180,3 +180,44 @@ def test_serialize(value: Any, expected: str):
         expected: The expected result.
     """
     assert serializers.serialize(value) == expected
+
+
+def test_serializer_cache():
+    """Test that resolved serializers are cached and invalidated on registration."""
+
+    class Foo:
+        """A test class."""
+
+    class SubFoo(Foo):
+        """A subclass of the test class."""
+
+    # The missing serializer is cached too.
+    assert serializers.get_serializer(SubFoo) is None
+    assert serializers._SERIALIZER_CACHE[SubFoo] is None
+
+    def serialize_foo(value: Foo) -> str:
+        """Serialize a foo to a string.
+
+        Args:
+            value: The value to serialize.
+
+        Returns:
+            The serialized value.
+        """
+        return "foo"
+
+    # Registering a serializer applies to the subclasses already resolved.
+    serializers.serializer(serialize_foo)
+    assert serializers.get_serializer(SubFoo) == serialize_foo
+    assert serializers._SERIALIZER_CACHE[SubFoo] == serialize_foo
+
+    serializers.SERIALIZERS.pop(Foo)
+    assert serializers.get_serializer(SubFoo) is None
+
+
+def test_serialize_many():
+    """Test that serialize_many serializes each value with the serializer of its type."""
+    assert serializers.serialize_many(
+        ["test", 1, datetime.timedelta(1), EnumWithPrefix.FOO, object]
+    ) == ["test", "1", "1 day, 0:00:00", "prefix_foo", "object"]
+    assert serializers.serialize_many([1j]) == [None]
@@ -17,7 +17,7 @@ from nextpy.build import (
     prerequisites,
 )
 from nextpy.build import exec as utils_exec
-from nextpy.utils import types
+from nextpy.utils import path_ops, types
 from nextpy.utils.serializers import serialize
 
 
@@ -488,6 +488,22 @@ def test_output_system_info(mocker):
     utils_exec.output_system_info()
 
 
+def test_write_file(tmp_path):
+    """Test that a file is only written when its content changes, without leftovers.
+
+    Args:
+        tmp_path: A temporary directory.
+    """
+    path = str(tmp_path / "pages" / "index.js")
+    assert path_ops.write_file(path, "a")
+    mtime = os.stat(path).st_mtime_ns
+    assert not path_ops.write_file(path, "a")
+    assert os.stat(path).st_mtime_ns == mtime
+    assert path_ops.write_file(path, "b")
+    assert Path(path).read_text() == "b"
+    assert os.listdir(tmp_path / "pages") == ["index.js"]
+
+
 @pytest.mark.parametrize(
     "callable", [ExampleTestState.test_event_handler, test_func, lambda x: x]
 )